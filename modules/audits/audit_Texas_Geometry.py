@@ -1,59 +1,18 @@
-import json
+import argparse
+import sys
+import os
 
-# Load planetary data
-with open("data/regions/NorthAmerica/USA/Texas/incorp_Texas.json", "r", encoding="utf-8") as f:
-    data = json.load(f)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from modules.audits.region_audit import audit_regions
 
-# Define required semantic fields
-semantic_fields = ["modulation_logic", "action_flow", "karmic_balance", "epistemic_validated", "civic_resonance"]
+TEXAS_PATH = "data/regions/NorthAmerica/USA/Texas/incorp_Texas.json"
 
-def audit_city(city_name, city_data):
-    report = {
-        "city": city_name,
-        "score": None,
-        "mismatches": [],
-        "missing_semantics": [],
-        "retrograde_roles_expected": [],
-        "retrograde_roles_matched": []
-    }
 
-    matches = city_data.get("geometry_matches", [])
-    if not matches:
-        report["score"] = 0
-        report["mismatches"].append("No geometry_matches found")
-        return report
+if __name__ == "__main__":
+    # Texas shortcut for modules/createderived/audit_regions.py
+    parser = argparse.ArgumentParser(description="Audit archetype matches of incorp_Texas.json")
+    parser.add_argument("--output", default="audit_Texas.csv", help="summary file (default: audit_Texas.csv)")
+    args = parser.parse_args()
 
-    top_match = matches[0]
-    report["score"] = top_match.get("score", 0)
-    report["mismatches"] = top_match.get("mismatches", [])
-
-    # Check semantic fields
-    pattern = top_match.get("pattern", {})
-    for field in semantic_fields:
-        if field not in pattern:
-            report["missing_semantics"].append(field)
-
-    # Check retrograde amplification
-    expected_retro_roles = pattern.get("retrograde_roles", [])
-    matched_retro_roles = top_match.get("retrograde_roles", [])
-    report["retrograde_roles_expected"] = expected_retro_roles
-    report["retrograde_roles_matched"] = matched_retro_roles
-
-    return report
-
-# Run audit across all cities
-audit_results = []
-for city_name, city_data in data.items():
-    if city_name == "geometry_matches":
-        continue
-    audit_results.append(audit_city(city_name, city_data))
-
-# Print summary
-for result in audit_results:
-    print(f"\n📍 {result['city']}")
-    print(f"  Score: {result['score']}")
-    print(f"  Mismatches: {len(result['mismatches'])}")
-    if result["missing_semantics"]:
-        print(f"  ❌ Missing semantic fields: {result['missing_semantics']}")
-    if result["retrograde_roles_expected"] and not result["retrograde_roles_matched"]:
-        print(f"  ⚠️ Retrograde roles expected but not matched: {result['retrograde_roles_expected']}")
\ No newline at end of file
+    summary = audit_regions([TEXAS_PATH], args.output)
+    print(f"[OK] Audited {summary['entities']} cities -> {args.output}")
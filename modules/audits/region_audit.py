@@ -0,0 +1,223 @@
+import csv
+import json
+import multiprocessing
+import os
+from collections import deque
+
+from modules.canonical_registry import registry
+from modules.pipeline.ingest import iter_batches
+from modules.planetary_modulation.match_geometry import ARCHETYPE_MASTER_PATH
+from modules.storage.normalized_store import COMPRESSION_SUFFIXES, is_normalized_path, iter_region_records
+
+REGIONS_ROOT = "data/regions"
+
+# Fields every matched archetype pattern is expected to carry
+SEMANTIC_FIELDS = ["modulation_logic", "action_flow", "karmic_balance", "epistemic_validated", "civic_resonance"]
+
+AUDIT_COLUMNS = [
+    "file", "city", "source", "archetype_id", "score", "mismatches",
+    "missing_semantics", "retrograde_roles_expected", "retrograde_roles_matched", "retrograde_roles_missing",
+]
+
+# File suffixes of incorp_<region> files, verbose and normalized
+REGION_SUFFIXES = (".json",) + tuple(COMPRESSION_SUFFIXES.values())
+
+# Entities sent to a pool worker at a time by audit_regions()
+AUDIT_BATCH_SIZE = 256
+
+# Entries in an incorp_*.json object that are not entities
+NON_ENTITY_KEYS = {"geometry_matches"}
+
+
+def region_file_key(path):
+    """(folder, <region>) of an incorp_<region> file in either format."""
+    name = os.path.basename(path)
+    for suffix in REGION_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+            break
+    return os.path.dirname(os.path.abspath(path)), name.replace("incorp_", "", 1)
+
+
+def find_region_files(paths):
+    """
+    incorp_*.json files (and normalized incorp_*.jsonl[.gz|.zst]) named directly or
+    found under the given directories, sorted.
+
+    A region is audited from one file only: when a folder holds the same region in
+    several formats (say incorp_Texas.json left over from a run before --normalized),
+    the most recently written file is kept, normalized on a tie, and the others are
+    skipped with a warning.
+    """
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, _, filenames in os.walk(path):
+                found.extend(
+                    os.path.join(dirpath, name) for name in filenames
+                    if name.startswith("incorp_") and name.endswith(REGION_SUFFIXES)
+                )
+        else:
+            found.append(path)
+
+    by_region = {}
+    for path in sorted(found):
+        candidates = by_region.setdefault(region_file_key(path), [])
+        if not any(os.path.samefile(path, other) for other in candidates):
+            candidates.append(path)
+    files = []
+    for candidates in by_region.values():
+        if len(candidates) > 1:
+            candidates.sort(key=lambda path: (os.path.getmtime(path), is_normalized_path(path)), reverse=True)
+            print(f"[WARN] {len(candidates)} files for one region; auditing {candidates[0]}, "
+                  f"skipping {', '.join(candidates[1:])}")
+        files.append(candidates[0])
+    return sorted(files)
+
+
+def top_match(city_data, archetypes):
+    """
+    (source, top match, pattern) of one synthesis.
+
+    "ArchetypeMatches" (written by modulate_*.py --archetypes) are resolved against
+    archetype_master.json; the legacy "geometry_matches" carry their pattern inline.
+    """
+    matches = city_data.get("ArchetypeMatches")
+    if matches:
+        match = matches[0]
+        return "ArchetypeMatches", match, archetypes.get(match.get("archetype_id"), {})
+    matches = city_data.get("geometry_matches")
+    if matches:
+        match = matches[0]
+        return "geometry_matches", match, match.get("pattern", {})
+    return None, None, {}
+
+
+def audit_city(city_name, city_data, archetypes):
+    """Audit row for one synthesis: top-match score, mismatches, missing semantics and retrograde roles."""
+    source, match, pattern = top_match(city_data, archetypes)
+    report = {
+        "city": city_name,
+        "source": source,
+        "archetype_id": None,
+        "score": 0,
+        "mismatches": [],
+        "missing_semantics": [],
+        "retrograde_roles_expected": [],
+        "retrograde_roles_matched": [],
+        "retrograde_roles_missing": [],
+    }
+    if match is None:
+        report["mismatches"].append("No archetype matches found")
+        return report
+
+    report["archetype_id"] = match.get("archetype_id")
+    report["score"] = match.get("score", 0)
+    report["mismatches"] = match.get("mismatches", [])
+    report["missing_semantics"] = [field for field in SEMANTIC_FIELDS if field not in pattern]
+
+    expected = pattern.get("retrograde_roles", [])
+    matched = match.get("retrograde_roles", [])
+    report["retrograde_roles_expected"] = expected
+    report["retrograde_roles_matched"] = matched
+    report["retrograde_roles_missing"] = [role for role in expected if role not in matched]
+    return report
+
+
+def iter_entities(files):
+    """(file, city, synthesis) of every entity in the given incorp_* files, streamed record by record."""
+    for path in files:
+        for city_name, city_data in iter_region_records(path):
+            if city_name in NON_ENTITY_KEYS or not isinstance(city_data, dict):
+                continue
+            yield path, city_name, city_data
+
+
+def audit_batch(entities):
+    """Audit rows for a list of (file, city, synthesis) entities."""
+    archetypes = registry.get(ARCHETYPE_MASTER_PATH)
+    return [{"file": path, **audit_city(city_name, city_data, archetypes)}
+            for path, city_name, city_data in entities]
+
+
+def _format_csv(value):
+    if isinstance(value, list):
+        return ";".join(item if isinstance(item, str) else json.dumps(item, ensure_ascii=False) for item in value)
+    return "" if value is None else value
+
+
+class AuditWriter:
+    """Audit rows to CSV (lists joined with ';') or JSON lines, chosen by format or file extension."""
+
+    def __init__(self, path, fmt=None):
+        if fmt is None and path.endswith(".json"):
+            # The rows are JSON lines, not one JSON document
+            raise ValueError(f"Audit output {path}: use a .jsonl extension for JSON lines, or .csv")
+        self.fmt = fmt or ("jsonl" if path.endswith(".jsonl") else "csv")
+        if self.fmt not in ("csv", "jsonl"):
+            raise ValueError(f"Unknown audit format '{self.fmt}'. Expected 'csv' or 'jsonl'")
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        self.f = open(path, "w", newline="", encoding="utf-8")
+        if self.fmt == "csv":
+            self.writer = csv.DictWriter(self.f, fieldnames=AUDIT_COLUMNS)
+            self.writer.writeheader()
+
+    def write(self, row):
+        if self.fmt == "csv":
+            self.writer.writerow({column: _format_csv(row.get(column)) for column in AUDIT_COLUMNS})
+        else:
+            self.f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def audit_regions(paths, output, fmt=None, workers=1, batch_size=AUDIT_BATCH_SIZE):
+    """
+    Audit every incorp_*.json file under paths and write one row per entity to output.
+
+    Entities are streamed with iter_region_records() and each row is written as
+    soon as it is audited, so a region is never held in memory whole. With
+    workers > 1, entities go to a process pool in batches of batch_size, at most
+    two batches in flight per worker, so a single large file is audited in
+    parallel too; rows are written in input order, as in a serial run.
+
+    Returns:
+        dict: Totals — files, entities, entities without matches, with missing
+        semantic fields and with unmatched retrograde roles.
+    """
+    files = find_region_files(paths)
+    summary = {"files": len(files), "entities": 0, "unmatched": 0,
+               "missing_semantics": 0, "retrograde_missing": 0}
+    batches = iter_batches(iter_entities(files), batch_size)
+    with AuditWriter(output, fmt) as writer:
+        if workers <= 1:
+            for batch in batches:
+                _write_rows(writer, audit_batch(batch), summary)
+            return summary
+        with multiprocessing.Pool(processes=workers) as pool:
+            pending = deque()
+            for batch in batches:
+                pending.append(pool.apply_async(audit_batch, (batch,)))
+                if len(pending) >= workers * 2:
+                    _write_rows(writer, pending.popleft().get(), summary)
+            while pending:
+                _write_rows(writer, pending.popleft().get(), summary)
+    return summary
+
+
+def _write_rows(writer, rows, summary):
+    for row in rows:
+        writer.write(row)
+        summary["entities"] += 1
+        summary["unmatched"] += row["source"] is None
+        summary["missing_semantics"] += bool(row["missing_semantics"])
+        summary["retrograde_missing"] += bool(row["retrograde_roles_missing"])
@@ -0,0 +1,155 @@
+import csv
+import hashlib
+import json
+import os
+import threading
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CANONICAL_DIRS = ("canonical", "templates")
+
+
+def load_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_csv_rows(path):
+    with open(path, newline='', encoding="utf-8") as csvfile:
+        return list(csv.DictReader(csvfile))
+
+
+DEFAULT_LOADERS = {
+    ".json": load_json,
+    ".csv": load_csv_rows,
+}
+
+
+def file_digest(path, chunk_size=1 << 16):
+    """sha256 of a file's bytes."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class CanonicalRegistry:
+    """
+    Process-wide, lazily populated cache of the files under canonical/ and templates/.
+
+    Each entry is keyed by (relative path, loader) so the same file can be held both
+    raw (parsed JSON / CSV rows) and in a derived form such as load_bodies() tuples or
+    a ZoneIndex. An entry is reloaded only when the file changes: the (mtime, size)
+    stat is checked on every access and, when it moved, the sha256 is compared so a
+    touch without a content change keeps the cached value.
+
+    Usage:
+        from modules.canonical_registry import registry
+        civic_roles = registry.get("canonical/roles/civic_roles.json")
+        bodies = registry.get("canonical/zodiac/bodies.csv", load_bodies)
+
+    Returned objects are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, root=REPO_ROOT, check_changes=True):
+        self.root = root
+        self.check_changes = check_changes
+        self._entries = {}
+        self._lock = threading.RLock()
+
+    def path(self, relpath):
+        if os.path.isabs(relpath):
+            return relpath
+        return os.path.join(self.root, relpath)
+
+    def _stat(self, path):
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    def get(self, relpath, loader=None):
+        """Return the parsed file, loading it on first use or after it changed on disk."""
+        path = self.path(relpath)
+        if loader is None:
+            ext = os.path.splitext(path)[1].lower()
+            if ext not in DEFAULT_LOADERS:
+                raise ValueError(f"No default loader for {relpath}")
+            loader = DEFAULT_LOADERS[ext]
+        key = (os.path.normpath(path), loader)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self.check_changes:
+                return entry["value"]
+
+            stat = self._stat(path)
+            if entry is not None:
+                if entry["stat"] == stat:
+                    return entry["value"]
+                digest = file_digest(path)
+                if digest == entry["digest"]:
+                    entry["stat"] = stat
+                    return entry["value"]
+            else:
+                digest = file_digest(path)
+
+            value = loader(path)
+            self._entries[key] = {"stat": stat, "digest": digest, "value": value}
+            return value
+
+    def digest(self, relpath):
+        """Current sha256 of one canonical file."""
+        return file_digest(self.path(relpath))
+
+    def version(self, relpaths=None):
+        """
+        Combined sha256 over a set of canonical files (default: every file under
+        canonical/ and templates/). Changes whenever any of those files change.
+        """
+        relpaths = sorted(relpaths) if relpaths is not None else self.list_files()
+        h = hashlib.sha256()
+        for relpath in relpaths:
+            h.update(relpath.encode("utf-8"))
+            h.update(self.digest(relpath).encode("ascii"))
+        return h.hexdigest()
+
+    def list_files(self):
+        """Relative paths of every file under the canonical directories."""
+        files = []
+        for folder in CANONICAL_DIRS:
+            base = os.path.join(self.root, folder)
+            for dirpath, _, filenames in os.walk(base):
+                for name in filenames:
+                    rel = os.path.relpath(os.path.join(dirpath, name), self.root)
+                    files.append(rel.replace(os.sep, "/"))
+        return sorted(files)
+
+    def preload(self):
+        """Eagerly load every JSON/CSV file under canonical/ and templates/."""
+        loaded = []
+        for relpath in self.list_files():
+            if os.path.splitext(relpath)[1].lower() not in DEFAULT_LOADERS:
+                continue
+            try:
+                self.get(relpath)
+                loaded.append(relpath)
+            except (ValueError, OSError) as e:
+                print(f"[WARN] Could not preload {relpath}: {e}")
+        return loaded
+
+    def invalidate(self, relpath=None):
+        """Drop one file's cached entries, or everything when relpath is None."""
+        with self._lock:
+            if relpath is None:
+                self._entries.clear()
+                return
+            path = os.path.normpath(self.path(relpath))
+            for key in [k for k in self._entries if k[0] == path]:
+                del self._entries[key]
+
+
+registry = CanonicalRegistry()
+
+
+def get_canonical(relpath, loader=None):
+    """Shortcut for registry.get() on the process-wide registry."""
+    return registry.get(relpath, loader)
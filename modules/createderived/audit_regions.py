@@ -0,0 +1,31 @@
+import argparse
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from modules.audits.region_audit import REGIONS_ROOT, audit_regions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Audit archetype matches of every incorp_*.json file under the given paths")
+    parser.add_argument("paths", nargs="*", default=[REGIONS_ROOT],
+                        help=f"incorp_*.json / incorp_*.jsonl[.gz|.zst] files or directories to search (default: {REGIONS_ROOT})")
+    parser.add_argument("--output", default="audit_summary.csv",
+                        help="summary file, one row per entity (default: audit_summary.csv)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None,
+                        help="summary format (default: from the --output extension, else csv)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes, auditing batches of entities (default: 1, serial)")
+    args = parser.parse_args()
+    if args.format is None and args.output.endswith(".json"):
+        parser.error("--output: the summary is JSON lines or CSV; use a .jsonl or .csv extension")
+
+    summary = audit_regions(args.paths, args.output, args.format, args.workers)
+    if not summary["files"]:
+        print("[WARN] No incorp_*.json files found.")
+        sys.exit(1)
+    print(f"[OK] Audited {summary['entities']} entities in {summary['files']} files -> {args.output}")
+    print(f"[INFO] Without archetype matches: {summary['unmatched']}, "
+          f"missing semantic fields: {summary['missing_semantics']}, "
+          f"unmatched retrograde roles: {summary['retrograde_missing']}")
@@ -0,0 +1,22 @@
+import argparse
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from modules.planetary_modulation.ephemeris_table import DEFAULT_TABLE_PATH, build_ephemeris_table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Precompute a memory-mappable table of sidereal longitudes for every body in bodies.csv")
+    parser.add_argument("--start-year", type=int, default=1500, help="first year covered (default: 1500)")
+    parser.add_argument("--end-year", type=int, default=2500, help="year the table stops at (default: 2500)")
+    parser.add_argument("--step-days", type=float, default=1.0, help="grid step in days (default: 1)")
+    parser.add_argument("--dtype", choices=["float64", "float32"], default="float64",
+                        help="storage type; float32 halves the file and adds ~3e-5 degree of error")
+    parser.add_argument("--output", default=DEFAULT_TABLE_PATH, help=f"table path (default: {DEFAULT_TABLE_PATH})")
+    args = parser.parse_args()
+
+    print(f"[INFO] Building {args.start_year}-{args.end_year} table every {args.step_days} days → {args.output}")
+    meta = build_ephemeris_table(args.output, args.start_year, args.end_year, args.step_days, args.dtype)
+    print(f"[OK] {meta['rows']} rows x {len(meta['columns'])} columns written (digest {meta['digest']})")
@@ -0,0 +1,28 @@
+import argparse
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from modules.storage.normalized_store import COMPRESSION_SUFFIXES, expand_region
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Expand a normalized incorp_*.jsonl[.gz|.zst] file to the verbose incorp_*.json layout")
+    parser.add_argument("normalized_file", help="path to incorp_<region>.jsonl[.gz|.zst]")
+    parser.add_argument("--output", default=None,
+                        help="verbose JSON path (default: incorp_<region>.json next to the input)")
+    parser.add_argument("--unicode", action="store_true",
+                        help="write non-ASCII characters as is (as modulate_Jiva.py does)")
+    args = parser.parse_args()
+
+    output = args.output
+    if output is None:
+        output = args.normalized_file
+        for suffix in COMPRESSION_SUFFIXES.values():
+            if output.endswith(suffix):
+                output = output[:-len(suffix)]
+                break
+        output += ".json"
+    expand_region(args.normalized_file, output, ensure_ascii=not args.unicode)
+    print(f"[OK] Expanded {args.normalized_file} -> {output}")
@@ -0,0 +1,60 @@
+import argparse
+import sys
+import os
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from modules.storage.sqlite_store import DEFAULT_DB_PATH, connect, query_entities
+
+
+def body_value(text):
+    """Parse a Body=value filter."""
+    body, sep, value = text.partition("=")
+    if not sep or not body or not value:
+        raise argparse.ArgumentTypeError(f"expected Body=value, got '{text}'")
+    return body, value
+
+
+def body_zone(text):
+    body, value = body_value(text)
+    try:
+        return body, int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"zone must be a number, got '{value}'") from None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Find entities in the results database written by modulate_*.py --sqlite",
+        epilog="example: --region Texas --engine Sun=Spark --retrograde Saturn")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help=f"results database (default: {DEFAULT_DB_PATH})")
+    parser.add_argument("--region", default=None, help="only entities of this region (e.g. Texas, Jiva)")
+    parser.add_argument("--kind", choices=["city", "jiva"], default=None, help="only entities of this kind")
+    parser.add_argument("--engine", type=body_value, action="append", default=[], metavar="BODY=ENGINE",
+                        help="body sits in this engine of the EngineMap (repeatable)")
+    parser.add_argument("--zone", type=body_zone, action="append", default=[], metavar="BODY=ZONE",
+                        help="body is in this modulation zone (repeatable)")
+    parser.add_argument("--retrograde", action="append", default=[], metavar="BODY",
+                        help="body is Retrograde (repeatable)")
+    parser.add_argument("--unit", action="append", default=[], metavar="UNIT_ID",
+                        help="semantic unit matched in any engine (repeatable)")
+    parser.add_argument("--geometry", action="append", default=[], metavar="GEOMETRY_ID",
+                        help="geometry matched in any engine (repeatable)")
+    parser.add_argument("--count", action="store_true", help="only print the number of matches")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"[ERROR] No results database at {args.db}. Run modulate_*.py with --sqlite first.")
+        sys.exit(1)
+
+    conn = connect(args.db)
+    start = time.perf_counter()
+    rows = query_entities(conn, args.region, args.kind, args.engine, args.zone,
+                          args.retrograde, args.unit, args.geometry)
+    elapsed = (time.perf_counter() - start) * 1000
+    conn.close()
+
+    if not args.count:
+        for region, kind, name in rows:
+            print(f"{region}\t{kind}\t{name}")
+    print(f"[OK] {len(rows)} matching entities ({elapsed:.1f} ms)")
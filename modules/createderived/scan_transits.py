@@ -0,0 +1,57 @@
+import argparse
+import csv
+import sys
+import os
+from datetime import timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from modules.planetary_modulation.load_bodies import get_bodies
+from modules.planetary_modulation.transit_scanner import (
+    scan_transits, ZoneIngress, RetrogradeChange, SemanticFormation
+)
+
+EVENT_COLUMNS = ["time", "event", "body", "unit_id", "from", "to"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Report zone ingresses, retrograde changes and semantic unit formations over a time window")
+    parser.add_argument("start", help="window start, UTC '%%Y/%%m/%%d %%H:%%M:%%S'")
+    parser.add_argument("end", help="window end, UTC '%%Y/%%m/%%d %%H:%%M:%%S'")
+    parser.add_argument("--step-hours", type=float, default=6.0, help="sampling step in hours (default: 6)")
+    parser.add_argument("--bodies", nargs="+", default=None, help="bodies to scan (default: all in bodies.csv)")
+    parser.add_argument("--zones", nargs="+", type=int, default=None,
+                        help="only report ingresses into these zone numbers")
+    parser.add_argument("--no-ingress", action="store_true", help="skip zone ingress events")
+    parser.add_argument("--no-retrograde", action="store_true", help="skip retrograde_status changes")
+    parser.add_argument("--formation", nargs="+", default=[], metavar="UNIT_ID",
+                        help="report formation of these semantic_24_sets units")
+    parser.add_argument("--min-score", type=int, default=None,
+                        help="pool numbers required for a formation (default: whole number_pool)")
+    parser.add_argument("--exact", action="store_true", help="polish event times against ephem directly")
+    parser.add_argument("--output", default=None, help="CSV file to write (default: stdout)")
+    args = parser.parse_args()
+
+    bodies = args.bodies or [body for body, *_ in get_bodies()]
+
+    predicates = []
+    if not args.no_ingress:
+        predicates += [ZoneIngress(body, args.zones) for body in bodies]
+    if not args.no_retrograde:
+        predicates += [RetrogradeChange(body) for body in bodies]
+    predicates += [SemanticFormation(unit_id, args.min_score, dissolve=True) for unit_id in args.formation]
+    if not predicates:
+        print("[ERROR] Nothing to scan: every event type is disabled.")
+        sys.exit(1)
+
+    events = scan_transits(args.start, args.end, step=timedelta(hours=args.step_hours),
+                           bodies=bodies, predicates=predicates, exact=args.exact)
+
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    writer = csv.DictWriter(out, fieldnames=EVENT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for event in events:
+        writer.writerow({**event, "time": event["time"].strftime("%Y/%m/%d %H:%M:%S")})
+    if args.output:
+        out.close()
+        print(f"[INFO] {len(events)} events written to {args.output}")
@@ -0,0 +1,326 @@
+from types import MappingProxyType
+
+from modules.canonical_registry import registry
+from modules.geometry.enrich_geometry_sets_from_semantic_units import compile_geometry_sets
+from modules.geometry.flatten_city_data import flatten_city_data
+from modules.planetary_modulation.load_bodies import get_bodies
+
+# Fields compute_planetary_info() produces per body
+EPHEMERIS_FIELDS = (
+    "longitude", "planet_number", "planet_mythic_lineage", "planet_healing_bias",
+    "planet_civic_roles", "planet_semantic_function", "planet_role_description",
+    "zone", "sign", "sign_ruler", "nakshatra", "nakshatra_ruler", "template_House",
+    "modulation_stage", "zodiac_number", "containment_flag", "mythic_tags",
+    "Engine", "Category", "CollectiveMeaning", "zoneEssence", "retrograde_status",
+)
+
+# Fields the vibakthi / civic_roles / template_washer enrichment adds
+ROLE_FIELDS = ("role", "deity", "semantic_function", "vibhakti")
+CIVIC_FIELDS = ("civic_role", "civic_function", "civic_lineage", "civic_opposite", "civic_description")
+WASHER_FIELDS = (
+    "washer_ring", "washer_force", "washer_force_type", "washer_number",
+    "washer_semantic_city_role", "washer_semantic_family_role",
+)
+
+BODY_FIELDS = EPHEMERIS_FIELDS + ROLE_FIELDS + CIVIC_FIELDS + WASHER_FIELDS
+_BODY_FIELD_SET = frozenset(BODY_FIELDS)
+
+# bodies.csv columns compute_planetary_info() copies into every chart
+BODIES_CSV_FIELDS = (
+    "planet_number", "planet_mythic_lineage", "planet_healing_bias",
+    "planet_civic_roles", "planet_semantic_function", "planet_role_description",
+)
+
+# Fields that actually change with the timestamp: longitude, zone record, retrograde status
+DYNAMIC_FIELDS = tuple(field for field in EPHEMERIS_FIELDS if field not in BODIES_CSV_FIELDS)
+
+_NO_STATIC = MappingProxyType({})
+
+BIRTH_FIELDS = [
+    "Ascendant", "Thumbprint", "SemanticDrift", "HealingBias",
+    "MythicLineage", "FoundingIntentCanonical", "FoundingIntentNarrative"
+]
+
+
+class BodyPlacement:
+    """
+    One body of a chart held in __slots__ instead of a per-body dict.
+
+    Unset fields are simply absent; get() mirrors dict.get so code written against
+    the planet_info dicts (flatten_city_data, score_pattern, ...) works unchanged.
+    With an EnrichmentTemplate the per-body constants (bodies.csv columns, roles,
+    civic roles, washer) are not copied: `static` references the template's shared
+    block and only DYNAMIC_FIELDS live in the slots. A field set on the body
+    overrides its static value.
+    """
+
+    __slots__ = ("name", "static") + BODY_FIELDS
+
+    def __init__(self, name, data=None, static=None):
+        self.name = name
+        self.static = _NO_STATIC if static is None else static
+        if data:
+            for field in (EPHEMERIS_FIELDS if static is None else DYNAMIC_FIELDS):
+                if field in data:
+                    setattr(self, field, data[field])
+
+    def get(self, field, default=None):
+        if field not in _BODY_FIELD_SET:
+            return default
+        try:
+            return getattr(self, field)
+        except AttributeError:
+            return self.static.get(field, default)
+
+    def __getitem__(self, field):
+        try:
+            return getattr(self, field)
+        except AttributeError:
+            if field in self.static:
+                return self.static[field]
+            raise KeyError(field) from None
+
+    def __setitem__(self, field, value):
+        setattr(self, field, value)
+
+    def __contains__(self, field):
+        return field in _BODY_FIELD_SET and (hasattr(self, field) or field in self.static)
+
+    def to_dict(self):
+        return {field: self[field] for field in BODY_FIELDS if field in self}
+
+
+class ChartRecord:
+    """
+    Compact chart used by the enrichment, matching and regroup stages.
+
+    Holds the bodies (in compute_planetary_info order) and the birth_choice fields.
+    The flattened planet_<Body>_<field> dict is only built when flatten() is called,
+    e.g. for validate_overlay_instances(); items()/get("birth_choice") expose the
+    same shape as a planet_info dict so flatten_city_data() runs on it directly.
+    """
+
+    __slots__ = ("bodies", "birth", "_flat")
+
+    def __init__(self, bodies, birth=None):
+        self.bodies = bodies
+        self.birth = birth or {}
+        self._flat = None
+
+    @classmethod
+    def from_planet_info(cls, planet_info, birth=None, template=None):
+        """
+        With template (an EnrichmentTemplate) each body is enriched in the same step:
+        its static block is attached by reference and only DYNAMIC_FIELDS are copied.
+        """
+        statics = template.static if template is not None else {}
+        bodies = {
+            name: BodyPlacement(name, pdata, statics.get(name))
+            for name, pdata in planet_info.items()
+            if name != "birth_choice" and isinstance(pdata, dict)
+        }
+        if birth is None:
+            birth = planet_info.get("birth_choice", [{}])[0]
+        return cls(bodies, birth)
+
+    # Mapping-style access to bodies (plus the birth_choice list flatten_city_data expects)
+    def items(self):
+        return self.bodies.items()
+
+    def get(self, key, default=None):
+        if key == "birth_choice":
+            return [self.birth]
+        return self.bodies.get(key, default)
+
+    def __getitem__(self, key):
+        if key == "birth_choice":
+            return [self.birth]
+        return self.bodies[key]
+
+    def __contains__(self, key):
+        return key in self.bodies
+
+    def __iter__(self):
+        return iter(self.bodies)
+
+    def numbers(self):
+        """planet_number and zodiac_number of every body (the numbers the matchers score)."""
+        numbers = []
+        for body in self.bodies.values():
+            for field in ("planet_number", "zodiac_number"):
+                value = body.get(field)
+                if isinstance(value, int):
+                    numbers.append(value)
+        return numbers
+
+    def birth_flat(self):
+        """birth_<field> entries exactly as flatten_city_data() writes them."""
+        return birth_flat(self.birth)
+
+    def flatten(self):
+        """Lazily built flat dict, identical to flatten_city_data() on the planet_info dict."""
+        if self._flat is None:
+            self._flat = flatten_city_data(self)
+        return self._flat
+
+    def to_planet_info(self):
+        chart = {name: body.to_dict() for name, body in self.bodies.items()}
+        chart["birth_choice"] = [dict(self.birth)]
+        return chart
+
+
+def birth_flat(birth):
+    """birth_<field> entries of a birth_choice dict, exactly as flatten_city_data() writes them."""
+    return {f"birth_{field}": birth.get(field, "N/A") for field in BIRTH_FIELDS}
+
+
+def enrich_record_roles(record, vibakthi_data, civic_roles, washer_roles):
+    """
+    ChartRecord equivalent of enrich_roles_from_vibakthi, enrich_roles_from_civic_roles
+    and enrich_roles_from_template_washer applied in that order.
+    """
+    bodies = record.bodies
+    for entry in vibakthi_data.get("framework", {}).get("vibhakti_mapping", []):
+        body = bodies.get(entry["planet"])
+        if body is not None:
+            body.role = entry["role"]
+            body.deity = entry["deity"]
+            body.semantic_function = entry["semantic_function"]
+            body.vibhakti = entry["vibhakti"]
+
+    for name, body in bodies.items():
+        role_info = civic_roles.get(name)
+        if role_info is not None:
+            body.civic_role = role_info["name"]
+            body.civic_function = role_info["semantic_role"]
+            body.civic_lineage = role_info["mythic_lineage"]
+            body.civic_opposite = role_info["opposite"]
+            body.civic_description = role_info["description"]
+
+        washer_info = washer_roles.get(name)
+        if washer_info is not None:
+            for field in WASHER_FIELDS:
+                setattr(body, field, washer_info.get(field))
+    return record
+
+
+class EnrichmentTemplate:
+    """
+    Per-body constants of every chart, compiled once per canonical version.
+
+    static[body] is a read-only mapping of the bodies.csv columns plus exactly the
+    fields enrich_roles_from_vibakthi, enrich_roles_from_civic_roles and
+    enrich_roles_from_template_washer would set on that body, so a ChartRecord
+    built with ChartRecord.from_planet_info(..., template=...) equals one built
+    without it and passed through enrich_record_roles().
+
+    geometry_sets[planet_number] is the (unvalidated) semantic_geometry_sets list
+    enrich_geometry_sets_from_semantic_units() would attach for that number.
+    """
+
+    def __init__(self, bodies, vibakthi_data, civic_roles, washer_roles, semantic_units=()):
+        static = {}
+        for body, planet_number, mythic_lineage, healing_bias, civic, semantic_function, role_description in bodies:
+            static[body] = {
+                "planet_number": planet_number,
+                "planet_mythic_lineage": mythic_lineage,
+                "planet_healing_bias": healing_bias,
+                "planet_civic_roles": civic,
+                "planet_semantic_function": semantic_function,
+                "planet_role_description": role_description,
+            }
+        for entry in vibakthi_data.get("framework", {}).get("vibhakti_mapping", []):
+            fields = static.get(entry["planet"])
+            if fields is not None:
+                fields.update({field: entry[field] for field in ROLE_FIELDS})
+        for body, fields in static.items():
+            role_info = civic_roles.get(body)
+            if role_info is not None:
+                fields.update({
+                    "civic_role": role_info["name"],
+                    "civic_function": role_info["semantic_role"],
+                    "civic_lineage": role_info["mythic_lineage"],
+                    "civic_opposite": role_info["opposite"],
+                    "civic_description": role_info["description"],
+                })
+            washer_info = washer_roles.get(body)
+            if washer_info is not None:
+                fields.update({field: washer_info.get(field) for field in WASHER_FIELDS})
+        self.static = {body: MappingProxyType(fields) for body, fields in static.items()}
+        self.geometry_sets = compile_geometry_sets(semantic_units)
+
+    def record(self, planet_info, birth=None):
+        """Enriched ChartRecord for one compute_planetary_info() chart."""
+        return ChartRecord.from_planet_info(planet_info, birth, template=self)
+
+
+ENRICHMENT_SOURCES = {
+    "bodies": "canonical/zodiac/bodies.csv",
+    "vibakthi": "canonical/roles/vibakthi.json",
+    "civic_roles": "canonical/roles/civic_roles.json",
+    "template_washer": "canonical/zodiac/template_washer.json",
+    "semantic_24_sets": "canonical/semantic/semantic_24_sets.json",
+}
+
+_templates = {}
+
+
+def get_enrichment_template():
+    """EnrichmentTemplate for the current canonical files; recompiled when any of them changes."""
+    sources = (
+        get_bodies(ENRICHMENT_SOURCES["bodies"]),
+        registry.get(ENRICHMENT_SOURCES["vibakthi"]),
+        registry.get(ENRICHMENT_SOURCES["civic_roles"]),
+        registry.get(ENRICHMENT_SOURCES["template_washer"]),
+        registry.get(ENRICHMENT_SOURCES["semantic_24_sets"]),
+    )
+    key = tuple(id(source) for source in sources)
+    if key not in _templates:
+        _templates.clear()
+        _templates[key] = EnrichmentTemplate(*sources)
+    return _templates[key]
+
+
+def regroup_record(record):
+    """Group a chart's bodies into engine_map: engine -> planet -> nested planet block."""
+    engines = {}
+    for planet_name, body in record.bodies.items():
+        def get(field): return body.get(field, "N/A")
+
+        engines.setdefault(get("Engine"), {})[planet_name] = {
+            "planet_number": get("planet_number"),
+            "zodiac_number": get("zodiac_number"),
+            "semantic": {
+                "function": get("planet_semantic_function"),
+                "healing_bias": get("planet_healing_bias"),
+                "mythic_lineage": get("planet_mythic_lineage"),
+                "role_description": get("planet_role_description"),
+                "mythic_tags": get("mythic_tags")
+            },
+            "civic": {
+                "role": get("civic_role"),
+                "function": get("civic_function"),
+                "lineage": get("civic_lineage"),
+                "description": get("civic_description"),
+                "opposite": get("civic_opposite")
+            },
+            "washer": {
+                "force": get("washer_force"),
+                "force_type": get("washer_force_type"),
+                "semantic_city_role": get("washer_semantic_city_role"),
+                "semantic_family_role": get("washer_semantic_family_role"),
+                "ring": get("washer_ring"),
+                "number": get("washer_number")
+            },
+            "modulation": {
+                "stage": get("modulation_stage"),
+                "containment_flag": get("containment_flag")
+            },
+            "zone": {
+                "number": get("zone"),
+                "category": get("Category"),
+                "collective_meaning": get("CollectiveMeaning"),
+                "essence": get("zoneEssence")
+            }
+        }
+    return engines
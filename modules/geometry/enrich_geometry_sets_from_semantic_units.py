@@ -1,44 +1,66 @@
-import json 
-def enrich_geometry_sets_from_semantic_units(city_chart: dict, semantic_units: list) -> dict:
+from modules.canonical_registry import registry
+
+SEMANTIC_UNITS_PATH = "canonical/semantic/semantic_24_sets.json"
+
+
+def compile_geometry_sets(semantic_units: list) -> dict:
+    """
+    Every planet_number's semantic_geometry_sets list, computed once.
+
+    Returns:
+        dict: planet_number -> list of {"geometry_type", "partners", "unit_id"} in the
+        order enrich_geometry_sets_from_semantic_units() lists them. The entries are
+        shared between charts and must be treated as read-only.
+    """
+    by_number = {}
+    for unit in semantic_units:
+        unit_id = unit.get("unit_id")
+
+        # Triangles from hexagons
+        for hexagon in unit.get("hexagons", []):
+            if len(hexagon) == 3:
+                entry = {"geometry_type": "Triangle", "partners": hexagon, "unit_id": unit_id}
+                for pnum in dict.fromkeys(hexagon):
+                    by_number.setdefault(pnum, []).append(entry)
+
+        # Squares from octagons
+        for octagon in unit.get("octagons", []):
+            for half in octagon:
+                if len(half) == 4:
+                    entry = {"geometry_type": "Square", "partners": half, "unit_id": unit_id}
+                    for pnum in dict.fromkeys(half):
+                        by_number.setdefault(pnum, []).append(entry)
+    return by_number
+
+
+def load_geometry_sets(path=SEMANTIC_UNITS_PATH):
+    return compile_geometry_sets(registry.get(path))
+
+
+def get_geometry_sets(semantic_units=None):
+    """Compiled geometry sets for semantic_24_sets.json (shared) or for a given units list."""
+    if semantic_units is None or semantic_units is registry.get(SEMANTIC_UNITS_PATH):
+        return registry.get(SEMANTIC_UNITS_PATH, load_geometry_sets)
+    return compile_geometry_sets(semantic_units)
+
+
+def enrich_geometry_sets_from_semantic_units(city_chart: dict, semantic_units: list = None) -> dict:
     """
     Enriches each planet in the city chart with triangle and square geometries
     from semantic_24_sets.json based on planet_number.
 
     Args:
         city_chart (dict): Planet-level data for a city (e.g., Dallas)
-        semantic_units (list): Parsed JSON list from semantic_24_sets.json
+        semantic_units (list): Parsed JSON list from semantic_24_sets.json (default: the canonical file)
 
     Returns:
         dict: Enriched city chart with 'semantic_geometry_sets' per planet
     """
+    geometry_sets = get_geometry_sets(semantic_units)
     for planet, pdata in city_chart.items():
         if isinstance(pdata, dict) and "planet_number" in pdata:
-            pnum = pdata["planet_number"]
-            geometry_sets = []
-
-            for unit in semantic_units:
-                unit_id = unit.get("unit_id")
-
-                # Triangles from hexagons
-                for hexagon in unit.get("hexagons", []):
-                    if len(hexagon) == 3 and pnum in hexagon:
-                        geometry_sets.append({
-                            "geometry_type": "Triangle",
-                            "partners": hexagon,
-                            "unit_id": unit_id
-                        })
-
-                # Squares from octagons
-                for octagon in unit.get("octagons", []):
-                    for half in octagon:
-                        if len(half) == 4 and pnum in half:
-                            geometry_sets.append({
-                                "geometry_type": "Square",
-                                "partners": half,
-                                "unit_id": unit_id
-                            })
-
-            if geometry_sets:
-                pdata["semantic_geometry_sets"] = geometry_sets
-
-    return city_chart
\ No newline at end of file
+            sets = geometry_sets.get(pdata["planet_number"])
+            if sets:
+                pdata["semantic_geometry_sets"] = list(sets)
+
+    return city_chart
@@ -1,30 +1,74 @@
-import json
+import numpy as np
 
-def is_triangle_valid(partners: list, chart: dict) -> bool:
+from modules.canonical_registry import registry
+from modules.planetary_modulation.load_modulation_zones import load_modulation_zones
+
+SEMANTIC_UNITS_PATH = "canonical/semantic/semantic_24_sets.json"
+ZONES_PATH = "canonical/modulation/modulation_zones.csv"
+
+# Angular orb (degrees) allowed around 120° / 90° spacings and mixed-triangle aspects
+DEFAULT_ORB = 10
+
+# Aspects a planet may form with the centre of a sign in a mixed triangle
+MIXED_ASPECTS = (60, 90, 120, 180)
+
+
+def load_zodiac_signs(path=ZONES_PATH):
+    """
+    Sign name -> (zodiac_number, centre longitude) from modulation_zones.csv.
+
+    A sign spans the zones carrying its name; its centre is the middle of that span.
+    """
+    spans = {}
+    for zone in load_modulation_zones(path):
+        number, start, end = spans.get(zone["sign"], (zone["zodiac_number"], zone["start"], zone["end"]))
+        spans[zone["sign"]] = (number, min(start, zone["start"]), max(end, zone["end"]))
+    return {sign: (number, (start + end) / 2) for sign, (number, start, end) in spans.items()}
+
+
+def zodiac_signs():
+    return registry.get(ZONES_PATH, load_zodiac_signs)
+
+
+def zodiac_name_to_number(sign):
+    """zodiac_number of a sign name, or None for an unknown sign."""
+    entry = zodiac_signs().get(sign)
+    return entry[0] if entry else None
+
+
+def zodiac_number_to_center_longitude(number):
+    """Sidereal centre longitude of the sign with this zodiac_number, or None."""
+    for zodiac_number, center in zodiac_signs().values():
+        if zodiac_number == number:
+            return center
+    return None
+
+
+def is_triangle_valid(partners: list, chart: dict, orb=DEFAULT_ORB) -> bool:
     planet_nums = [p for p in partners if str(p) in chart]
     sign_nums = [p for p in partners if str(p) not in chart]
 
     if len(planet_nums) == 3:
-        return validate_angular_spacing([chart[str(p)]["longitude"] for p in planet_nums], 120, 10)
+        return validate_angular_spacing([chart[str(p)]["longitude"] for p in planet_nums], 120, orb)
 
     if len(planet_nums) == 1 and len(sign_nums) == 2:
-        return is_mixed_triangle_valid(partners, chart)
+        return is_mixed_triangle_valid(partners, chart, orb)
 
     return False
 
-def is_square_valid(partners: list, chart: dict) -> bool:
+def is_square_valid(partners: list, chart: dict, orb=DEFAULT_ORB) -> bool:
     try:
         longitudes = [chart[str(p)]["longitude"] for p in partners]
     except KeyError:
         return False
-    return validate_angular_spacing(longitudes, 90, 10)
+    return validate_angular_spacing(longitudes, 90, orb)
 
 def validate_angular_spacing(degrees: list, expected: int, tolerance: int) -> bool:
     degrees.sort()
     spacings = [(degrees[(i+1)%len(degrees)] - degrees[i]) % 360 for i in range(len(degrees))]
     return all(abs(s - expected) <= tolerance for s in spacings)
 
-def is_mixed_triangle_valid(partners: list, chart: dict) -> bool:
+def is_mixed_triangle_valid(partners: list, chart: dict, orb=DEFAULT_ORB) -> bool:
     planet_nums = [p for p in partners if str(p) in chart]
     sign_nums = [p for p in partners if str(p) not in chart]
 
@@ -38,57 +82,199 @@ def is_mixed_triangle_valid(partners: list, chart: dict) -> bool:
     if planet_sign_num not in sign_nums:
         return False
 
-    other_sign = [s for s in sign_nums if s != planet_sign_num][0]
-    other_sign_center = zodiac_number_to_center_longitude(other_sign)
+    other_signs = [s for s in sign_nums if s != planet_sign_num]
+    other_sign_center = zodiac_number_to_center_longitude(other_signs[0]) if other_signs else None
+    if other_sign_center is None:
+        return False
 
     angle = abs((planet_long - other_sign_center) % 360)
-    return any(abs(angle - asp) <= 10 for asp in [60, 90, 120, 180])
+    return any(abs(angle - asp) <= orb for asp in MIXED_ASPECTS)
+
+
+class GeometricValidator:
+    """
+    Every candidate triangle (3-number hexagon) and square (4-number octagon side) of
+    semantic_24_sets.json compiled once into index arrays over the numbers they use.
+
+    A chart becomes a longitude vector (NaN where the number is not a chart key) plus
+    the zodiac_number of each body's sign, and all candidates are tested together:
+    sorted spacings against 120° / 90° for full triangles and squares, sign-centre
+    aspects for mixed triangles (one body, two signs). Results equal the scalar
+    is_triangle_valid() / is_square_valid() checks; validate_many() does the same for
+    a stack of charts in one pass.
 
-def enrich_geometry_sets_with_validation(city_chart: dict, semantic_units: list) -> dict:
+    Candidates keep the order enrich_geometry_sets_with_validation() has always listed
+    them in (per unit: triangles, then squares), and postings[pnum] lists the ones
+    containing each planet number.
+    """
+
+    def __init__(self, semantic_units):
+        triangles, squares, self.candidates = [], [], []
+        for unit in semantic_units:
+            unit_id = unit.get("unit_id")
+            for hexagon in unit.get("hexagons", []):
+                if len(hexagon) == 3:
+                    self.candidates.append(("Triangle", hexagon, unit_id, len(triangles)))
+                    triangles.append(hexagon)
+            for octagon in unit.get("octagons", []):
+                for square in octagon:
+                    if len(square) == 4:
+                        self.candidates.append(("Square", square, unit_id, len(squares)))
+                        squares.append(square)
+
+        self.numbers = sorted({n for partners in triangles + squares for n in partners})
+        self.keys = [str(n) for n in self.numbers]
+        column = {n: i for i, n in enumerate(self.numbers)}
+        self.triangles = np.array([[column[n] for n in t] for t in triangles], dtype=np.intp).reshape(-1, 3)
+        self.squares = np.array([[column[n] for n in s] for s in squares], dtype=np.intp).reshape(-1, 4)
+        self.triangle_numbers = np.array(triangles, dtype=float).reshape(-1, 3)
+
+        signs = zodiac_signs().values()
+        self.sign_numbers = np.array([number for number, _ in signs], dtype=float)
+        self.sign_centers = np.array([center for _, center in signs], dtype=float)
+
+        # Candidate positions in the order the enrichment lists them, per planet number
+        self.postings = {}
+        for i, (_, partners, _, _) in enumerate(self.candidates):
+            for n in dict.fromkeys(partners):
+                self.postings.setdefault(n, []).append(i)
+        self.is_triangle = np.array([kind == "Triangle" for kind, *_ in self.candidates], dtype=bool)
+        self.offsets = np.array([k for *_, k in self.candidates], dtype=np.intp)
+
+    def chart_vectors(self, city_chart):
+        """(longitudes, sign zodiac numbers) over self.numbers; NaN where absent."""
+        longitudes = np.full(len(self.numbers), np.nan)
+        sign_numbers = np.full(len(self.numbers), np.nan)
+        signs = zodiac_signs()
+        for i, key in enumerate(self.keys):
+            pdata = city_chart.get(key)
+            if key not in city_chart or not isinstance(pdata, dict):
+                continue
+            longitudes[i] = pdata.get("longitude", np.nan)
+            sign = pdata.get("sign")
+            if isinstance(sign, str) and sign in signs:
+                sign_numbers[i] = signs[sign][0]
+        return longitudes, sign_numbers
+
+    def _centers(self, numbers):
+        """Sign centre longitude for an array of zodiac numbers (NaN if not a zodiac number)."""
+        match = numbers[..., None] == self.sign_numbers
+        centers = np.where(match, self.sign_centers, 0.0).sum(axis=-1)
+        return np.where(match.any(axis=-1), centers, np.nan)
+
+    @staticmethod
+    def _spacing_ok(longitudes, expected, orb):
+        degrees = np.sort(longitudes, axis=-1)
+        spacings = np.mod(np.roll(degrees, -1, axis=-1) - degrees, 360)
+        return (np.abs(spacings - expected) <= orb).all(axis=-1)
+
+    def validate_many(self, longitudes, sign_numbers, orb=DEFAULT_ORB):
+        """
+        Validity of every candidate for a stack of charts.
+
+        Args:
+            longitudes, sign_numbers: (charts, len(self.numbers)) arrays from chart_vectors().
+            orb (float): Tolerance in degrees.
+
+        Returns:
+            np.ndarray: (charts, len(self.candidates)) booleans.
+        """
+        longitudes = np.atleast_2d(longitudes)
+        sign_numbers = np.atleast_2d(sign_numbers)
+        charts = len(longitudes)
+
+        # Triangles made only of bodies: 120° spacing
+        tri_lon = longitudes[:, self.triangles]
+        tri_present = ~np.isnan(tri_lon)
+        tri_count = tri_present.sum(axis=-1)
+        with np.errstate(invalid="ignore"):
+            triangle_ok = (tri_count == 3) & self._spacing_ok(tri_lon, 120, orb)
+
+            # Mixed triangles: one body, two signs, one of which is the body's own sign
+            body_slot = np.argmax(tri_present, axis=-1)
+            body_lon = np.take_along_axis(tri_lon, body_slot[..., None], axis=-1)[..., 0]
+            body_sign = np.take_along_axis(sign_numbers[:, self.triangles], body_slot[..., None], axis=-1)[..., 0]
+            numbers = np.broadcast_to(self.triangle_numbers, tri_lon.shape)
+            sign_slots = ~tri_present
+            own_sign = (sign_slots & (numbers == body_sign[..., None])).any(axis=-1)
+            # The other sign is the first absent number that is not the body's own sign
+            other = sign_slots & (numbers != body_sign[..., None])
+            other_number = np.take_along_axis(numbers, np.argmax(other, axis=-1)[..., None], axis=-1)[..., 0]
+            other_center = np.where(other.any(axis=-1), self._centers(other_number), np.nan)
+            angle = np.abs(np.mod(body_lon - other_center, 360))
+            aspect_ok = (np.abs(angle[..., None] - np.array(MIXED_ASPECTS)) <= orb).any(axis=-1)
+            triangle_ok |= (tri_count == 1) & own_sign & aspect_ok
+
+            # Squares: four bodies, 90° spacing
+            sq_lon = longitudes[:, self.squares]
+            square_ok = ~np.isnan(sq_lon).any(axis=-1) & self._spacing_ok(sq_lon, 90, orb)
+
+        valid = np.empty((charts, len(self.candidates)), dtype=bool)
+        valid[:, self.is_triangle] = triangle_ok[:, self.offsets[self.is_triangle]]
+        valid[:, ~self.is_triangle] = square_ok[:, self.offsets[~self.is_triangle]]
+        return valid
+
+    def validate(self, city_chart, orb=DEFAULT_ORB):
+        """Validity of every candidate for one chart."""
+        return self.validate_many(*self.chart_vectors(city_chart), orb=orb)[0]
+
+    def enrich(self, city_chart, valid):
+        """Attach semantic_geometry_sets to each body from one row of validate_many()."""
+        for planet_name, pdata in city_chart.items():
+            if not isinstance(pdata, dict) or "planet_number" not in pdata:
+                continue
+            geometry_sets = [
+                {
+                    "geometry_type": self.candidates[i][0],
+                    "partners": self.candidates[i][1],
+                    "unit_id": self.candidates[i][2],
+                    "validation_type": "geometric"
+                }
+                for i in self.postings.get(pdata["planet_number"], ())
+                if valid[i]
+            ]
+            if geometry_sets:
+                pdata["semantic_geometry_sets"] = geometry_sets
+        return city_chart
+
+
+def load_geometric_validator(path=SEMANTIC_UNITS_PATH):
+    return GeometricValidator(registry.get(path))
+
+
+def get_geometric_validator(semantic_units=None):
+    """Compiled validator for semantic_24_sets.json (shared) or for a given units list."""
+    if semantic_units is None or semantic_units is registry.get(SEMANTIC_UNITS_PATH):
+        return registry.get(SEMANTIC_UNITS_PATH, load_geometric_validator)
+    return GeometricValidator(semantic_units)
+
+
+def enrich_geometry_sets_with_validation(city_chart: dict, semantic_units: list = None, orb=DEFAULT_ORB) -> dict:
     """
     Enriches each planet with validated semantic geometry sets based on actual chart placements.
 
     Args:
         city_chart (dict): Full planetary chart with longitudes, zones, signs
-        semantic_units (list): Parsed semantic_24_sets.json
+        semantic_units (list): Parsed semantic_24_sets.json (default: the canonical file)
+        orb (float): Angular tolerance in degrees
 
     Returns:
         dict: Enriched chart with validated semantic_geometry_sets
     """
-    for planet_name, pdata in city_chart.items():
-        if not isinstance(pdata, dict) or "planet_number" not in pdata:
-            continue
+    validator = get_geometric_validator(semantic_units)
+    return validator.enrich(city_chart, validator.validate(city_chart, orb))
 
-        pnum = pdata["planet_number"]
-        geometry_sets = []
 
-        for unit in semantic_units:
-            unit_id = unit.get("unit_id")
-
-            # 🔺 Triangles
-            for hexagon in unit.get("hexagons", []):
-                if len(hexagon) == 3 and pnum in hexagon:
-                    if is_triangle_valid(hexagon, city_chart):
-                        geometry_sets.append({
-                            "geometry_type": "Triangle",
-                            "partners": hexagon,
-                            "unit_id": unit_id,
-                            "validation_type": "geometric"
-                        })
-
-            # ◼️ Squares
-            for octagon in unit.get("octagons", []):
-                for square in octagon:
-                    if len(square) == 4 and pnum in square:
-                        if is_square_valid(square, city_chart):
-                            geometry_sets.append({
-                                "geometry_type": "Square",
-                                "partners": square,
-                                "unit_id": unit_id,
-                                "validation_type": "geometric"
-                            })
-
-        if geometry_sets:
-            pdata["semantic_geometry_sets"] = geometry_sets
-
-    return city_chart
\ No newline at end of file
+def enrich_geometry_sets_with_validation_many(city_charts: list, semantic_units: list = None,
+                                              orb=DEFAULT_ORB) -> list:
+    """enrich_geometry_sets_with_validation() for many charts, validated in one NumPy pass."""
+    validator = get_geometric_validator(semantic_units)
+    if not city_charts:
+        return []
+    vectors = [validator.chart_vectors(chart) for chart in city_charts]
+    valid = validator.validate_many(
+        np.array([longitudes for longitudes, _ in vectors]),
+        np.array([signs for _, signs in vectors]),
+        orb=orb,
+    )
+    return [validator.enrich(chart, row) for chart, row in zip(city_charts, valid)]
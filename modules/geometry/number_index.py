@@ -0,0 +1,104 @@
+from modules.canonical_registry import registry
+
+SEMANTIC_UNITS_PATH = "canonical/semantic/semantic_24_sets.json"
+GEOMETRY_SETS_PATH = "canonical/geometry/geometry_7_sets.json"
+
+
+def number_mask(numbers):
+    """Bitset with bit n set for every non-negative int n."""
+    mask = 0
+    for n in numbers:
+        if isinstance(n, int) and n >= 0:
+            mask |= 1 << n
+    return mask
+
+
+def mask_numbers(mask):
+    """Sorted numbers whose bits are set in mask."""
+    numbers = []
+    while mask:
+        low = mask & -mask
+        numbers.append(low.bit_length() - 1)
+        mask ^= low
+    return numbers
+
+
+def flat_numbers(city_flat_data):
+    """Numbers that match_semantic_units() reads from a flattened chart (planet_*_number keys)."""
+    return [
+        v for k, v in city_flat_data.items()
+        if k.startswith("planet_") and k.endswith("_number") and isinstance(v, int)
+    ]
+
+
+def chart_numbers(chart):
+    """
+    Same numbers straight from a body-level chart: each body's planet_number and
+    zodiac_number (flatten_city_data turns exactly these into planet_*_number keys).
+    """
+    numbers = []
+    for body, pdata in chart.items():
+        if body == "birth_choice" or not isinstance(pdata, dict):
+            continue
+        for field in ("planet_number", "zodiac_number"):
+            value = pdata.get(field)
+            if isinstance(value, int):
+                numbers.append(value)
+    return numbers
+
+
+class NumberIndex:
+    """
+    Compiled number_pool index for semantic_24_sets.json or geometry_7_sets.json.
+
+    Each entry's pool is held as an int bitset and every number has a posting list
+    of the entries containing it. Matching a chart walks only the postings of the
+    chart's own numbers and scores each candidate with one AND + popcount, instead
+    of building sets for every entry.
+
+    match() returns (entry, matched_numbers) pairs in the order the original
+    matchers use: match_score descending, then id ascending.
+    """
+
+    def __init__(self, entries, id_field):
+        self.entries = list(entries)
+        self.id_field = id_field
+        self.ids = [entry[id_field] for entry in self.entries]
+        self.masks = [number_mask(entry.get("number_pool", [])) for entry in self.entries]
+        self.postings = {}
+        for i, mask in enumerate(self.masks):
+            for n in mask_numbers(mask):
+                self.postings.setdefault(n, []).append(i)
+
+    def candidates(self, city_mask):
+        found = set()
+        for n in mask_numbers(city_mask):
+            found.update(self.postings.get(n, ()))
+        return found
+
+    def match(self, numbers):
+        city_mask = number_mask(numbers)
+        scored = []
+        for i in self.candidates(city_mask):
+            matched = self.masks[i] & city_mask
+            scored.append((-matched.bit_count(), self.ids[i], i, matched))
+        scored.sort()
+        return [(self.entries[i], mask_numbers(matched)) for _, _, i, matched in scored]
+
+
+def load_semantic_index(path=SEMANTIC_UNITS_PATH):
+    return NumberIndex(registry.get(path), "unit_id")
+
+
+def load_geometry_index(path=GEOMETRY_SETS_PATH):
+    return NumberIndex(registry.get(path), "geometry_id")
+
+
+def get_semantic_index(path=SEMANTIC_UNITS_PATH):
+    """NumberIndex over semantic_24_sets.json, rebuilt only when the file changes."""
+    return registry.get(path, load_semantic_index)
+
+
+def get_geometry_index(path=GEOMETRY_SETS_PATH):
+    """NumberIndex over geometry_7_sets.json, rebuilt only when the file changes."""
+    return registry.get(path, load_geometry_index)
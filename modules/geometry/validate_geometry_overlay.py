@@ -1,47 +1,149 @@
-import json
+from modules.canonical_registry import registry
+from modules.geometry.chart_record import ChartRecord
 
-def validate_overlay_instances(planet_data_flattened):
-    with open("canonical/semantic/semantic_24_sets.json", encoding="utf-8") as f:
-        semantic_sets = json.load(f)
-
-    with open("canonical/modulation/aspectual_router.json", encoding="utf-8") as f:
-        aspectual_router = json.load(f)
-
-    for overlay_def in aspectual_router:
-        overlay_name = overlay_def["aspectual_overlay"]
-        geometry_id = overlay_def.get("routed_geometry", {}).get("geometry_id", "GXX")
-        planets_required = overlay_def.get("planets", [])
-        triangle_zones = overlay_def.get("routed_geometry", {}).get("triangle", [])
-
-        match_count = 0
-
-        for req in planets_required:
-            secret_number = req["secret_number"]
-            vibhakti_required = req["vibhakti_role"]
-            washer_force_required = req["template_washer_force"]
-
-            # Build keys
-            semantic_key = f"planet_{secret_number}"
-            vibhakti_key = f"planet_{semantic_key}_vibhakti"
-            washer_force_key = f"washer_{semantic_key}_force_type"
-            zone_key = f"planet_{semantic_key}_zone"
-
-            # Check semantic match
-            vibhakti_actual = planet_data_flattened.get(vibhakti_key, "N/A")
-            washer_force_actual = planet_data_flattened.get(washer_force_key, "N/A")
-            zone_actual = planet_data_flattened.get(zone_key, None)
-
-            if (
-                vibhakti_actual == vibhakti_required and
-                washer_force_actual == washer_force_required and
-                zone_actual in triangle_zones
-            ):
-                match_count += 1
-
-        # Require all planets to match
-        validated = match_count == len(planets_required)
-        tag_key = f"overlay_{overlay_name}_{geometry_id}_validated"
-        planet_data_flattened[tag_key] = validated
+ASPECTUAL_ROUTER_PATH = "canonical/modulation/aspectual_router.json"
+
+
+def overlay_tag(overlay_def):
+    """Flattened-chart key an overlay's verdict is written under."""
+    overlay_name = overlay_def["aspectual_overlay"]
+    geometry_id = overlay_def.get("routed_geometry", {}).get("geometry_id", "GXX")
+    return f"overlay_{overlay_name}_{geometry_id}_validated"
+
+
+def _code(vocabulary, value):
+    """Small integer code of value in vocabulary; 0 for anything no requirement names."""
+    try:
+        return vocabulary.get(value, 0)
+    except TypeError:
+        return 0
+
+
+class OverlayEngine:
+    """
+    aspectual_router.json compiled into bitmask tests.
+
+    Every (secret_number, vibhakti_role, template_washer_force, triangle) requirement
+    of every overlay gets one bit. A chart is reduced to three small integer codes per
+    secret number (vibhakti, washer force type, zone); per secret number a lookup table
+    gives the bits of all requirements those codes satisfy. OR-ing the lookups of the
+    chart's secret numbers and testing each overlay's requirement mask validates all
+    overlays in one pass, duplicated overlay names (Yod, Grand Cross, Mystic Rectangle
+    routed to several geometries) included.
+
+    The values read per secret number n are the ones validate_overlay_instances() has
+    always read: planet_planet_<n>_vibhakti, washer_planet_<n>_force_type and
+    planet_planet_<n>_zone of the flattened chart, i.e. the vibhakti, washer_force_type
+    and zone of a body named planet_<n>.
+    """
+
+    def __init__(self, aspectual_router):
+        self.tags = [overlay_tag(overlay_def) for overlay_def in aspectual_router]
+        self.slots = []            # secret numbers, in first-seen order
+        slot_index = {}
+        self.vibhakti_codes = {}   # value -> code (1..), shared by all secret numbers
+        self.washer_codes = {}
+        self.zone_codes = {}
+        requirements = []          # (slot, vibhakti code, washer code, zone code mask)
+        self.overlay_masks = []
+
+        for overlay_def in aspectual_router:
+            triangle = overlay_def.get("routed_geometry", {}).get("triangle", [])
+            zone_mask = 0
+            for zone in triangle:
+                zone_mask |= 1 << self.zone_codes.setdefault(zone, len(self.zone_codes) + 1)
+
+            overlay_mask = 0
+            for req in overlay_def.get("planets", []):
+                secret_number = req["secret_number"]
+                if secret_number not in slot_index:
+                    slot_index[secret_number] = len(self.slots)
+                    self.slots.append(secret_number)
+                vibhakti = self.vibhakti_codes.setdefault(req["vibhakti_role"], len(self.vibhakti_codes) + 1)
+                washer = self.washer_codes.setdefault(
+                    req["template_washer_force"], len(self.washer_codes) + 1)
+                overlay_mask |= 1 << len(requirements)
+                requirements.append((slot_index[secret_number], vibhakti, washer, zone_mask))
+            self.overlay_masks.append(overlay_mask)
 
+        # satisfied[slot][(vibhakti, washer, zone)] -> bits of the requirements met
+        self.satisfied = [{} for _ in self.slots]
+        for bit, (slot, vibhakti, washer, zone_mask) in enumerate(requirements):
+            for zone in self.zone_codes.values():
+                if zone_mask >> zone & 1:
+                    table = self.satisfied[slot]
+                    table[(vibhakti, washer, zone)] = table.get((vibhakti, washer, zone), 0) | 1 << bit
+
+        self.keys = [
+            (f"planet_planet_{n}_vibhakti", f"washer_planet_{n}_force_type", f"planet_planet_{n}_zone")
+            for n in self.slots
+        ]
+
+    @classmethod
+    def load(cls, path):
+        return cls(registry.get(path))
+
+    def encode(self, chart):
+        """(vibhakti, washer force type, zone) codes per secret number of a flattened dict or ChartRecord."""
+        codes = []
+        if isinstance(chart, ChartRecord):
+            for n in self.slots:
+                body = chart.bodies.get(f"planet_{n}")
+                if body is None:
+                    codes.append((_code(self.vibhakti_codes, "N/A"), _code(self.washer_codes, "N/A"), 0))
+                    continue
+                codes.append((
+                    _code(self.vibhakti_codes, body.get("vibhakti", "N/A")),
+                    _code(self.washer_codes, body.get("washer_force_type", "N/A")),
+                    _code(self.zone_codes, body.get("zone", "N/A")),
+                ))
+        else:
+            for vibhakti_key, washer_key, zone_key in self.keys:
+                codes.append((
+                    _code(self.vibhakti_codes, chart.get(vibhakti_key, "N/A")),
+                    _code(self.washer_codes, chart.get(washer_key, "N/A")),
+                    _code(self.zone_codes, chart.get(zone_key, None)),
+                ))
+        return codes
+
+    def satisfied_mask(self, chart):
+        mask = 0
+        for table, code in zip(self.satisfied, self.encode(chart)):
+            mask |= table.get(code, 0)
+        return mask
+
+    def evaluate(self, chart):
+        """{overlay tag: validated} for one chart; later duplicates of a tag win, as before."""
+        mask = self.satisfied_mask(chart)
+        return {tag: mask & need == need for tag, need in zip(self.tags, self.overlay_masks)}
+
+    def evaluate_many(self, charts):
+        """evaluate() over many charts."""
+        return [self.evaluate(chart) for chart in charts]
+
+
+def get_overlay_engine(path=ASPECTUAL_ROUTER_PATH):
+    """OverlayEngine over aspectual_router.json, recompiled only when the file changes."""
+    return registry.get(path, OverlayEngine.load)
+
+
+def validate_overlay_instances(planet_data_flattened):
+    # A ChartRecord is flattened only here, where the tagged flat dict is returned
+    verdicts = get_overlay_engine().evaluate(planet_data_flattened)
+    if isinstance(planet_data_flattened, ChartRecord):
+        planet_data_flattened = planet_data_flattened.flatten()
+    planet_data_flattened.update(verdicts)
     return planet_data_flattened
 
+
+def validate_overlay_instances_many(charts):
+    """validate_overlay_instances() over many flattened dicts / ChartRecords."""
+    engine = get_overlay_engine()
+    validated = []
+    for chart in charts:
+        verdicts = engine.evaluate(chart)
+        if isinstance(chart, ChartRecord):
+            chart = chart.flatten()
+        chart.update(verdicts)
+        validated.append(chart)
+    return validated
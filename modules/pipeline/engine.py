@@ -0,0 +1,372 @@
+import copy
+import multiprocessing
+import time
+from collections import OrderedDict, deque
+
+from modules.storage.result_cache import make_cache_key
+
+from .ingest import iter_batches
+
+
+class Stage:
+    """
+    One registered pipeline step.
+
+    Args:
+        name (str): Stage name used in plans and timing reports.
+        func (callable): Called as func(*inputs, tables). Per-item stages receive one
+            entity's values; batch stages receive one list per input.
+        inputs (tuple): Value names the stage reads ("record" is always available).
+        outputs (tuple): Value names the stage produces. A stage with several outputs
+            returns a tuple (per item) or a tuple of lists (batch).
+        batch (bool): Whether func works on the whole batch at once.
+        cache_key (callable, optional): record -> str. Makes the stage cacheable in the
+            pipeline's ResultCache; the key must capture everything about the record
+            the stage's outputs depend on.
+        cache_deps (tuple): Canonical files the outputs depend on; their digest is
+            part of every cache key, so editing one of them invalidates the stage.
+        memo_input (str, optional): Name of a value (produced by an earlier stage) that
+            fully determines this stage's outputs. Outputs are kept in an in-memory LRU
+            keyed by that value; as soon as it exists, items with a known key take the
+            memoized outputs and upstream work needed only by them is skipped. Within a
+            batch, items sharing a key are computed once. Memoized outputs are shared
+            between items, so later stages must not modify them.
+    """
+
+    def __init__(self, name, func, inputs, outputs, batch=False, cache_key=None, cache_deps=(), memo_input=None):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.batch = batch
+        self.cache_key = cache_key
+        self.cache_deps = tuple(cache_deps)
+        self.memo_input = memo_input
+
+    def __repr__(self):
+        return f"Stage({self.name}: {', '.join(self.inputs)} -> {', '.join(self.outputs)})"
+
+
+# Entries kept per memoized stage (see Stage.memo_input)
+DEFAULT_MEMO_SIZE = 65536
+
+
+class Sink:
+    """Terminal consumer called as func(record, *inputs) for every entity."""
+
+    def __init__(self, name, func, inputs):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+
+
+class Pipeline:
+    """
+    Stage-graph runner shared by every entity kind.
+
+    Stages are registered in execution order. For a given set of target values the
+    engine plans only the stages needed to produce them, runs them batch by batch
+    over an ingest stream, hands the results to the sinks and keeps wall-clock
+    timing per stage (including "ingest" and "sink").
+
+    For multiprocess runs the pipeline must be rebuildable in a worker, so it
+    carries a picklable factory: a module-level function and its arguments.
+
+    memo_size bounds each memoized stage's LRU (see Stage.memo_input); every
+    worker process keeps its own.
+    """
+
+    def __init__(self, name, tables_loader=None, factory=None, cache=None, deps_digest=None,
+                 memo_size=DEFAULT_MEMO_SIZE):
+        self.name = name
+        self.stages = []
+        self.tables_loader = tables_loader
+        self.factory = factory
+        self.cache = cache
+        self.deps_digest = deps_digest
+        self._tables = None
+        self._stage_digests = {}
+        self.timings = {}
+        self.cache_hits = {}
+        self.memo_size = memo_size
+        self.memos = {}
+
+    def register(self, name, inputs, outputs, batch=False, cache_key=None, cache_deps=(), memo_input=None):
+        """Decorator form of add_stage()."""
+        def decorator(func):
+            self.add_stage(Stage(name, func, inputs, outputs, batch, cache_key, cache_deps, memo_input))
+            return func
+        return decorator
+
+    def add_stage(self, stage):
+        if any(s.name == stage.name for s in self.stages):
+            raise ValueError(f"Stage '{stage.name}' is already registered in {self.name}")
+        self.stages.append(stage)
+        return stage
+
+    @property
+    def tables(self):
+        if self._tables is None:
+            self._tables = self.tables_loader() if self.tables_loader else {}
+        return self._tables
+
+    def plan(self, targets):
+        """Stages needed to produce targets, in execution order; the rest are skipped."""
+        needed = set(targets)
+        chosen = []
+        for stage in reversed(self.stages):
+            if needed & set(stage.outputs):
+                chosen.append(stage)
+                needed -= set(stage.outputs)
+                needed |= set(stage.inputs)
+        needed.discard("record")
+        if needed:
+            raise ValueError(f"No stage in {self.name} produces: {sorted(needed)}")
+        return list(reversed(chosen))
+
+    def _time(self, name, seconds, items):
+        entry = self.timings.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += items
+
+    def _stage_digest(self, stage):
+        if stage.name not in self._stage_digests:
+            self._stage_digests[stage.name] = self.deps_digest(stage.cache_deps) if self.deps_digest else ""
+        return self._stage_digests[stage.name]
+
+    def run_batch(self, records, targets):
+        """
+        Run the planned stages over one batch; returns {target: list aligned with records}.
+
+        Cacheable stages are resolved from the last stage backwards: items whose
+        outputs are already cached are filled in and do not pull their inputs, so a
+        fully cached target skips every upstream stage for that item. Memoized stages
+        are resolved as soon as their memo_input exists, and the remaining stages are
+        rescheduled without the items the memo answered.
+        """
+        records = list(records)
+        n = len(records)
+        plan = self.plan(targets)
+        values = {"record": dict(enumerate(records))}
+        tables = self.tables
+
+        cache_keys = {}
+        run_items = self._schedule(plan, targets, values, records, cache_keys)
+        # Per memoized stage: item -> item computing the same key in this batch
+        followers = {}
+        for position in range(-1, len(plan)):
+            if position >= 0:
+                stage = plan[position]
+                self._run_stage(stage, sorted(run_items[stage.name]), values, tables, cache_keys)
+                for follower, leader in followers.pop(stage.name, {}).items():
+                    for name in stage.outputs:
+                        values[name][follower] = values[name][leader]
+                produced = set(stage.outputs)
+            else:
+                produced = set(values)
+            resolved = False
+            for later in plan[position + 1:]:
+                if later.memo_input in produced and run_items[later.name]:
+                    resolved |= self._resolve_memo(later, run_items[later.name], values, followers)
+            if resolved:
+                run_items.update(self._schedule(plan[position + 1:], targets, values, records, cache_keys,
+                                                lookup_cache=False, exclude=followers))
+        return {name: [values[name][i] for i in range(n)] for name in targets}
+
+    def _schedule(self, plan, targets, values, records, cache_keys, lookup_cache=True, exclude=None):
+        """
+        Backward pass: which items each stage in plan still has to compute, given the
+        values already present (and, with lookup_cache, the ResultCache).
+        """
+        needed = {name: {i for i in range(len(records)) if i not in values.get(name, {})} for name in targets}
+        run_items = {}
+        for stage in reversed(plan):
+            items = set()
+            for name in stage.outputs:
+                items |= needed.get(name, set())
+            items = {i for i in items if any(i not in values.get(name, {}) for name in stage.outputs)}
+            if exclude and stage.name in exclude:
+                items -= set(exclude[stage.name])
+            if lookup_cache and items and self.cache is not None and stage.cache_key is not None:
+                digest = self._stage_digest(stage)
+                keys = {i: make_cache_key(stage.name, stage.cache_key(records[i]), digest) for i in items}
+                hits = self.cache.get_many(set(keys.values()))
+                used = set()
+                for i in sorted(items):
+                    if keys[i] in hits:
+                        cached = hits[keys[i]]
+                        if keys[i] in used:
+                            # Later stages mutate values in place; never share one object
+                            cached = copy.deepcopy(cached)
+                        used.add(keys[i])
+                        outputs = cached if len(stage.outputs) > 1 else [cached]
+                        for name, value in zip(stage.outputs, outputs):
+                            values.setdefault(name, {})[i] = value
+                        items.discard(i)
+                self.cache_hits[stage.name] = self.cache_hits.get(stage.name, 0) + len(keys) - len(items)
+                cache_keys[stage.name] = keys
+            run_items[stage.name] = items
+            for name in stage.inputs:
+                needed.setdefault(name, set()).update(items)
+        return run_items
+
+    def _resolve_memo(self, stage, items, values, followers):
+        """
+        Fill stage outputs from its memo for items whose key is known; among the
+        remaining items keep one per key and turn the others into followers.
+        Returns True when any item was taken off the stage's run list.
+        """
+        memo = self.memos.setdefault(stage.name, OrderedDict())
+        keys = values.get(stage.memo_input, {})
+        leaders = {}
+        stage_followers = followers.setdefault(stage.name, {})
+        hits = 0
+        for i in sorted(items):
+            if i not in keys:
+                continue
+            key = keys[i]
+            entry = memo.get(key)
+            if entry is not None:
+                memo.move_to_end(key)
+                for name, value in zip(stage.outputs, entry):
+                    values.setdefault(name, {})[i] = value
+                items.discard(i)
+                hits += 1
+            elif key in leaders:
+                stage_followers[i] = leaders[key]
+                items.discard(i)
+            else:
+                leaders[key] = i
+        if hits:
+            name = f"{stage.name} memo"
+            self.cache_hits[name] = self.cache_hits.get(name, 0) + hits
+        return bool(hits or stage_followers)
+
+    def _run_stage(self, stage, idx, values, tables, cache_keys):
+        if not idx:
+            return
+        start = time.perf_counter()
+        args = [[values[name][i] for i in idx] for name in stage.inputs]
+        if stage.batch:
+            result = stage.func(*args, tables)
+            outputs = result if len(stage.outputs) > 1 else (result,)
+        else:
+            per_item = [stage.func(*item_args, tables) for item_args in zip(*args)]
+            if len(stage.outputs) == 1:
+                outputs = (per_item,)
+            else:
+                outputs = list(zip(*per_item)) if per_item else [[] for _ in stage.outputs]
+        outputs = [list(value) for value in outputs]
+        for name, value in zip(stage.outputs, outputs):
+            column = values.setdefault(name, {})
+            for i, v in zip(idx, value):
+                column[i] = v
+        if stage.name in cache_keys:
+            # Serialize now, before later stages mutate these objects in place
+            keys = cache_keys[stage.name]
+            self.cache.put_many([
+                (keys[i], stage.name, [out[j] for out in outputs] if len(outputs) > 1 else outputs[0][j])
+                for j, i in enumerate(idx)
+            ])
+        if stage.memo_input is not None:
+            memo = self.memos.setdefault(stage.name, OrderedDict())
+            keys = values[stage.memo_input]
+            for j, i in enumerate(idx):
+                memo[keys[i]] = [out[j] for out in outputs]
+                memo.move_to_end(keys[i])
+            while len(memo) > self.memo_size:
+                memo.popitem(last=False)
+        self._time(stage.name, time.perf_counter() - start, len(idx))
+
+    def run(self, source, sinks, batch_size=256, workers=1):
+        """
+        Stream source (an iterable of records) through the pipeline into sinks.
+
+        With workers > 1 batches run on a process pool built from self.factory,
+        at most two batches in flight per worker; results reach the sinks in input
+        order, so output matches a serial run.
+
+        Returns:
+            int: number of records delivered to the sinks.
+        """
+        targets = []
+        for sink in sinks:
+            targets.extend(name for name in sink.inputs if name != "record" and name not in targets)
+        batches = self._timed_batches(source, batch_size)
+
+        delivered = 0
+        if workers <= 1:
+            for batch in batches:
+                delivered += self._deliver(batch, self.run_batch(batch, targets), sinks)
+            return delivered
+
+        if self.factory is None:
+            raise ValueError(f"Pipeline {self.name} has no factory; it cannot run on workers")
+        with multiprocessing.Pool(processes=workers, initializer=_init_worker, initargs=(self.factory,)) as pool:
+            pending = deque()
+            for batch in batches:
+                pending.append((batch, pool.apply_async(_run_worker_batch, (batch, targets))))
+                if len(pending) >= workers * 2:
+                    delivered += self._collect(pending.popleft(), sinks)
+            while pending:
+                delivered += self._collect(pending.popleft(), sinks)
+        return delivered
+
+    def _timed_batches(self, source, batch_size):
+        batches = iter_batches(source, batch_size)
+        while True:
+            start = time.perf_counter()
+            batch = next(batches, None)
+            if batch is None:
+                return
+            self._time("ingest", time.perf_counter() - start, len(batch))
+            yield batch
+
+    def _collect(self, pending_entry, sinks):
+        batch, async_result = pending_entry
+        results, timings, cache_hits = async_result.get()
+        for name, (seconds, items) in timings.items():
+            self._time(name, seconds, items)
+        for name, hits in cache_hits.items():
+            self.cache_hits[name] = self.cache_hits.get(name, 0) + hits
+        return self._deliver(batch, results, sinks)
+
+    def _deliver(self, batch, results, sinks):
+        start = time.perf_counter()
+        for i, record in enumerate(batch):
+            for sink in sinks:
+                sink.func(record, *[record if name == "record" else results[name][i] for name in sink.inputs])
+        self._time("sink", time.perf_counter() - start, len(batch))
+        return len(batch)
+
+    def report(self):
+        """Print per-stage timing collected so far."""
+        print(f"[INFO] {self.name} pipeline timing:")
+        order = ["ingest"] + [s.name for s in self.stages] + ["sink"]
+        for name in order:
+            if name not in self.timings:
+                continue
+            seconds, items = self.timings[name]
+            per_item = (seconds / items * 1000) if items else 0.0
+            print(f"  {name:<12} {seconds:9.3f}s  {items:8d} items  {per_item:8.3f} ms/item")
+        for name, hits in self.cache_hits.items():
+            print(f"  {name:<12} {hits:8d} cache hits")
+
+
+# Pipeline rebuilt inside each pool worker (see Pipeline.run)
+_worker_pipeline = None
+
+
+def _init_worker(factory):
+    global _worker_pipeline
+    func, args = factory
+    _worker_pipeline = func(*args)
+    # Parse the canonical tables once per worker, before the first batch arrives
+    _worker_pipeline.tables
+
+
+def _run_worker_batch(batch, targets):
+    _worker_pipeline.timings = {}
+    _worker_pipeline.cache_hits = {}
+    results = _worker_pipeline.run_batch(batch, targets)
+    return results, _worker_pipeline.timings, _worker_pipeline.cache_hits
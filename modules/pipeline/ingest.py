@@ -0,0 +1,106 @@
+import csv
+from datetime import datetime
+from itertools import islice
+from typing import NamedTuple
+
+
+class UtcRecord(NamedTuple):
+    """One typed input row: entity name, naive UTC datetime and its descriptive fields."""
+    name: str
+    utc: datetime
+    fields: dict
+
+
+CITY_SCHEMA = {
+    "name_field": "city_name",
+    "timestamp_field": "incorporation_timestamp_utc",
+    "timestamp_format": "%Y-%m-%dT%H:%M:%SZ",
+    "fields": ["FoundingIntentCanonical"],
+}
+
+JIVA_SCHEMA = {
+    "name_field": "Name",
+    "timestamp_field": "DOB",
+    "timestamp_format": "%Y-%m-%dT%H:%MZ",
+    "fields": [
+        "Ascendant", "Thumbprint", "FoundingIntentNarrative", "MythicLineage",
+        "SemanticDrift", "HealingBias", "FoundingIntentCanonical"
+    ],
+}
+
+
+def parse_utc_timestamp(raw_ts, timestamp_format, iso_length=None):
+    """
+    Parse a UTC timestamp straight to a naive datetime.
+
+    When the value has exactly the length the format produces (iso_length) and an
+    ISO 'T' separator, datetime.fromisoformat is used as a fast path; anything else
+    goes through strptime with the schema's format, so malformed values still
+    raise ValueError.
+    """
+    if iso_length and len(raw_ts) == iso_length and raw_ts[10:11] == "T" and raw_ts.endswith("Z"):
+        try:
+            return datetime.fromisoformat(raw_ts[:-1])
+        except ValueError:
+            pass
+    return datetime.strptime(raw_ts, timestamp_format)
+
+
+def iter_utc_records(filepath, schema, target_name=None):
+    """
+    Stream typed records from a utc_*.csv file, one row at a time.
+
+    Rows without a name or timestamp are skipped; rows with an invalid timestamp
+    are reported and skipped. Memory use does not grow with file size.
+
+    Args:
+        filepath (str): Path to the CSV file.
+        schema (dict): CITY_SCHEMA, JIVA_SCHEMA or a dict with the same keys.
+        target_name (str, optional): Only yield rows with this name (case-insensitive).
+
+    Yields:
+        UtcRecord
+    """
+    name_field = schema["name_field"]
+    timestamp_field = schema["timestamp_field"]
+    timestamp_format = schema["timestamp_format"]
+    fields = schema["fields"]
+    target = target_name.strip().lower() if target_name else None
+    iso_length = len(datetime(2000, 1, 1).strftime(timestamp_format))
+
+    try:
+        with open(filepath, newline='', encoding="utf-8") as csvfile:
+            reader = csv.DictReader(csvfile)
+            for row in reader:
+                name = row.get(name_field)
+                raw_ts = row.get(timestamp_field)
+                if not (name and raw_ts):
+                    continue
+                if target and name.strip().lower() != target:
+                    continue
+                try:
+                    utc = parse_utc_timestamp(raw_ts, timestamp_format, iso_length)
+                except ValueError:
+                    print(f"[WARN] Skipping invalid timestamp for {name}: {raw_ts}")
+                    continue
+                yield UtcRecord(name, utc, {field: row.get(field) for field in fields})
+    except FileNotFoundError:
+        print(f"[ERROR] File not found: {filepath}")
+
+
+def iter_city_records(filepath, target_city=None):
+    return iter_utc_records(filepath, CITY_SCHEMA, target_city)
+
+
+def iter_jiva_records(filepath, target_name=None):
+    return iter_utc_records(filepath, JIVA_SCHEMA, target_name)
+
+
+def iter_batches(records, batch_size):
+    """Group any iterable into lists of at most batch_size items."""
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        yield batch
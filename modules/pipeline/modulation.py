@@ -0,0 +1,286 @@
+import json
+import sys
+
+from modules.canonical_registry import registry
+from modules.geometry.chart_record import birth_flat, get_enrichment_template, regroup_record
+from modules.geometry.number_index import get_semantic_index, get_geometry_index
+from modules.planetary_modulation.aspect_engine import get_aspect_engine
+from modules.planetary_modulation.compute_planetary_info import compute_planetary_info_batch, AYANAMSA_MODEL
+from modules.planetary_modulation.ephemeris_table import get_ephemeris_table
+from modules.planetary_modulation.match_geometry import get_archetype_matcher
+from modules.planetary_modulation.load_bodies import get_bodies
+from modules.planetary_modulation.zone_index import get_zone_index
+from modules.storage.normalized_store import NormalizedRegionWriter, normalized_region_path
+from modules.storage.placement_columns import PlacementColumnWriter, placement_paths
+from modules.storage.region_store import RegionStore, region_json_path, region_name
+from modules.storage.sqlite_store import SqliteRegionStore
+from modules.storage.result_cache import ResultCache
+
+from .engine import DEFAULT_MEMO_SIZE, Pipeline, Sink
+from .ingest import CITY_SCHEMA, JIVA_SCHEMA, iter_utc_records
+from .stages import (
+    match_semantic_units,
+    match_geometry_units,
+    enrich_geometry_matches_with_units,
+    enrich_engine_map_with_overlays,
+    prune_engine_map,
+    prune_city_for_synthesis,
+    prune_jiva_for_synthesis,
+)
+
+CANONICAL_TABLES = {
+    "geometry_sets": "canonical/geometry/geometry_7_sets.json",
+    "aspectual_router": "canonical/modulation/aspectual_router.json",
+    "vibakthi": "canonical/roles/vibakthi.json",
+    "civic_roles": "canonical/roles/civic_roles.json",
+    "template_washer": "canonical/zodiac/template_washer.json",
+    "semantic_24_sets": "canonical/semantic/semantic_24_sets.json",
+}
+
+BODIES_PATH = "canonical/zodiac/bodies.csv"
+ZONES_PATH = "canonical/modulation/modulation_zones.csv"
+
+# Bump when a stage's code changes in a way that alters cached results
+PIPELINE_CACHE_VERSION = 1
+
+# Canonical files each cacheable stage depends on
+CHART_DEPS = [BODIES_PATH, ZONES_PATH]
+SYNTHESIS_DEPS = CHART_DEPS + sorted(CANONICAL_TABLES.values())
+
+# Per entity kind: CSV schema, synthesis pruning and JSON output options
+ENTITY_KINDS = {
+    "city": {
+        "schema": CITY_SCHEMA,
+        "prune": prune_city_for_synthesis,
+        "ensure_ascii": True,
+    },
+    "jiva": {
+        "schema": JIVA_SCHEMA,
+        "prune": prune_jiva_for_synthesis,
+        "ensure_ascii": False,
+    },
+}
+
+
+def load_canonical_tables(ephemeris_table=None):
+    tables = {name: registry.get(path) for name, path in CANONICAL_TABLES.items()}
+    tables["semantic_index"] = get_semantic_index(CANONICAL_TABLES["semantic_24_sets"])
+    tables["geometry_index"] = get_geometry_index(CANONICAL_TABLES["geometry_sets"])
+    tables["modulation_zones"] = get_zone_index(ZONES_PATH)
+    tables["bodies"] = get_bodies(BODIES_PATH)
+    tables["enrichment"] = get_enrichment_template()
+    tables["ephemeris_table"] = get_ephemeris_table(ephemeris_table) if ephemeris_table else None
+    return tables
+
+
+def stage_ephemeris(records, tables):
+    for record in records:
+        print(f"[INFO] Computing planetary modulation for {record.name} at {record.utc:%Y/%m/%d %H:%M:%S}")
+    table = tables["ephemeris_table"]
+    return compute_planetary_info_batch([record.utc for record in records], tables["modulation_zones"],
+                                        backend="table" if table is not None else "ephem", table=table)
+
+
+def stage_signature(chart, tables):
+    """
+    (body, zone) of every body: everything the pruned EngineMap depends on, since
+    the rest of what it carries is per-body canonical data and zone records.
+    """
+    return tuple(
+        (name, pdata.get("zone"))
+        for name, pdata in chart.items()
+        if name != "birth_choice" and isinstance(pdata, dict)
+    )
+
+
+def stage_enrich(record, chart, tables):
+    # Roles, civic roles, washer and bodies.csv columns are attached by reference
+    return tables["enrichment"].record(chart, dict(record.fields))
+
+
+def stage_match(enriched, tables):
+    numbers = enriched.numbers()
+    matches = {"semantic_unit_matches": match_semantic_units(None, tables["semantic_index"], numbers)}
+    matches["geometry_matches"] = match_geometry_units(matches, tables["geometry_index"], numbers)
+    matches["geometry_matches"] = enrich_geometry_matches_with_units(matches)
+    return matches["semantic_unit_matches"], matches["geometry_matches"]
+
+
+def stage_regroup(enriched, semantic_unit_matches, geometry_matches, tables):
+    return enrich_engine_map_with_overlays(
+        regroup_record(enriched),
+        semantic_unit_matches,
+        geometry_matches
+    )
+
+
+def stage_engine(signature, engine_map, tables):
+    # Memoized by signature: the result is shared between entities, do not modify it
+    return prune_engine_map(engine_map)
+
+
+def stage_prune(prune):
+    def run(record, engine, tables):
+        return prune({**birth_flat(record.fields), "EngineMap": engine})
+    return run
+
+
+def stage_archetypes(top_n):
+    def run(enriched, tables):
+        return [
+            [
+                {"archetype_id": m["archetype_id"], "score": m["score"], "retrograde_roles": m["retrograde_roles"],
+                 "mismatches": m["mismatches"]}
+                for m in matches
+            ]
+            for matches in get_archetype_matcher().match_many(enriched, top_n)
+        ]
+    return run
+
+
+def stage_aspects(enriched, tables):
+    return [result["triads"] for result in get_aspect_engine().analyze_charts(enriched)]
+
+
+def chart_cache_key(backend="ephem"):
+    """A chart depends only on the instant, the ayanamsa model and the ephemeris backend."""
+    suffix = "" if backend == "ephem" else f"|{backend}"
+    def key(record):
+        return f"v{PIPELINE_CACHE_VERSION}|{record.utc.isoformat()}|{AYANAMSA_MODEL}{suffix}"
+    return key
+
+
+def synthesis_cache_key(kind, backend="ephem"):
+    chart_key = chart_cache_key(backend)
+    def key(record):
+        fields = json.dumps(record.fields, sort_keys=True, ensure_ascii=False)
+        return f"{kind}|{chart_key(record)}|{fields}"
+    return key
+
+
+def build_modulation_pipeline(kind="city", cache_path=None, ephemeris_table=None, archetype_top_n=3,
+                              memo_size=DEFAULT_MEMO_SIZE):
+    """
+    Build the ephemeris → enrich → match → regroup → prune pipeline for an entity
+    kind ("city" or "jiva"). Ingest and sink are supplied by run_region().
+
+    enrich produces a ChartRecord that match and regroup read directly; the flat
+    planet_<Body>_<field> dict is never built.
+
+    Right after the ephemeris the signature stage reduces a chart to its (body, zone)
+    pairs. The pruned EngineMap (engine stage) is memoized in a memo_size-entry LRU
+    keyed by that signature, so an entity whose zones were seen before skips enrich,
+    match, regroup and the overlays and only gets its birth fields attached in prune.
+
+    With cache_path, charts and pruned syntheses are memoized in a ResultCache keyed
+    by the UTC instant, the ayanamsa model and the digest of the canonical files
+    each stage reads, so unchanged entities skip every stage and a change to, say,
+    civic_roles.json only recomputes enrich → prune.
+
+    With ephemeris_table (path to a build_ephemeris_table() .npy), charts are
+    interpolated from that memory-mapped table instead of computed with ephem.
+
+    The archetypes stage (archetype_matches: top archetype_top_n matches from
+    archetype_master.json per entity) and the aspects stage (aspect_patterns:
+    diads.json / triads.json patterns of the chart) run only when a sink asks for them.
+    """
+    if kind not in ENTITY_KINDS:
+        raise ValueError(f"Unknown entity kind '{kind}'. Expected one of {sorted(ENTITY_KINDS)}")
+    prune = ENTITY_KINDS[kind]["prune"]
+    backend = f"table:{get_ephemeris_table(ephemeris_table).digest}" if ephemeris_table else "ephem"
+
+    pipeline = Pipeline(
+        kind,
+        tables_loader=lambda: load_canonical_tables(ephemeris_table),
+        factory=(build_modulation_pipeline, (kind, cache_path, ephemeris_table, archetype_top_n, memo_size)),
+        cache=ResultCache(cache_path) if cache_path else None,
+        deps_digest=registry.version,
+        memo_size=memo_size,
+    )
+    pipeline.register("ephemeris", ["record"], ["chart"], batch=True,
+                      cache_key=chart_cache_key(backend), cache_deps=CHART_DEPS)(stage_ephemeris)
+    pipeline.register("signature", ["chart"], ["signature"])(stage_signature)
+    pipeline.register("enrich", ["record", "chart"], ["enriched"])(stage_enrich)
+    pipeline.register("match", ["enriched"], ["semantic_unit_matches", "geometry_matches"])(stage_match)
+    pipeline.register("regroup", ["enriched", "semantic_unit_matches", "geometry_matches"], ["engine_map"])(stage_regroup)
+    pipeline.register("engine", ["signature", "engine_map"], ["engine"], memo_input="signature")(stage_engine)
+    pipeline.register("prune", ["record", "engine"], ["synthesis"],
+                      cache_key=synthesis_cache_key(kind, backend), cache_deps=SYNTHESIS_DEPS)(stage_prune(prune))
+    pipeline.register("archetypes", ["enriched"], ["archetype_matches"], batch=True)(stage_archetypes(archetype_top_n))
+    pipeline.register("aspects", ["enriched"], ["aspect_patterns"], batch=True)(stage_aspects)
+    return pipeline
+
+
+def run_region(kind, csv_path, target_name=None, workers=1, batch_size=256, timings=False, cache_path=None,
+               ephemeris_table=None, archetypes=0, aspects=False, normalized=None, sqlite_path=None,
+               columns=False):
+    """
+    Modulate every entity in a utc_*.csv file and write incorp_*.json next to it.
+
+    With normalized ("gzip", "zstd" or "none") the syntheses are streamed to the
+    normalized incorp_*.jsonl[.gz|.zst] instead: EngineMap planets and geometry
+    texts are written once to a shared dictionary and referenced by id (see
+    modules.storage.normalized_store, whose reader expands them back).
+
+    With sqlite_path every synthesis is also written to that results database
+    (placements, engine membership, semantic unit and geometry matches; see
+    modules.storage.sqlite_store) for indexed cross-entity queries.
+
+    With columns, the numeric placements of every chart (longitude, zone,
+    zodiac_number, planet_number, retrograde code per entity and body) are also
+    exported to placements_*.npy for memory-mapped analytics (see
+    modules.storage.placement_columns).
+
+    With archetypes > 0 each synthesis also carries "ArchetypeMatches": its top
+    archetypes from archetype_master.json (id, score, retrograde roles and
+    mismatches). With aspects, each synthesis carries "AspectPatterns": every
+    triads.json pattern formed by the chart's bodies.
+
+    Returns:
+        int: number of entities written.
+    """
+    # The table path must never load ephem (its import alone is most of a cold start)
+    ephem_loaded = "ephem" in sys.modules
+    pipeline = build_modulation_pipeline(kind, cache_path, ephemeris_table, archetypes or 3)
+    options = ENTITY_KINDS[kind]
+    records = iter_utc_records(csv_path, options["schema"], target_name)
+
+    if normalized:
+        store = NormalizedRegionWriter(normalized_region_path(csv_path, normalized), ensure_ascii=options["ensure_ascii"])
+    else:
+        store = RegionStore(region_json_path(csv_path), ensure_ascii=options["ensure_ascii"])
+    with store:
+        # Optional outputs appended to each synthesis: (pipeline name, JSON key)
+        extras = []
+        if archetypes:
+            extras.append(("archetype_matches", "ArchetypeMatches"))
+        if aspects:
+            extras.append(("aspect_patterns", "AspectPatterns"))
+
+        def put(record, synthesis, *values):
+            if values:
+                synthesis = {**synthesis, **{key: value for (_, key), value in zip(extras, values)}}
+            store.put(record.name, synthesis)
+
+        sinks = [Sink("region_store", put, ["synthesis"] + [name for name, _ in extras])]
+        db = SqliteRegionStore(sqlite_path, region_name(csv_path), kind) if sqlite_path else None
+        if db is not None:
+            sinks.append(Sink("sqlite", db.put, ["synthesis", "chart"]))
+        placements = PlacementColumnWriter(*placement_paths(csv_path)) if columns else None
+        if placements is not None:
+            sinks.append(Sink("placements", placements.put, ["chart"]))
+        try:
+            written = pipeline.run(records, sinks, batch_size=batch_size, workers=workers)
+        finally:
+            if db is not None:
+                db.close()
+        if placements is not None:
+            placements.close()
+
+    if pipeline.cache is not None:
+        pipeline.cache.close()
+    if timings:
+        pipeline.report()
+    if ephemeris_table and not ephem_loaded and "ephem" in sys.modules:
+        print("[WARN] ephem was imported during an --ephemeris-table run; a stage is still calling it directly.")
+    return written
@@ -0,0 +1,226 @@
+from modules.geometry.number_index import NumberIndex, flat_numbers, number_mask
+
+
+def enrich_roles_from_vibakthi(dallas_chart: dict, vibakthi_data: dict) -> dict:
+    vmap = vibakthi_data.get("framework", {}).get("vibhakti_mapping", [])
+    
+    for entry in vmap:
+        planet = entry["planet"]
+        if planet in dallas_chart:
+            dallas_chart[planet]["role"] = entry["role"]
+            dallas_chart[planet]["deity"] = entry["deity"]
+            dallas_chart[planet]["semantic_function"] = entry["semantic_function"]
+            dallas_chart[planet]["vibhakti"] = entry["vibhakti"]
+    
+    return dallas_chart
+
+
+def enrich_roles_from_civic_roles(dallas_chart: dict, civic_roles: dict) -> dict:
+    for planet, pdata in dallas_chart.items():
+        if planet in civic_roles and isinstance(pdata, dict):
+            role_info = civic_roles[planet]
+            pdata["civic_role"] = role_info["name"]
+            pdata["civic_function"] = role_info["semantic_role"]
+            pdata["civic_lineage"] = role_info["mythic_lineage"]
+            pdata["civic_opposite"] = role_info["opposite"]
+            pdata["civic_description"] = role_info["description"]
+    return dallas_chart
+
+def enrich_roles_from_template_washer(dallas_chart: dict, washer_roles: dict) -> dict:
+    for planet, pdata in dallas_chart.items():
+        if planet in washer_roles and isinstance(pdata, dict):
+            washer_info = washer_roles[planet]
+            pdata["washer_ring"] = washer_info.get("washer_ring")
+            pdata["washer_force"] = washer_info.get("washer_force")
+            pdata["washer_force_type"] = washer_info.get("washer_force_type")
+            pdata["washer_number"] = washer_info.get("washer_number")
+            pdata["washer_semantic_city_role"] = washer_info.get("washer_semantic_city_role")
+            pdata["washer_semantic_family_role"] = washer_info.get("washer_semantic_family_role")
+    return dallas_chart
+
+def match_semantic_units(city_flat_data: dict, semantic_units, numbers=None) -> list:
+    if isinstance(semantic_units, NumberIndex):
+        if numbers is None:
+            numbers = flat_numbers(city_flat_data)
+        return [
+            {
+                "unit_id": unit["unit_id"],
+                "match_score": len(matched),
+                "matched_numbers": matched
+            }
+            for unit, matched in semantic_units.match(numbers)
+        ]
+
+    planet_keys = [k for k in city_flat_data if k.startswith("planet_") and k.endswith("_number")]
+    city_numbers = [city_flat_data[k] for k in planet_keys if isinstance(city_flat_data[k], int)]
+
+    matches = []
+    for unit in semantic_units:
+        pool = unit.get("number_pool", [])
+        matched = sorted(set(city_numbers) & set(pool))
+        if matched:
+            matches.append({
+                "unit_id": unit["unit_id"],
+                "match_score": len(matched),
+                "matched_numbers": matched
+            })
+    return sorted(matches, key=lambda x: (-x["match_score"], x["unit_id"]))
+
+def match_geometry_units(city_flat_data: dict, geometry_sets, numbers=None) -> list:
+    if isinstance(geometry_sets, NumberIndex):
+        if numbers is None:
+            numbers = flat_numbers(city_flat_data)
+        semantic_matches = city_flat_data.get("semantic_unit_matches", [])
+        return [
+            {
+                "geometry_id": geo["geometry_id"],
+                "matched_units": [uid for uid in geo.get("unit_ids", []) if uid in semantic_matches],
+                "match_score": len(matched),
+                "matched_numbers": matched,
+                "semantic_role": geo.get("semantic_role", "")
+            }
+            for geo, matched in geometry_sets.match(numbers)
+        ]
+
+    planet_keys = [k for k in city_flat_data if k.startswith("planet_") and k.endswith("_number")]
+    city_numbers = [city_flat_data[k] for k in planet_keys if isinstance(city_flat_data[k], int)]
+
+    matches = []
+    for geo in geometry_sets:
+        pool = geo.get("number_pool", [])
+        matched = sorted(set(city_numbers) & set(pool))
+        if matched:
+            matches.append({
+                "geometry_id": geo["geometry_id"],
+                "matched_units": [uid for uid in geo.get("unit_ids", []) if uid in city_flat_data.get("semantic_unit_matches", [])],
+                "match_score": len(matched),
+                "matched_numbers": matched,
+                "semantic_role": geo.get("semantic_role", "")
+            })
+    return sorted(matches, key=lambda x: (-x["match_score"], x["geometry_id"]))
+
+def enrich_geometry_matches_with_units(city_flat_data: dict) -> list:
+    geometry_matches = city_flat_data.get("geometry_matches", [])
+    semantic_units = city_flat_data.get("semantic_unit_matches", [])
+    unit_masks = [(unit["unit_id"], number_mask(unit.get("matched_numbers", []))) for unit in semantic_units]
+
+    enriched = []
+    for geo in geometry_matches:
+        geo_mask = number_mask(geo.get("matched_numbers", []))
+        matched_units = [unit_id for unit_id, mask in unit_masks if geo_mask & mask]
+        enriched.append({
+            **geo,
+            "matched_units": sorted(matched_units)
+        })
+    return enriched
+
+
+def build_engine_geometry_enrichment(engine_map, geometry_matches):
+    geom_lookup = {}
+    for geom in geometry_matches:
+        for num in geom.get("matched_numbers", []):
+            geom_lookup.setdefault(num, []).append({
+                "geometry_id": geom["geometry_id"],
+                "semantic_role": geom.get("semantic_role", "")
+            })
+
+    engine_geometry = {}
+    for engine_name, planets in engine_map.items():
+        contributions = {}
+        for planet_name, pdata in planets.items():
+            pnum = pdata.get("planet_number")
+            for geom in geom_lookup.get(pnum, []):
+                gid = geom["geometry_id"]
+                role = geom["semantic_role"]
+                contributions.setdefault(gid, set()).add(role)
+
+        engine_geometry[engine_name] = {
+            gid: "; ".join(sorted(roles))
+            for gid, roles in contributions.items()
+        }
+
+    return engine_geometry
+
+def build_engine_semantic_enrichment(engine_map, semantic_unit_matches):
+    semantic_lookup = {}
+    for unit in semantic_unit_matches:
+        for num in unit.get("matched_numbers", []):
+            semantic_lookup.setdefault(num, []).append(unit["unit_id"])
+
+    engine_semantic = {}
+    for engine_name, planets in engine_map.items():
+        unit_ids = set()
+        for planet_name, pdata in planets.items():
+            pnum = pdata.get("planet_number")
+            unit_ids.update(semantic_lookup.get(pnum, []))
+        engine_semantic[engine_name] = sorted(unit_ids)
+
+    return engine_semantic
+
+def enrich_engine_map_with_overlays(engine_map, semantic_unit_matches, geometry_matches):
+    geometry_enrichment = build_engine_geometry_enrichment(engine_map, geometry_matches)
+    semantic_enrichment = build_engine_semantic_enrichment(engine_map, semantic_unit_matches)
+
+    for engine_name, planets in engine_map.items():
+        for planet_name in planets:
+            planets[planet_name].pop("geometry_roles", None)
+            planets[planet_name].pop("semantic_units", None)
+
+        planets["geometry_enrichment"] = geometry_enrichment.get(engine_name, {})
+        planets["semantic_unit_enrichment"] = semantic_enrichment.get(engine_name, [])
+
+    return engine_map
+
+def prune_engine_map(engine_map):
+    """EngineMap block of a synthesis: per engine, the pruned planets plus the engine-level overlays."""
+    pruned = {}
+    for engine, planets in engine_map.items():
+        pruned[engine] = {}
+
+        # Filter out non-planet keys
+        for planet_name, planet_data in planets.items():
+            if planet_name in ["geometry_enrichment", "semantic_unit_enrichment"]:
+                continue
+
+            pruned[engine][planet_name] = {
+                "semantic": planet_data.get("semantic"),
+                "civic": planet_data.get("civic"),
+                "modulation": planet_data.get("modulation"),
+                "zone": planet_data.get("zone"),
+                "planet_number": planet_data.get("planet_number"),
+                "zodiac_number": planet_data.get("zodiac_number")
+            }
+
+        # Add engine-level overlays
+        if "geometry_enrichment" in planets:
+            pruned[engine]["geometry_enrichment"] = planets["geometry_enrichment"]
+        if "semantic_unit_enrichment" in planets:
+            pruned[engine]["semantic_unit_enrichment"] = planets["semantic_unit_enrichment"]
+
+    return pruned
+
+def prune_city_for_synthesis(city_data, birth_fields=()):
+    pruned = {}
+    pruned["FoundingIntentCanonical"] = city_data.get("birth_FoundingIntentCanonical")
+    for pruned_key, flat_key in birth_fields:
+        pruned[pruned_key] = city_data.get(flat_key)
+
+    # An already pruned "EngineMap" (see prune_engine_map) is taken as is
+    if "EngineMap" in city_data:
+        pruned["EngineMap"] = city_data["EngineMap"]
+    else:
+        pruned["EngineMap"] = prune_engine_map(city_data.get("engine_map", {}))
+    return pruned
+
+# Birth fields a Jiva synthesis carries in addition to FoundingIntentCanonical
+JIVA_BIRTH_FIELDS = [
+    ("birth_Ascendant", "birth_Ascendant"),
+    ("birth_Thumbprint", "birth_Thumbprint"),
+    ("birth_SemanticDrift", "birth_SemanticDrift"),
+    ("birth_HealingBias", "birth_HealingBias"),
+    ("birth_MythicLineage", "birth_MythicLineage"),
+    ("FoundingIntentNarrative", "birth_FoundingIntentNarrative"),
+]
+
+def prune_jiva_for_synthesis(jiva_data):
+    return prune_city_for_synthesis(jiva_data, JIVA_BIRTH_FIELDS)
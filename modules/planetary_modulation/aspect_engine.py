@@ -0,0 +1,219 @@
+import json
+import re
+from itertools import combinations
+
+import numpy as np
+
+from ..canonical_registry import registry
+from .load_bodies import get_bodies
+
+DIADS_PATH = "templates/diads.json"
+TRIADS_PATH = "templates/triads.json"
+
+# Unary plus before a number ("sign_offsets": [+1, -1]) is not valid JSON
+_UNARY_PLUS = re.compile(r"([\[,:]\s*)\+(?=\d)")
+
+
+def load_template_json(path):
+    """
+    Parse a hand-edited template file that json.load() rejects.
+
+    Accepts unary plus on numbers and several top-level values written back to
+    back (e.g. two arrays, "][", as in triads.json); top-level arrays are joined.
+    """
+    with open(path, encoding="utf-8") as f:
+        text = _UNARY_PLUS.sub(r"\1", f.read())
+    decoder = json.JSONDecoder()
+    values = []
+    pos = 0
+    while True:
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+        if pos == len(text):
+            break
+        value, pos = decoder.raw_decode(text, pos)
+        values.append(value)
+    if len(values) == 1:
+        return values[0]
+    if values and all(isinstance(value, list) for value in values):
+        return [item for value in values for item in value]
+    raise ValueError(f"{path}: expected one JSON value or several arrays, found {len(values)} values")
+
+
+def load_diads(path=DIADS_PATH):
+    return load_template_json(path)["aspects"]
+
+
+def load_triads(path=TRIADS_PATH):
+    """Triad patterns; repeated triadic_name entries (triads.json lists some twice) keep the first."""
+    triads = {}
+    for triad in load_template_json(path):
+        triads.setdefault(triad["triadic_name"], triad)
+    return list(triads.values())
+
+
+class AspectEngine:
+    """
+    Pairwise aspects and triad patterns for charts, from diads.json and triads.json.
+
+    For a chart's longitude vector the engine forms the n x n separation matrix
+    (lon[j] - lon[i]) mod 360 in one NumPy step and labels every pair with a diad.
+    The diad degree_ranges are whole-sign windows (degree_range = 30 * sign_offset),
+    so pairs are classified on the whole-sign separation, i.e. between the starts of
+    the two bodies' signs. That makes the label matrix symmetric: +1 and -1 both
+    read as Adjacent Activation, +2 and -2 as Sextile, and so on.
+
+    Triads are read off the label matrix (the chart's aspect-labelled adjacency
+    matrix): its entries are gathered at the precompiled index arrays of every
+    body triangle, the three labels are reduced to an order-free code, and one
+    lookup-table step returns the triad patterns whose aspect_variants have that
+    code. Every step broadcasts over a leading batch axis of charts.
+    """
+
+    def __init__(self, diads, triads, bodies):
+        self.bodies = list(bodies)
+        self.aspects = [diad["aspect_name"] for diad in diads]
+        ranges = sorted(
+            (float(lo), float(hi), i)
+            for i, diad in enumerate(diads)
+            for lo, hi in diad.get("degree_ranges", [])
+        )
+        self.range_starts = np.array([lo for lo, _, _ in ranges])
+        self.range_ends = np.array([hi for _, hi, _ in ranges])
+        self.range_aspects = np.array([i for _, _, i in ranges], dtype=np.int16)
+
+        self.triads = triads
+        base = len(self.aspects)
+        self.code_base = base
+        # code -> triad indexes whose aspect multiset has that code
+        self.patterns = {}
+        aspect_index = {name: i for i, name in enumerate(self.aspects)}
+        for t, triad in enumerate(triads):
+            for variant in triad.get("aspect_variants", [triad.get("geometry_signature", [])]):
+                if len(variant) != 3 or any(name not in aspect_index for name in variant):
+                    continue
+                code = self._code(*sorted(aspect_index[name] for name in variant))
+                if t not in self.patterns.setdefault(code, []):
+                    self.patterns[code].append(t)
+        # Lookup table code -> pattern group (index into self.groups), -1 for none
+        self.groups = list(self.patterns.values())
+        self.lookup = np.full(base ** 3, -1, dtype=np.int32)
+        for g, code in enumerate(self.patterns):
+            self.lookup[code] = g
+
+        triangles = np.array(list(combinations(range(len(self.bodies)), 3)), dtype=np.intp).reshape(-1, 3)
+        self.tri_i, self.tri_j, self.tri_k = triangles.T
+        self.pair_i, self.pair_j = np.triu_indices(len(self.bodies), k=1)
+
+    def _code(self, a, b, c):
+        return (a * self.code_base + b) * self.code_base + c
+
+    def longitudes_many(self, charts):
+        """(charts, bodies) longitude array from ChartRecords or planet_info dicts; NaN where missing."""
+        longitudes = np.full((len(charts), len(self.bodies)), np.nan)
+        for row, chart in enumerate(charts):
+            for col, body in enumerate(self.bodies):
+                pdata = chart.get(body)
+                if pdata is not None:
+                    value = pdata.get("longitude")
+                    if isinstance(value, (int, float)):
+                        longitudes[row, col] = value
+        return longitudes
+
+    def classify(self, separation):
+        """Diad index for each separation in degrees ([0, 360)); -1 outside every range or NaN."""
+        idx = np.searchsorted(self.range_starts, separation, side="right") - 1
+        safe = np.clip(idx, 0, max(len(self.range_starts) - 1, 0))
+        with np.errstate(invalid="ignore"):
+            inside = (idx >= 0) & (separation < self.range_ends[safe])
+        return np.where(inside, self.range_aspects[safe], -1).astype(np.int16)
+
+    def matrices(self, longitudes):
+        """
+        Separation and aspect-label matrices.
+
+        Args:
+            longitudes: (bodies,) or (charts, bodies) sidereal longitudes.
+
+        Returns:
+            (separation, labels): (charts, bodies, bodies) arrays; separation[c, i, j] is
+            (lon[j] - lon[i]) mod 360 in degrees, labels[c, i, j] the diad index (-1 on the
+            diagonal and for missing bodies).
+        """
+        longitudes = np.atleast_2d(np.asarray(longitudes, dtype=float))
+        separation = np.mod(longitudes[:, None, :] - longitudes[:, :, None], 360)
+        signs = np.floor(np.mod(longitudes, 360) / 30) * 30
+        labels = self.classify(np.mod(signs[:, None, :] - signs[:, :, None], 360))
+        diagonal = np.arange(longitudes.shape[1])
+        labels[:, diagonal, diagonal] = -1
+        return separation, labels
+
+    def triad_hits(self, labels):
+        """(chart, triangle, pattern group) index arrays of every triad pattern found."""
+        a = labels[:, self.tri_i, self.tri_j]
+        b = labels[:, self.tri_j, self.tri_k]
+        c = labels[:, self.tri_i, self.tri_k]
+        ordered = np.sort(np.stack([a, b, c], axis=-1), axis=-1).astype(np.int64)
+        valid = ordered[..., 0] >= 0
+        codes = np.where(valid, self._code(ordered[..., 0], ordered[..., 1], ordered[..., 2]), 0)
+        groups = np.where(valid, self.lookup[codes], -1)
+        chart_idx, tri_idx = np.nonzero(groups >= 0)
+        return chart_idx, tri_idx, groups[chart_idx, tri_idx]
+
+    def analyze_many(self, longitudes, pairs=False):
+        """
+        Aspect patterns of a batch of charts.
+
+        Returns:
+            list: Per chart, {"triads": [{"triad", "bodies", "aspects"}, ...]} with the
+            bodies of each triangle in bodies.csv order and its aspects as
+            (first-second, second-third, first-third); with pairs=True also
+            "aspects": [{"bodies", "aspect", "separation"}] for every labelled pair.
+        """
+        separation, labels = self.matrices(longitudes)
+        results = [{"triads": []} for _ in range(len(labels))]
+        for chart, tri, group in zip(*(arr.tolist() for arr in self.triad_hits(labels))):
+            i, j, k = int(self.tri_i[tri]), int(self.tri_j[tri]), int(self.tri_k[tri])
+            members = [self.bodies[i], self.bodies[j], self.bodies[k]]
+            aspects = [self.aspects[labels[chart, i, j]], self.aspects[labels[chart, j, k]],
+                       self.aspects[labels[chart, i, k]]]
+            for t in self.groups[group]:
+                results[chart]["triads"].append(
+                    {"triad": self.triads[t]["triadic_name"], "bodies": members, "aspects": aspects})
+        if pairs:
+            pair_labels = labels[:, self.pair_i, self.pair_j]
+            pair_separation = separation[:, self.pair_i, self.pair_j]
+            for chart, result in enumerate(results):
+                result["aspects"] = [
+                    {"bodies": [self.bodies[i], self.bodies[j]], "aspect": self.aspects[label],
+                     "separation": round(float(sep), 4)}
+                    for i, j, label, sep in zip(self.pair_i.tolist(), self.pair_j.tolist(),
+                                                pair_labels[chart].tolist(), pair_separation[chart].tolist())
+                    if label >= 0
+                ]
+        return results
+
+    def analyze(self, chart, pairs=False):
+        """analyze_many() for a single ChartRecord / planet_info dict."""
+        return self.analyze_many(self.longitudes_many([chart]), pairs)[0]
+
+    def analyze_charts(self, charts, pairs=False):
+        """analyze_many() over ChartRecords / planet_info dicts."""
+        if not charts:
+            return []
+        return self.analyze_many(self.longitudes_many(charts), pairs)
+
+
+_engines = {}
+
+
+def get_aspect_engine(diads_path=DIADS_PATH, triads_path=TRIADS_PATH):
+    """AspectEngine for the current templates and bodies.csv; rebuilt when any of them changes."""
+    diads = registry.get(diads_path, load_diads)
+    triads = registry.get(triads_path, load_triads)
+    bodies = get_bodies()
+    key = (id(diads), id(triads), id(bodies))
+    if key not in _engines:
+        _engines.clear()
+        _engines[key] = AspectEngine(diads, triads, [body for body, *_ in bodies])
+    return _engines[key]
@@ -1,44 +1,158 @@
 import json
 import os
+import sys
 
-GEOMETRY_PATH = os.path.join("templates", "geometry_shapes.json")
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from modules.canonical_registry import REPO_ROOT, file_digest, registry
+from modules.planetary_modulation.chart_router import GEOMETRY_PATH, get_geometry_router, index_geometry_shapes
+from modules.storage.region_store import make_temp_output
 
-def load_geometry_shapes():
-    """Load and index geometry shapes by geometry_id."""
-    with open(GEOMETRY_PATH, "r") as f:
-        raw_shapes = json.load(f)
+DECOMPOSITION_CACHE_PATH = os.path.join(REPO_ROOT, ".cache", "geometry", "decompositions.json")
 
-    return {
-        shape["geometry_id"]: shape
-        for shape in raw_shapes
-        if "geometry_id" in shape
-    }
+# Bump when decompose_shape() changes shape, so stale caches are rebuilt
+DECOMPOSITION_FORMAT_VERSION = 1
 
-def decompose_geometry(geometry_id):
-    """Decompose a geometry into its internal structures and oppositional links."""
-    shapes = load_geometry_shapes()
 
-    if geometry_id not in shapes:
-        raise ValueError(f"Geometry ID '{geometry_id}' not found.")
+class ReadOnlyList(list):
+    """list that refuses in-place changes; still == to, and JSON-encoded like, a list."""
 
-    shape = shapes[geometry_id]
-    internal = shape.get("internal_structure", {})
-    oppositional = shape.get("oppositional_links", [])
-    aspects = shape.get("aspect_compatibility", [])
-    checksum = shape.get("checksum_anchor", None)
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Geometry decompositions are shared and read-only; copy before modifying.")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+    def __reduce__(self):
+        return ReadOnlyList, (list(self),)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+class ReadOnlyDict(dict):
+    """dict counterpart of ReadOnlyList."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Geometry decompositions are shared and read-only; copy before modifying.")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    update = setdefault = pop = popitem = clear = _readonly
+
+    def __reduce__(self):
+        return ReadOnlyDict, (dict(self),)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return ReadOnlyDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return ReadOnlyList(freeze(v) for v in value)
+    return value
+
+
+def thaw(value):
+    """Plain, mutable deep copy of a frozen value (copy.deepcopy() does the same)."""
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [thaw(v) for v in value]
+    return value
 
+
+def decompose_shape(geometry_id, shape):
+    """Internal structures and oppositional links of one shape, as plain JSON data."""
+    internal = shape.get("internal_structure", {})
     return {
         "geometry_id": geometry_id,
         "triads": internal.get("triads", []),
         "dyads": internal.get("dyads", []),
         "squares": internal.get("squares", []),
-        "oppositional_links": oppositional,
-        "aspect_compatibility": aspects,
-        "checksum_anchor": checksum,
+        "oppositional_links": shape.get("oppositional_links", []),
+        "aspect_compatibility": shape.get("aspect_compatibility", []),
+        "checksum_anchor": shape.get("checksum_anchor", None),
         "semantic_function": shape.get("semantic_function", "")
     }
 
+
+def build_decomposition_table(path, cache_path=DECOMPOSITION_CACHE_PATH):
+    """
+    Decomposition of every shape in the geometry file at path, keyed by geometry_id.
+
+    The table is stored as JSON at cache_path together with the sha256 of the
+    shapes file it came from; a later process whose shapes file has the same
+    digest loads that instead of re-parsing and re-decomposing the shapes.
+    Everything returned is frozen (ReadOnlyDict / ReadOnlyList) because it is
+    shared by every caller.
+    """
+    version = [DECOMPOSITION_FORMAT_VERSION, file_digest(path)]
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("version") == version:
+                return freeze(cached["decompositions"])
+        except (OSError, ValueError):
+            pass  # unreadable cache: rebuild it below
+
+    table = {
+        geometry_id: decompose_shape(geometry_id, shape)
+        for geometry_id, shape in index_geometry_shapes(path).items()
+    }
+    if cache_path:
+        fd, tmp_path = make_temp_output(cache_path)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": version, "decompositions": table}, f, separators=(",", ":"))
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return freeze(table)
+
+
+def load_decomposition_table():
+    """Decomposition table shared through the canonical registry; rebuilt when the shapes file changes."""
+    return registry.get(GEOMETRY_PATH, build_decomposition_table)
+
+
+def decompose_geometry(geometry_id):
+    """Decompose a geometry into its internal structures and oppositional links (shared, read-only)."""
+    table = load_decomposition_table()
+
+    if geometry_id not in table:
+        raise ValueError(f"Geometry ID '{geometry_id}' not found.")
+    return table[geometry_id]
+
+
+def decompose_all(geometry_ids=None, criteria_list=None):
+    """
+    Bulk decomposition.
+
+    Args:
+        geometry_ids (list, optional): Geometry ids to decompose; unknown ids raise ValueError.
+        criteria_list (list, optional): Criteria dicts routed with GeometryRouter.route_many();
+            entries that match no shape give None.
+
+    Returns:
+        The whole read-only table (dict keyed by geometry_id) when neither argument
+        is given, otherwise a list of decompositions in input order.
+    """
+    table = load_decomposition_table()
+    if criteria_list is not None:
+        shapes = get_geometry_router().route_many(criteria_list)
+        return [table[shape["geometry_id"]] if shape is not None else None for shape in shapes]
+    if geometry_ids is None:
+        return table
+    missing = [geometry_id for geometry_id in geometry_ids if geometry_id not in table]
+    if missing:
+        raise ValueError(f"Geometry IDs not found: {missing}")
+    return [table[geometry_id] for geometry_id in geometry_ids]
+
 # Example usage
 if __name__ == "__main__":
     geometry_data = decompose_geometry("HX-22")
-    print(json.dumps(geometry_data, indent=2))
\ No newline at end of file
+    print(json.dumps(geometry_data, indent=2))
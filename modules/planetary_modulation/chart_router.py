@@ -1,11 +1,15 @@
 import json
 import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from modules.canonical_registry import registry
 
 GEOMETRY_PATH = os.path.join("templates", "geometry_shapes.json")
 
-def load_geometry_shapes():
+def index_geometry_shapes(path):
     """Load and index geometry shapes by geometry_id."""
-    with open(GEOMETRY_PATH, "r") as f:
+    with open(path, "r") as f:
         raw_shapes = json.load(f)
 
     return {
@@ -14,54 +18,183 @@ def load_geometry_shapes():
         if "geometry_id" in shape
     }
 
+def _freeze(value):
+    """Hashable stand-in for a criterion value with the same == semantics (lists != tuples)."""
+    if isinstance(value, list):
+        return ("__list__",) + tuple(_freeze(v) for v in value)
+    if isinstance(value, tuple):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return ("__dict__",) + tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    hash(value)
+    return value
+
+
+def _shape_matches(shape, criteria):
+    """The per-shape test canonical_geometry_router() has always applied."""
+    for key, value in criteria.items():
+        if key in shape and shape[key] == value:
+            continue
+        elif key in shape.get("internal_structure", {}) and value in shape["internal_structure"][key]:
+            continue
+        else:
+            return False
+    return True
+
+
+class GeometryRouter:
+    """
+    geometry_shapes.json loaded once and indexed for routing.
+
+    Every top-level field value (geometry_id, semantic_function, checksum_anchor, ...)
+    and every member of a list under internal_structure (triads, dyads, squares, ...)
+    gets a posting list of shape positions in file order. A multi-criteria query
+    intersects the posting lists of its criteria and checks the surviving shapes in
+    file order with the original test, so it returns exactly what the linear scan
+    in canonical_geometry_router() returned, without touching the other shapes.
+    """
+
+    def __init__(self, shapes):
+        self.shapes = shapes
+        self.ordered = list(shapes.values())
+        self.postings = {}
+        # Shapes whose internal_structure[key] is not a list (e.g. a string, where `in`
+        # is a substring test) cannot be indexed and stay candidates for that key
+        self.unindexed = {}
+        for position, shape in enumerate(self.ordered):
+            for key, value in shape.items():
+                self._post(key, value, position)
+            for key, members in shape.get("internal_structure", {}).items():
+                if isinstance(members, list):
+                    for member in members:
+                        self._post(key, member, position)
+                else:
+                    self.unindexed.setdefault(key, []).append(position)
+
+    def _post(self, key, value, position):
+        try:
+            frozen = _freeze(value)
+        except TypeError:
+            self.unindexed.setdefault(key, []).append(position)
+            return
+        positions = self.postings.setdefault((key, frozen), [])
+        if not positions or positions[-1] != position:
+            positions.append(position)
+
+    @classmethod
+    def load(cls, path):
+        return cls(index_geometry_shapes(path))
+
+    def candidates(self, criteria):
+        """Sorted shape positions that can satisfy every criterion."""
+        found = None
+        for key, value in criteria.items():
+            try:
+                positions = set(self.postings.get((key, _freeze(value)), ()))
+            except TypeError:
+                continue  # unhashable value: no pruning on this key
+            positions.update(self.unindexed.get(key, ()))
+            found = positions if found is None else found & positions
+            if not found:
+                return []
+        if found is None:
+            return range(len(self.ordered))
+        return sorted(found)
+
+    def route(self, criteria):
+        """First shape (file order) matching every criterion, or None."""
+        for position in self.candidates(criteria):
+            shape = self.ordered[position]
+            if _shape_matches(shape, criteria):
+                return shape
+        return None
+
+    def route_many(self, criteria_list):
+        """route() for each criteria dict; None where nothing matches."""
+        memo = {}
+        routed = []
+        for criteria in criteria_list:
+            try:
+                key = _freeze(criteria)
+            except TypeError:
+                routed.append(self.route(criteria))
+                continue
+            if key not in memo:
+                memo[key] = self.route(criteria)
+            routed.append(memo[key])
+        return routed
+
+    def by_geometry_id(self, geometry_id):
+        return self.shapes.get(geometry_id)
+
+    def by_semantic_function(self, target_function):
+        return self._first("semantic_function", target_function)
+
+    def by_checksum_anchor(self, checksum):
+        return self._first("checksum_anchor", checksum)
+
+    def by_triad(self, triad):
+        return self._first("triads", triad, internal=True)
+
+    def _first(self, key, value, internal=False):
+        # shape.get(key) == None also holds for shapes without the key, which have no posting
+        positions = range(len(self.ordered)) if value is None and not internal else self.candidates({key: value})
+        for position in positions:
+            shape = self.ordered[position]
+            if internal:
+                if value in shape.get("internal_structure", {}).get(key, []):
+                    return shape
+            elif shape.get(key) == value:
+                return shape
+        return None
+
+
+def get_geometry_router():
+    """GeometryRouter shared through the canonical registry; rebuilt when the file changes."""
+    return registry.get(GEOMETRY_PATH, GeometryRouter.load)
+
+def load_geometry_shapes():
+    """Indexed geometry shapes, shared through the canonical registry."""
+    return get_geometry_router().shapes
+
 def route_by_geometry_id(geometry_id):
     """Route directly by geometry_id."""
-    shapes = load_geometry_shapes()
-    if geometry_id not in shapes:
+    shape = get_geometry_router().by_geometry_id(geometry_id)
+    if shape is None:
         raise ValueError(f"Geometry ID '{geometry_id}' not found.")
-    return shapes[geometry_id]
+    return shape
 
 def route_by_semantic_function(target_function):
     """Route by semantic_function."""
-    shapes = load_geometry_shapes()
-    for shape in shapes.values():
-        if shape.get("semantic_function") == target_function:
-            return shape
-    raise ValueError(f"No geometry found for semantic function: {target_function}")
+    shape = get_geometry_router().by_semantic_function(target_function)
+    if shape is None:
+        raise ValueError(f"No geometry found for semantic function: {target_function}")
+    return shape
 
 def route_by_checksum_anchor(checksum):
     """Route by checksum_anchor."""
-    shapes = load_geometry_shapes()
-    for shape in shapes.values():
-        if shape.get("checksum_anchor") == checksum:
-            return shape
-    raise ValueError(f"No geometry found for checksum anchor: {checksum}")
+    shape = get_geometry_router().by_checksum_anchor(checksum)
+    if shape is None:
+        raise ValueError(f"No geometry found for checksum anchor: {checksum}")
+    return shape
 
 def route_by_planetary_triad(triad):
     """Route by planetary triad match."""
-    shapes = load_geometry_shapes()
-    for shape in shapes.values():
-        triads = shape.get("internal_structure", {}).get("triads", [])
-        if triad in triads:
-            return shape
-    raise ValueError(f"No geometry found for triad: {triad}")
+    shape = get_geometry_router().by_triad(triad)
+    if shape is None:
+        raise ValueError(f"No geometry found for triad: {triad}")
+    return shape
 
 def canonical_geometry_router(criteria: dict):
     """Generic router using multiple canonical fields."""
-    shapes = load_geometry_shapes()
-    for shape in shapes.values():
-        match = True
-        for key, value in criteria.items():
-            if key in shape and shape[key] == value:
-                continue
-            elif key in shape.get("internal_structure", {}) and value in shape["internal_structure"][key]:
-                continue
-            else:
-                match = False
-                break
-        if match:
-            return shape
-    raise ValueError(f"No geometry matches criteria: {criteria}")
+    shape = get_geometry_router().route(criteria)
+    if shape is None:
+        raise ValueError(f"No geometry matches criteria: {criteria}")
+    return shape
+
+def route_many(criteria_list):
+    """canonical_geometry_router() over many criteria dicts; None where nothing matches."""
+    return get_geometry_router().route_many(criteria_list)
 
 # Example usage
 if __name__ == "__main__":
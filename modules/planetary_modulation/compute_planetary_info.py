@@ -1,12 +1,53 @@
-import ephem
+import importlib
+import importlib.util
+import numpy as np
 from math import pi
 from datetime import datetime, timedelta
 
-from .load_bodies import load_bodies
+from .load_bodies import get_bodies
+from .zone_index import ZoneIndex, as_zone_index, zone_record
 
 
+class LazyModule:
+    """
+    Stand-in for a module that is only imported on first attribute access.
+
+    Unlike importlib.util.LazyLoader nothing is put in sys.modules until then, so
+    a run that never touches the module never has it loaded.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+# ephem is only loaded once a live computation needs it; backend="table" never does
+ephem = LazyModule("ephem") if importlib.util.find_spec("ephem") is not None else None
+
+
+def to_utc_datetime(utc_time):
+    """Accept a '%Y/%m/%d %H:%M:%S' string, a naive UTC datetime or an ephem date (Dublin JD float)."""
+    if isinstance(utc_time, datetime):
+        return utc_time
+    if isinstance(utc_time, str):
+        return datetime.strptime(utc_time, '%Y/%m/%d %H:%M:%S')
+    return ephem.Date(utc_time).datetime()
+
+# Identifies the ayanamsa model below; part of every cached-chart key
+AYANAMSA_MODEL = "lahiri-285AD-50.285123as+7deg"
+
+# Lahiri precession rate (degrees/year), reference year (0° ayanamsa) and added offset
+LAHIRI_RATE = 50.285123 / 3600  # arcseconds/year → degrees/year
+LAHIRI_YEAR = 285
+LAHIRI_OFFSET = 7
+
 def utc_to_fractional_year(utc_time_str):
-    dt = datetime.strptime(utc_time_str, '%Y/%m/%d %H:%M:%S')
+    dt = to_utc_datetime(utc_time_str)
     year_start = datetime(dt.year, 1, 1)
     year_end = datetime(dt.year + 1, 1, 1)
     year_fraction = (dt - year_start).total_seconds() / (year_end - year_start).total_seconds()
@@ -15,8 +56,7 @@ def utc_to_fractional_year(utc_time_str):
 def lahiri_ayanamsa_from_utc(utc_time_str):
     y = utc_to_fractional_year(utc_time_str)
     # Lahiri reference year is 285 AD with 0° ayanamsa
-    precession_rate = 50.285123 / 3600  # arcseconds/year → degrees/year
-    return round(((y - 285) * precession_rate) + 7, 6)  # we add additional 7 degrees to ayanamsa to ensure our model of separating sun and moon nakshatras to 2 separate houses
+    return round(((y - LAHIRI_YEAR) * LAHIRI_RATE) + LAHIRI_OFFSET, 6)  # we add additional 7 degrees to ayanamsa to ensure our model of separating sun and moon nakshatras to 2 separate houses
 
 def mean_node_longitude(julian_day):
     # Mean lunar node calculation (simplified)
@@ -62,51 +102,55 @@ def get_sidereal_longitude(body, utc_time, ayanamsa):
         return f"{body_title} requires extended support (e.g., Swiss Ephemeris)"
 
 def get_zone_info(longitude, zones):
+    if isinstance(zones, ZoneIndex):
+        return zones.lookup(longitude)
     longitude = longitude % 360  # Normalize wrap-around
     for zone in zones:
         if zone["start"] <= longitude < zone["end"]:
-            return {
-                "zone": zone["zone"],
-                "sign": zone["sign"],
-                "sign_ruler": zone["ruler"],
-                "nakshatra": zone["nakshatra"],
-                "nakshatra_ruler": zone["nak_ruler"],
-                "template_House": zone["house"],
-                'modulation_stage': zone["stage"],
-                'zodiac_number': zone["zodiac_number"],
-                'containment_flag': zone["containment_flag"],
-                'mythic_tags': zone["mythic_tags"],
-                'Engine': zone["Engine"],
-                'Category': zone["Category"],
-                'CollectiveMeaning': zone["CollectiveMeaning"],
-                'zoneEssence': zone["zoneEssence"]                
-            }
+            return zone_record(zone)
     return None  # if no match found
 
         
+CLOSED_FORM_BODIES = ('Rahu', 'Ketu', 'Lilith')
+PHASE_BODIES = ('Mercury', 'Venus')
+OUTER_BODIES = ('Mars', 'Jupiter', 'Saturn', 'Uranus', 'Neptune', 'Pluto')
+
+# Retrograde heuristic thresholds, shared with the vectorized TransitSamples.retrograde_status().
+# Mercury/Venus within COMBUST_ORB degrees of the Sun are Retrograde at or below
+# RETROGRADE_PHASE, Combust above it, Direct further out.
+COMBUST_ORB = 8
+RETROGRADE_PHASE = 0.1
+# Outer planets: Combust in the Sun's zone, Direct up to DIRECT_ZONE_SPAN zones from it
+# either way round the ZONE_COUNT zones, Retrograde beyond
+ZONE_COUNT = 36
+DIRECT_ZONE_SPAN = 12
+
+def inner_planet_status(lon, sun_longitude, phase):
+    sep = abs(lon - sun_longitude)
+    if sep > COMBUST_ORB:
+        planet_status = "Direct"
+    if sep <= COMBUST_ORB and phase <= RETROGRADE_PHASE:
+        planet_status = "Retrograde"
+    elif sep <= COMBUST_ORB and phase > RETROGRADE_PHASE:
+        planet_status = "Combust" 
+    return planet_status  
+
 def retrograde_flag(body_title, planet_zone, sun_longitude, sun_zone, utc_time, ayanamsa):
-    if body_title in ['Mercury' , 'Venus']:
+    if body_title in PHASE_BODIES:
         planet = getattr(ephem, body_title)()
         planet.compute(utc_time)
         ecl = ephem.Ecliptic(planet)
         lon = ecl.lon * (180.0 / pi) - ayanamsa
-        sep = abs(lon - sun_longitude)
-        if sep > 8:
-            planet_status = "Direct"
-        if sep <= 8 and planet.phase <= 0.1:
-            planet_status = "Retrograde"
-        elif sep <= 8 and planet.phase > 0.1:
-            planet_status = "Combust" 
-        return planet_status  
-    elif body_title in ['Rahu', 'Ketu', 'Lilith']:
+        return inner_planet_status(lon, sun_longitude, planet.phase)
+    elif body_title in CLOSED_FORM_BODIES:
         return "Retrograde"
     elif body_title in ['Sun', 'Moon']:
         return "Direct"
-    elif body_title in ['Mars', 'Jupiter', 'Saturn', 'Uranus', 'Neptune', 'Pluto']:    
-        delta = abs(planet_zone - sun_zone) % 36
+    elif body_title in OUTER_BODIES:
+        delta = abs(planet_zone - sun_zone) % ZONE_COUNT
         if delta == 0:
             return "Combust"
-        elif delta <= 12 or delta >= 24:
+        elif delta <= DIRECT_ZONE_SPAN or delta >= ZONE_COUNT - DIRECT_ZONE_SPAN:
             return "Direct"
         else:
             return "Retrograde"
@@ -133,43 +177,157 @@ def trace_all_variables():
         if not name.startswith("__") and not callable(val):
             print(f"{name} = {val} ({type(val).__name__})")
     
-def compute_planetary_info(utc_time, modulation_zones):
-    ayanamsa = lahiri_ayanamsa_from_utc(utc_time)
-    bodies = load_bodies()
-    # modulation_zones = load_modulation_zones()
-    # print(f"Ayanamsa adjusted: {ayanamsa}")
+# How retrograde_status is decided: the zone/phase heuristic of retrograde_flag(), or
+# true stations read from the event_solver tables ("Retrograde"/"Direct" only)
+RETROGRADE_MODES = ("heuristic", "stations")
 
-    planet_info = {}
+# Where longitudes come from: live ephem calls, or the memory-mapped ephemeris_table
+BACKENDS = ("ephem", "table")
 
-    # Calculate Sun's sidereal longitude and zone first
-    sun = ephem.Sun()
-    sun.compute(utc_time)
-    ecl = ephem.Ecliptic(sun)
-    sun_longitude = ecl.lon * (180.0 / pi) - ayanamsa
-    sun_zone = get_zone_info(sun_longitude, modulation_zones)["zone"]          
+def compute_planetary_info(utc_time, modulation_zones, retrograde="heuristic", backend="ephem", table=None):
+    return compute_planetary_info_batch([utc_time], modulation_zones, retrograde, backend, table)[0]
 
-    for body, planet_number, mythic_lineage, healing_bias, civic_roles, semantic_function, role_description in bodies:
-        lon = get_sidereal_longitude(body, utc_time, ayanamsa)
-        zone_data = get_zone_info(lon, modulation_zones)
-        planet_zone = zone_data["zone"]
-        retrograde_status = retrograde_flag(body, planet_zone, sun_longitude, sun_zone,utc_time, ayanamsa)
+def ephem_body_titles(bodies):
+    """Bodies computed through ephem (everything but the closed-form ones), plus the Sun."""
+    titles = [body.title() for body, *_ in bodies if body.title() not in CLOSED_FORM_BODIES]
+    if 'Sun' not in titles:
+        titles.append('Sun')
+    return titles
 
-        
-        # Store all details
-        planet_info[body] = {
-            "longitude": lon,
-            "planet_number": planet_number,
-            "planet_mythic_lineage": mythic_lineage,
-            "planet_healing_bias": healing_bias,
-            "planet_civic_roles": civic_roles,
-            "planet_semantic_function": semantic_function,
-            "planet_role_description": role_description,
-            **zone_data,
-            "retrograde_status": retrograde_status
+def ephem_positions(timestamps, titles):
+    """
+    Live backend: ephem dates, ayanamsas, unnormalized sidereal longitudes
+    (ecliptic longitude - ayanamsa) and Mercury/Venus phases for every timestamp.
+    """
+    if ephem is None:
+        raise ImportError("ephem is required for backend='ephem'; use backend='table' instead")
+    n = len(timestamps)
+    dates = [ephem.Date(utc_time) for utc_time in timestamps]
+    ayanamsas = [lahiri_ayanamsa_from_utc(utc_time) for utc_time in timestamps]
+    jd = np.array([ephem.julian_date(date) for date in dates])
+
+    # One reusable ephem object per supported body, computed once per timestamp
+    ephem_bodies = {}
+    for body_title in titles:
+        if not hasattr(ephem, body_title):
+            raise ValueError(f"{body_title} requires extended support (e.g., Swiss Ephemeris)")
+        ephem_bodies[body_title] = getattr(ephem, body_title)()
+
+    raw_longitudes = {body_title: np.empty(n) for body_title in ephem_bodies}
+    phases = {body_title: np.empty(n) for body_title in PHASE_BODIES if body_title in ephem_bodies}
+    for i, (date, ayanamsa) in enumerate(zip(dates, ayanamsas)):
+        for body_title, planet in ephem_bodies.items():
+            planet.compute(date)
+            raw_longitudes[body_title][i] = ephem.Ecliptic(planet).lon * (180.0 / pi) - ayanamsa
+            if body_title in phases:
+                phases[body_title][i] = planet.phase
+    return dates, jd, ayanamsas, raw_longitudes, phases
+
+def compute_planetary_info_batch(timestamps, modulation_zones, retrograde="heuristic", backend="ephem", table=None):
+    """
+    Compute planetary info for many UTC timestamps in one pass.
+
+    The Julian day and ayanamsa are computed once per timestamp, each ephem body is
+    computed once per timestamp (the Sun is shared with the Mercury/Venus retrograde
+    check), and the closed-form Rahu/Ketu and Lilith longitudes are evaluated as
+    NumPy arrays over the whole batch.
+
+    Args:
+        timestamps (list): UTC strings in '%Y/%m/%d %H:%M:%S' form, naive UTC datetimes
+            or ephem dates; datetimes and dates skip string parsing entirely.
+        modulation_zones (list): Output of load_modulation_zones().
+        retrograde (str): "heuristic" (default) or "stations"; see RETROGRADE_MODES.
+        backend (str): "ephem" (default) or "table", which interpolates longitudes from a
+            precomputed EphemerisTable instead of calling ephem (see ephemeris_table.py
+            for its error bounds).
+        table (EphemerisTable, optional): Table for backend="table"; defaults to
+            get_ephemeris_table().
+
+    Returns:
+        list: One planet_info dict per timestamp, identical to compute_planetary_info().
+    """
+    timestamps = list(timestamps)
+    if not timestamps:
+        return []
+    if retrograde not in RETROGRADE_MODES:
+        raise ValueError(f"Unknown retrograde mode '{retrograde}'. Expected one of {RETROGRADE_MODES}")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'. Expected one of {BACKENDS}")
+
+    bodies = get_bodies()
+    zone_index = as_zone_index(modulation_zones)
+    n = len(timestamps)
+    titles = ephem_body_titles(bodies)
+    if backend == "table":
+        # Imported here: ephemeris_table builds on this module
+        from .ephemeris_table import get_ephemeris_table
+        table = table if table is not None else get_ephemeris_table()
+        dates, jd, ayanamsas, raw_longitudes, phases = table.positions(timestamps, titles)
+    else:
+        dates, jd, ayanamsas, raw_longitudes, phases = ephem_positions(timestamps, titles)
+
+    # Closed-form bodies over the whole batch
+    ayanamsa_arr = np.array(ayanamsas)
+    rahu_arr = (mean_node_longitude(jd) - ayanamsa_arr) % 360
+    closed_form = {
+        'Rahu': rahu_arr,
+        'Ketu': (rahu_arr + 180) % 360,
+        'Lilith': (mean_lilith_longitude(jd) - ayanamsa_arr) % 360,
+    }
+
+    # Sidereal longitudes rounded exactly like get_sidereal_longitude(), then zones per body in one call
+    longitudes = {}
+    zone_positions = {}
+    for body, *_ in bodies:
+        body_title = body.title()
+        values = closed_form[body_title] if body_title in closed_form else raw_longitudes[body_title] % 360
+        longitudes[body] = [round(v, 6) for v in values.tolist()]
+        zone_positions[body] = zone_index.positions(longitudes[body]).tolist()
+    sun_longitudes = raw_longitudes['Sun'].tolist()
+    sun_zones = zone_index.zone_ids_for(sun_longitudes).tolist()
+
+    station_status = None
+    if retrograde == "stations":
+        # Imported here: event_solver builds on this module
+        from .event_solver import get_event_calendar
+        calendar = get_event_calendar(zone_index)
+        date_array = np.array([float(date) for date in dates])
+        station_status = {
+            body: ["Retrograde" if flag else "Direct" for flag in calendar.retrograde_many(body, date_array).tolist()]
+            for body, *_ in bodies
         }
 
-    # Optional: Print nicely
-    # for body, info in planet_info.items():
-    #     print(f"{body}: {info['longitude']:.6f}°, Direction: {info['retrograde_status']}, {info}")
-    # trace_all_variables()
-    return planet_info
\ No newline at end of file
+    results = []
+    for i in range(n):
+        sun_longitude = sun_longitudes[i]
+        planet_info = {}
+        for body, planet_number, mythic_lineage, healing_bias, civic_roles, semantic_function, role_description in bodies:
+            lon = longitudes[body][i]
+            position = zone_positions[body][i]
+            if position < 0:
+                raise ValueError(f"No modulation zone covers {body} longitude {lon}")
+            zone_data = zone_index.records[position]
+            body_title = body.title()
+            if station_status is not None:
+                retrograde_status = station_status[body][i]
+            elif body_title in phases:
+                retrograde_status = inner_planet_status(
+                    raw_longitudes[body_title][i].item(), sun_longitude, phases[body_title][i].item())
+            else:
+                retrograde_status = retrograde_flag(body, zone_data["zone"], sun_longitude, sun_zones[i],
+                                                    dates[i], ayanamsas[i])
+
+            planet_info[body] = {
+                "longitude": lon,
+                "planet_number": planet_number,
+                "planet_mythic_lineage": mythic_lineage,
+                "planet_healing_bias": healing_bias,
+                "planet_civic_roles": civic_roles,
+                "planet_semantic_function": semantic_function,
+                "planet_role_description": role_description,
+                **zone_data,
+                "retrograde_status": retrograde_status
+            }
+        results.append(planet_info)
+
+    return results
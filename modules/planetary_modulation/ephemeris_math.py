@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from .compute_planetary_info import LAHIRI_OFFSET, LAHIRI_RATE, LAHIRI_YEAR, to_utc_datetime
+
+# ephem dates count days from this instant (Dublin Julian date)
+DUBLIN_EPOCH = datetime(1899, 12, 31, 12)
+
+# Dublin Julian date (ephem.Date) → Julian day
+DUBLIN_JD_OFFSET = 2415020.0
+
+
+def to_dublin_days(utc_time):
+    """ephem-compatible date (days since DUBLIN_EPOCH) without importing ephem."""
+    if isinstance(utc_time, float):
+        return utc_time
+    return (to_utc_datetime(utc_time) - DUBLIN_EPOCH) / timedelta(days=1)
+
+
+def from_dublin_days(days):
+    return DUBLIN_EPOCH + timedelta(days=days)
+
+
+def ayanamsa_array(dates):
+    """lahiri_ayanamsa_from_utc() evaluated for an array of ephem dates."""
+    dates = np.asarray(dates, dtype=float)
+    years = np.arange(from_dublin_days(dates.min()).year, from_dublin_days(dates.max()).year + 2)
+    year_starts = np.array([to_dublin_days(datetime(int(y), 1, 1)) for y in years])
+    k = np.searchsorted(year_starts, dates, side="right") - 1
+    fractional_year = years[k] + (dates - year_starts[k]) / (year_starts[k + 1] - year_starts[k])
+    return np.round((fractional_year - LAHIRI_YEAR) * LAHIRI_RATE + LAHIRI_OFFSET, 6)
+
+
+def lagrange_cubic(p0, p1, p2, p3, u):
+    """Four-point Lagrange interpolation between p1 and p2 at fraction u of the step."""
+    return (p1
+            + u * ((p2 - p0) / 2
+                   + u * ((2 * p0 - 5 * p1 + 4 * p2 - p3) / 2
+                          + u * (3 * (p1 - p2) + p3 - p0) / 2)))
@@ -0,0 +1,245 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+from ..canonical_registry import REPO_ROOT
+from ..storage.region_store import make_temp_output
+from .compute_planetary_info import AYANAMSA_MODEL, PHASE_BODIES, ephem_body_titles, lahiri_ayanamsa_from_utc
+from .ephemeris_math import DUBLIN_JD_OFFSET, ayanamsa_array, from_dublin_days, lagrange_cubic, to_dublin_days
+from .load_bodies import get_bodies
+
+DEFAULT_TABLE_PATH = os.path.join(REPO_ROOT, ".cache", "ephemeris", "sidereal_daily.npy")
+
+TABLE_FORMAT_VERSION = 2
+
+# Rows sampled (evenly, ends included) for the table/sidecar fingerprint checked on open
+FINGERPRINT_ROWS = 64
+
+
+def table_meta_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
+
+def table_fingerprint(data):
+    """sha256 over FINGERPRINT_ROWS evenly spaced rows: a cheap check that a sidecar belongs to its table."""
+    idx = np.unique(np.linspace(0, len(data) - 1, FINGERPRINT_ROWS).astype(np.int64))
+    return hashlib.sha256(np.ascontiguousarray(data[idx]).tobytes()).hexdigest()
+
+
+def column_checksums(data, chunk_size=100000):
+    """sha256 of every column's values, read chunk by chunk."""
+    hashes = [hashlib.sha256() for _ in range(data.shape[1])]
+    for offset in range(0, len(data), chunk_size):
+        chunk = np.asarray(data[offset:offset + chunk_size])
+        for j, h in enumerate(hashes):
+            h.update(np.ascontiguousarray(chunk[:, j]).tobytes())
+    return [h.hexdigest() for h in hashes]
+
+
+def table_columns(titles):
+    """Column layout: one sidereal longitude per ephem body, then Mercury/Venus phases."""
+    return list(titles) + [f"{title}_phase" for title in titles if title in PHASE_BODIES]
+
+
+class EphemerisTable:
+    """
+    Memory-mapped table of sidereal longitudes on a uniform time grid.
+
+    The .npy file holds one row per grid instant and one column per table_columns()
+    entry; a .json sidecar records the grid, the columns and the error measured
+    against ephem when the table was built. Lookups gather the four surrounding
+    rows for every requested instant and interpolate them with NumPy, so only
+    the touched pages of the file are read and ephem is never imported.
+
+    Error: a daily float64 table (the default build) measured at most ~3.5e-3° for
+    the Moon, ~8e-4° for Mercury, ~2e-3 in Mercury's phase and below 1e-4° for
+    every other body, i.e. at most ~6 s of the Moon's motion. Charts agree with
+    backend="ephem" except when a body sits within that margin of a zone
+    boundary, or Mercury/Venus phase sits at the 0.1 retrograde threshold.
+    meta["max_error"] holds the figures for a particular table.
+    """
+
+    def __init__(self, path=DEFAULT_TABLE_PATH, meta_path=None):
+        meta_path = meta_path or table_meta_path(path)
+        if not os.path.exists(path) or not os.path.exists(meta_path):
+            raise FileNotFoundError(
+                f"Ephemeris table not found at {path}; build it with "
+                f"modules/createderived/build_ephemeris_table.py")
+        with open(meta_path, encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.path = path
+        self.data = np.load(path, mmap_mode="r")
+        if (self.meta.get("format") != TABLE_FORMAT_VERSION
+                or self.data.shape != (self.meta["rows"], len(self.meta["columns"]))
+                or table_fingerprint(self.data) != self.meta.get("fingerprint")):
+            raise ValueError(
+                f"Ephemeris table {path} does not match its sidecar {meta_path} (interrupted or "
+                f"older build); rebuild it with modules/createderived/build_ephemeris_table.py")
+        self.start = self.meta["start"]
+        self.step = self.meta["step_days"]
+        self.columns = self.meta["columns"]
+        self.column_index = {name: i for i, name in enumerate(self.columns)}
+        self.digest = self.meta["digest"]
+        self.first = self.start + self.step
+        self.last = self.start + (len(self.data) - 3) * self.step
+
+    def interpolate(self, dates, columns):
+        """Interpolated values of the given columns at an array of ephem dates; shape (n, len(columns))."""
+        dates = np.asarray(dates, dtype=float)
+        if len(dates) and (dates.min() < self.first or dates.max() > self.last):
+            raise ValueError(
+                f"Ephemeris table {self.path} covers {from_dublin_days(self.first):%Y/%m/%d} to "
+                f"{from_dublin_days(self.last):%Y/%m/%d}; requested instants fall outside it")
+        idx = [self.column_index[name] for name in columns]
+        x = (dates - self.start) / self.step
+        k = np.floor(x).astype(np.int64)
+        p0, p1, p2, p3 = self.data[np.stack([k - 1, k, k + 1, k + 2])][:, :, idx].astype(np.float64)
+        # Longitude columns hold angles in [0, 360): unwrap the neighbours around p1 first
+        wrap = np.array([not name.endswith("_phase") for name in columns])
+        p0, p2, p3 = (np.where(wrap, p1 + (p - p1 + 180) % 360 - 180, p) for p in (p0, p2, p3))
+        return lagrange_cubic(p0, p1, p2, p3, (x - k)[:, None])
+
+    def positions(self, timestamps, titles):
+        """
+        Table backend for compute_planetary_info_batch(): same return shape as
+        ephem_positions() — dates, Julian days, ayanamsas, unnormalized sidereal
+        longitudes and Mercury/Venus phases.
+        """
+        dates = np.array([to_dublin_days(utc_time) for utc_time in timestamps])
+        ayanamsas = [
+            lahiri_ayanamsa_from_utc(from_dublin_days(utc_time) if isinstance(utc_time, float) else utc_time)
+            for utc_time in timestamps
+        ]
+        phase_titles = [title for title in titles if title in PHASE_BODIES]
+        columns = list(titles) + [f"{title}_phase" for title in phase_titles]
+        values = self.interpolate(dates, columns)
+
+        ayanamsa_arr = np.array(ayanamsas)
+        raw_longitudes = {}
+        for j, title in enumerate(titles):
+            # Back to ecliptic longitude in [0, 360), then minus this instant's ayanamsa,
+            # exactly as the live backend forms its unnormalized sidereal longitude
+            raw_longitudes[title] = (values[:, j] + ayanamsa_arr) % 360 - ayanamsa_arr
+        phases = {title: values[:, len(titles) + j] for j, title in enumerate(phase_titles)}
+        return dates.tolist(), dates + DUBLIN_JD_OFFSET, ayanamsas, raw_longitudes, phases
+
+
+def build_ephemeris_table(path=DEFAULT_TABLE_PATH, start_year=1500, end_year=2500, step_days=1.0,
+                          dtype="float64", validation_samples=2000, chunk_size=20000, verbose=True):
+    """
+    Write the sidereal longitude table for every ephem body in bodies.csv.
+
+    The grid runs from 1 January start_year to 1 January end_year (plus two guard
+    rows each side for interpolation). Afterwards validation_samples random
+    off-grid instants are compared against ephem and the worst error per column
+    is stored in the sidecar as meta["max_error"].
+
+    Table and sidecar are staged as temporary files and moved into place together
+    once validated. meta["digest"] (the chart cache key of the table backend)
+    covers the per-column checksums of the written values, so a rebuild with a
+    different ephem or bodies.csv never reuses charts cached from the old table.
+
+    Returns:
+        dict: The sidecar metadata.
+    """
+    # Building needs ephem itself; lookups never do
+    from .transit_scanner import ephem_longitudes
+
+    titles = ephem_body_titles(get_bodies())
+    columns = table_columns(titles)
+    start = to_dublin_days(datetime(start_year, 1, 1)) - 2 * step_days
+    end = to_dublin_days(datetime(end_year, 1, 1)) + 2 * step_days
+    rows = int(np.ceil((end - start) / step_days)) + 1
+
+    fd, tmp_path = make_temp_output(path, ".npy.tmp")
+    os.close(fd)
+    fd, tmp_meta_path = make_temp_output(path, ".json.tmp")
+    os.close(fd)
+    try:
+        data = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=(rows, len(columns)))
+        for offset in range(0, rows, chunk_size):
+            grid = start + step_days * np.arange(offset, min(rows, offset + chunk_size))
+            ecliptic, phases = ephem_longitudes(grid, titles)
+            ayanamsa = ayanamsa_array(grid)
+            for j, title in enumerate(titles):
+                data[offset:offset + len(grid), j] = (ecliptic[title] - ayanamsa) % 360
+            for j, title in enumerate(t for t in titles if t in PHASE_BODIES):
+                data[offset:offset + len(grid), len(titles) + j] = phases[title]
+            if verbose:
+                print(f"[INFO] Ephemeris table: {min(rows, offset + chunk_size)}/{rows} rows")
+        data.flush()
+        checksums = column_checksums(data)
+        fingerprint = table_fingerprint(data)
+        del data
+
+        # The digest keys cached charts, so it covers the table contents, not just the grid
+        spec = [TABLE_FORMAT_VERSION, AYANAMSA_MODEL, start, step_days, rows, dtype, columns, checksums]
+        meta = {
+            "format": TABLE_FORMAT_VERSION,
+            "ayanamsa_model": AYANAMSA_MODEL,
+            "start": start,
+            "step_days": step_days,
+            "rows": rows,
+            "dtype": dtype,
+            "columns": columns,
+            "start_year": start_year,
+            "end_year": end_year,
+            "column_checksums": dict(zip(columns, checksums)),
+            "fingerprint": fingerprint,
+            "digest": hashlib.sha256(json.dumps(spec).encode("utf-8")).hexdigest()[:16],
+        }
+
+        # Validate the staged table, then move table and sidecar into place together
+        table = EphemerisTable(tmp_path, _write_meta(tmp_meta_path, meta))
+        rng = np.random.default_rng(0)
+        samples = rng.uniform(table.first, table.last, validation_samples)
+        ecliptic, phases = ephem_longitudes(samples, titles)
+        ayanamsa = ayanamsa_array(samples)
+        values = table.interpolate(samples, columns)
+        del table
+        max_error = {}
+        for j, name in enumerate(columns):
+            if name.endswith("_phase"):
+                diff = values[:, j] - phases[name[:-len("_phase")]]
+            else:
+                diff = (values[:, j] - (ecliptic[name] - ayanamsa) + 180) % 360 - 180
+            max_error[name] = float(np.abs(diff).max())
+        meta["max_error"] = max_error
+        _write_meta(tmp_meta_path, meta)
+        # A crash between these two leaves a pair EphemerisTable rejects by fingerprint
+        os.replace(tmp_path, path)
+        os.replace(tmp_meta_path, table_meta_path(path))
+    except BaseException:
+        for leftover in (tmp_path, tmp_meta_path):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        raise
+    if verbose:
+        for name, error in max_error.items():
+            print(f"  {name:<14} max error {error:.2e}")
+    return meta
+
+
+def _write_meta(meta_path, meta):
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    return meta_path
+
+
+_tables = {}
+
+
+def get_ephemeris_table(path=DEFAULT_TABLE_PATH):
+    """EphemerisTable opened once per process, reopened if the file is rebuilt."""
+    key = os.path.abspath(path)
+    meta_path = table_meta_path(path)
+    mtime = tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in (path, meta_path))
+    cached = _tables.get(key)
+    if cached is None or cached[0] != mtime:
+        _tables[key] = (mtime, EphemerisTable(path))
+    return _tables[key][1]
@@ -0,0 +1,271 @@
+import os
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+from ..canonical_registry import REPO_ROOT
+from ..storage.region_store import make_temp_output
+from ..storage.result_cache import make_cache_key
+from .compute_planetary_info import AYANAMSA_MODEL, LAHIRI_RATE, LazyModule
+from .transit_scanner import (
+    CLOSED_FORM_BODIES, ZoneIngress, bisect_crossings, ephem_longitudes, sample_bodies, to_ephem_date
+)
+from .zone_index import get_zone_index
+
+ephem = LazyModule("ephem")
+
+ZONES_PATH = "canonical/modulation/modulation_zones.csv"
+EVENT_CACHE_DIR = os.path.join(REPO_ROOT, ".cache", "events")
+
+# Bump when the solver changes in a way that alters cached tables
+EVENT_SOLVER_VERSION = 2
+
+# EventCalendars kept by get_event_calendar() (one per zone table / cache directory)
+MAX_CALENDARS = 8
+
+# Bodies that station; the Sun and Moon never do
+STATION_BODIES = ("Mercury", "Venus", "Mars", "Jupiter", "Saturn", "Uranus", "Neptune", "Pluto")
+
+# Lahiri ayanamsa rate used by lahiri_ayanamsa_from_utc(), in degrees per day
+AYANAMSA_RATE = LAHIRI_RATE / 365.2425
+
+# Sampling grid (days) used to bracket events before root finding; each must be
+# shorter than the briefest zone visit (3° zones: ~5 h for the Moon)
+SCAN_DAYS = {"Moon": 0.125}
+DEFAULT_SCAN_DAYS = 0.5
+
+# Half-width (days) of the central difference used for longitudinal velocity
+VELOCITY_STEP = 0.01
+
+# Root-finding precision for event times, in days (~0.1 s)
+EVENT_TOLERANCE_DAYS = 1e-6
+
+
+def sidereal_velocity(body, dates):
+    """
+    Sidereal longitudinal velocity (degrees/day) from a central finite difference
+    of ephem's ecliptic longitude, less the constant ayanamsa rate.
+    """
+    dates = np.asarray(dates, dtype=float)
+    ahead, _ = ephem_longitudes(dates + VELOCITY_STEP, [body])
+    behind, _ = ephem_longitudes(dates - VELOCITY_STEP, [body])
+    delta = (ahead[body] - behind[body] + 180) % 360 - 180
+    return delta / (2 * VELOCITY_STEP) - AYANAMSA_RATE
+
+
+def solve_stations(body, start, end, scan_days=1.0, tolerance_days=EVENT_TOLERANCE_DAYS):
+    """
+    True stations of body in [start, end): roots of sidereal_velocity().
+
+    Velocity is sampled every scan_days; each sign change is bisected down to
+    tolerance_days.
+
+    Returns:
+        (times, retrograde): ephem dates of the stations, and 1 where the body turns
+        retrograde there (velocity + → -), 0 where it turns direct.
+    """
+    if body not in STATION_BODIES:
+        return np.empty(0), np.empty(0, dtype=np.int8)
+    grid = np.arange(start, end + scan_days, scan_days)
+    velocity = sidereal_velocity(body, grid)
+    crossings = np.nonzero(np.sign(velocity[1:]) != np.sign(velocity[:-1]))[0]
+    lo = grid[crossings]
+    hi = grid[crossings + 1]
+    lo_positive = velocity[crossings] > 0
+    while len(lo) and (hi - lo).max() > tolerance_days:
+        mid = (lo + hi) / 2
+        mid_positive = sidereal_velocity(body, mid) > 0
+        same = mid_positive == lo_positive
+        lo = np.where(same, mid, lo)
+        hi = np.where(same, hi, mid)
+    keep = (hi >= start) & (hi < end)
+    return hi[keep], lo_positive[keep].astype(np.int8)
+
+
+def solve_ingresses(body, start, end, zone_index, scan_days=None, tolerance_days=EVENT_TOLERANCE_DAYS):
+    """
+    Zone ingresses of body in [start, end), bisected on the same rounded sidereal
+    longitude and ZoneIndex lookup compute_planetary_info() uses.
+
+    Returns:
+        (start_zone, times, zones): zone at start, then the ephem date of each
+        ingress and the zone entered.
+    """
+    scan_days = scan_days or SCAN_DAYS.get(body, DEFAULT_SCAN_DAYS)
+    grid = np.arange(start, end + scan_days, scan_days)
+    predicate = ZoneIngress(body)
+    states = predicate.states(sample_bodies(grid, [body], zone_index))
+    changes = np.nonzero(states[1:] != states[:-1])[0].tolist()
+    brackets = [(0, grid[i], grid[i + 1], states[i], states[i + 1]) for i in changes]
+    solved = bisect_crossings(brackets, [predicate], [body], zone_index, tolerance_days)
+    times = np.array([hi for _, _, hi, _, _ in solved])
+    zones = np.array([new for *_, new in solved], dtype=np.int16)
+    keep = (times >= start) & (times < end) if len(times) else np.empty(0, dtype=bool)
+    return int(states[0]), times[keep], zones[keep]
+
+
+def year_bounds(year):
+    return float(ephem.Date(datetime(year, 1, 1))), float(ephem.Date(datetime(year + 1, 1, 1)))
+
+
+def solve_year_ingresses(body, year, zone_index):
+    """Zone ingress table of one body for one calendar year (UTC)."""
+    start, end = year_bounds(year)
+    start_zone, ingress_times, ingress_zones = solve_ingresses(body, start, end, zone_index)
+    return {
+        "start_zone": np.int16(start_zone),
+        "ingress_times": ingress_times,
+        "ingress_zones": ingress_zones,
+    }
+
+
+def solve_year_stations(body, year):
+    """Station table of one body for one calendar year (UTC); independent of the zones."""
+    start, end = year_bounds(year)
+    if body in CLOSED_FORM_BODIES:
+        # Mean node and mean apogee move at a steady rate: one direction all year
+        retrograde = body in ("Rahu", "Ketu")
+        station_times, station_retrograde = np.empty(0), np.empty(0, dtype=np.int8)
+    else:
+        retrograde = body in STATION_BODIES and sidereal_velocity(body, [start])[0] < 0
+        station_times, station_retrograde = solve_stations(body, start, end)
+    return {
+        "start_retrograde": np.int8(retrograde),
+        "station_times": station_times,
+        "station_retrograde": station_retrograde,
+    }
+
+
+def solve_year(body, year, zone_index):
+    """Event table of one body for one calendar year (UTC): ingresses and stations."""
+    return {**solve_year_ingresses(body, year, zone_index), **solve_year_stations(body, year)}
+
+
+class EventCalendar:
+    """
+    Per body, per year tables of zone ingresses and true stations.
+
+    Ingress and station tables are solved separately (solve_year_ingresses(),
+    solve_year_stations()), on first use, kept in memory and stored as small .npz
+    files under cache_dir: stations per ayanamsa model, ingresses per ayanamsa
+    model and zone table digest. Retrograde and zone questions afterwards are a
+    searchsorted over a handful of event times instead of fresh ephemeris calls,
+    and retrograde questions never solve ingresses.
+
+    Retrograde status here is the true one: "Retrograde" between a station
+    turning retrograde and the next direct station, "Direct" otherwise. The mean
+    lunar nodes are always retrograde and the mean Lilith always direct.
+    """
+
+    def __init__(self, zone_index=None, cache_dir=EVENT_CACHE_DIR):
+        self.zone_index = zone_index if zone_index is not None else get_zone_index(ZONES_PATH)
+        # Stations do not depend on the zones; ingresses do, on the zone table's contents
+        stations_version = make_cache_key(EVENT_SOLVER_VERSION, AYANAMSA_MODEL)
+        ingresses_version = make_cache_key(EVENT_SOLVER_VERSION, AYANAMSA_MODEL, self.zone_index.digest)
+        self.station_dir = os.path.join(cache_dir, "stations", stations_version[:16]) if cache_dir else None
+        self.cache_dir = os.path.join(cache_dir, "ingresses", ingresses_version[:16]) if cache_dir else None
+        self._tables = {}
+
+    def _cached(self, kind, folder, body, year, solve):
+        key = (kind, body, year)
+        if key in self._tables:
+            return self._tables[key]
+        path = os.path.join(folder, f"{body}_{year}.npz") if folder else None
+        if path and os.path.exists(path):
+            with np.load(path) as data:
+                table = {name: data[name] for name in data.files}
+        else:
+            table = solve()
+            if path:
+                fd, tmp_path = make_temp_output(path, ".npz.tmp")
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        np.savez(f, **table)
+                    os.replace(tmp_path, path)
+                except BaseException:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+        self._tables[key] = table
+        return table
+
+    def ingress_table(self, body, year):
+        return self._cached("ingresses", self.cache_dir, body, year,
+                            lambda: solve_year_ingresses(body, year, self.zone_index))
+
+    def station_table(self, body, year):
+        return self._cached("stations", self.station_dir, body, year,
+                            lambda: solve_year_stations(body, year))
+
+    def year_table(self, body, year):
+        """Ingress and station table of one body for one year."""
+        return {**self.ingress_table(body, year), **self.station_table(body, year)}
+
+    def _by_year(self, dates):
+        dates = np.atleast_1d(np.asarray(dates, dtype=float))
+        years = np.array([ephem.Date(d).tuple()[0] for d in dates])
+        for year in np.unique(years).tolist():
+            yield year, np.nonzero(years == year)[0], dates[years == year]
+
+    def zone_many(self, body, dates):
+        """Zone number of body at each ephem date."""
+        dates = np.asarray(dates, dtype=float)
+        zones = np.empty(len(np.atleast_1d(dates)), dtype=int)
+        for year, idx, year_dates in self._by_year(dates):
+            table = self.ingress_table(body, year)
+            k = np.searchsorted(table["ingress_times"], year_dates, side="right")
+            lookup = np.concatenate(([table["start_zone"]], table["ingress_zones"]))
+            zones[idx] = lookup[k]
+        return zones
+
+    def retrograde_many(self, body, dates):
+        """Boolean array: is body truly retrograde at each ephem date."""
+        dates = np.asarray(dates, dtype=float)
+        flags = np.empty(len(np.atleast_1d(dates)), dtype=bool)
+        for year, idx, year_dates in self._by_year(dates):
+            table = self.station_table(body, year)
+            k = np.searchsorted(table["station_times"], year_dates, side="right")
+            lookup = np.concatenate(([table["start_retrograde"]], table["station_retrograde"]))
+            flags[idx] = lookup[k].astype(bool)
+        return flags
+
+    def zone_at(self, body, utc_time):
+        return int(self.zone_many(body, [to_ephem_date(utc_time)])[0])
+
+    def retrograde_status(self, body, utc_time):
+        return "Retrograde" if self.retrograde_many(body, [to_ephem_date(utc_time)])[0] else "Direct"
+
+    def events(self, body, year):
+        """Ingress and station events of one body in one year, in time order."""
+        table = self.year_table(body, year)
+        events = [
+            {"time": ephem.Date(t).datetime(), "event": "zone_ingress", "body": body, "to": int(z)}
+            for t, z in zip(table["ingress_times"].tolist(), table["ingress_zones"].tolist())
+        ]
+        events += [
+            {"time": ephem.Date(t).datetime(), "event": "station", "body": body,
+             "to": "Retrograde" if r else "Direct"}
+            for t, r in zip(table["station_times"].tolist(), table["station_retrograde"].tolist())
+        ]
+        return sorted(events, key=lambda event: event["time"])
+
+
+_calendars = OrderedDict()
+
+
+def get_event_calendar(zone_index=None, cache_dir=EVENT_CACHE_DIR):
+    """
+    EventCalendar shared per (zone table contents, cache directory), so equal zone
+    lists loaded afresh reuse one calendar; the MAX_CALENDARS most recently used
+    are kept.
+    """
+    zone_index = zone_index if zone_index is not None else get_zone_index(ZONES_PATH)
+    key = (zone_index.digest, cache_dir)
+    if key in _calendars:
+        _calendars.move_to_end(key)
+    else:
+        _calendars[key] = EventCalendar(zone_index, cache_dir)
+        while len(_calendars) > MAX_CALENDARS:
+            _calendars.popitem(last=False)
+    return _calendars[key]
@@ -1,4 +1,5 @@
 import csv
+from ..canonical_registry import registry
 
 def load_bodies(filepath="canonical/zodiac/bodies.csv"):
     bodies = []
@@ -15,3 +16,7 @@ def load_bodies(filepath="canonical/zodiac/bodies.csv"):
             role_description = row.get("role_description", "").strip()
             bodies.append((body, planet_number, mythic_lineage, healing_bias, civic_roles, semantic_function, role_description))
     return bodies
+
+def get_bodies(filepath="canonical/zodiac/bodies.csv"):
+    """load_bodies() memoized in the canonical registry; reparsed only when bodies.csv changes."""
+    return registry.get(filepath, load_bodies)
@@ -1,4 +1,46 @@
 # modules/planetary_modulation/match_geometry.py
+import heapq
+
+import numpy as np
+
+from ..canonical_registry import registry
+
+ARCHETYPE_MASTER_PATH = "templates/archetype_master.json"
+
+ROLE_TO_PLANET = {
+    "Karta": "Sun",
+    "Karma": "Moon",
+    "Jnaata": "Mercury",
+    "Prema": "Venus",
+    "Yoddha": "Mars",
+    "Guru": "Jupiter",
+    "Shani": "Saturn",
+    "Antariksha": "Uranus",
+    "Samudra": "Neptune",
+    "Mrityu": "Pluto",
+    "Chhaaya": "Rahu",
+    "Vimochana": "Ketu",
+    "Avidya": "Lilith"
+}
+
+ROLE_WEIGHTS = {
+    "Karta": 3,
+    "Karma": 3,
+    "Guru": 2,
+    "Shani": 2,
+    "Jnaata": 2,
+    "Prema": 2,
+    "Yoddha": 2,
+    "Antariksha": 1,
+    "Samudra": 1,
+    "Mrityu": 1,
+    "Chhaaya": 1,
+    "Vimochana": 1,
+    "Avidya": 1
+}
+
+RETROGRADE_MULTIPLIER = 1.5
+
 
 def score_pattern(pattern, planetary_data, role_to_planet, role_weights=None, retrograde_multiplier=1.5):
     """
@@ -55,52 +97,24 @@ def match_geometry(planet_data, geometry_patterns, top_n=3):
 
     Args:
         planet_data (dict): Output from compute_planetary_info().
-        geometry_patterns (dict): Preloaded geometry pattern definitions.
+        geometry_patterns (dict | ArchetypeMatcher): Preloaded geometry pattern
+            definitions, or an ArchetypeMatcher compiled from them.
         top_n (int): Number of top matches to return.
 
     Returns:
         list: Top N matching archetypes with scores and mismatch logs.
     """
-    role_to_planet = {
-        "Karta": "Sun",
-        "Karma": "Moon",
-        "Jnaata": "Mercury",
-        "Prema": "Venus",
-        "Yoddha": "Mars",
-        "Guru": "Jupiter",
-        "Shani": "Saturn",
-        "Antariksha": "Uranus",
-        "Samudra": "Neptune",
-        "Mrityu": "Pluto",
-        "Chhaaya": "Rahu",
-        "Vimochana": "Ketu",
-        "Avidya": "Lilith"
-    }
-
-    role_weights = {
-        "Karta": 3,
-        "Karma": 3,
-        "Guru": 2,
-        "Shani": 2,
-        "Jnaata": 2,
-        "Prema": 2,
-        "Yoddha": 2,
-        "Antariksha": 1,
-        "Samudra": 1,
-        "Mrityu": 1,
-        "Chhaaya": 1,
-        "Vimochana": 1,
-        "Avidya": 1
-    }
+    if isinstance(geometry_patterns, ArchetypeMatcher):
+        return geometry_patterns.match(planet_data, top_n)
 
     matches = []
     for archetype_id, pattern in geometry_patterns.items():
         score, mismatches, retrograde_roles = score_pattern(
             pattern,
             planetary_data=planet_data,
-            role_to_planet=role_to_planet,
-            role_weights=role_weights,
-            retrograde_multiplier=1.5
+            role_to_planet=ROLE_TO_PLANET,
+            role_weights=ROLE_WEIGHTS,
+            retrograde_multiplier=RETROGRADE_MULTIPLIER
         )
         matches.append({
             "archetype_id": archetype_id,
@@ -110,5 +124,113 @@ def match_geometry(planet_data, geometry_patterns, top_n=3):
             "mismatches": mismatches
         })
 
-    sorted_matches = sorted(matches, key=lambda x: x["score"], reverse=True)
-    return sorted_matches[:top_n]
\ No newline at end of file
+    # nlargest keeps input order among equal scores, like the stable sort it replaces
+    return heapq.nlargest(top_n, matches, key=lambda x: x["score"])
+
+
+class ArchetypeMatcher:
+    """
+    archetype_master.json compiled into integer arrays for vectorized scoring.
+
+    Every match_pattern entry becomes one column: its archetype, the planet its role
+    maps to, the expected zone and house (as codes from a shared value table, so
+    equality is exactly Python ==) and its role weight. A chart, or a batch of
+    charts, is encoded the same way per planet and scored against all archetypes
+    with array comparisons and one matrix product; only the top_n winners are
+    then expanded with score_pattern() into the usual match dicts, so scores,
+    ordering and mismatch logs are identical to match_geometry().
+    """
+
+    def __init__(self, geometry_patterns):
+        self.patterns = dict(geometry_patterns)
+        self.archetype_ids = list(self.patterns)
+        self.planets = list(dict.fromkeys(ROLE_TO_PLANET.values()))
+        planet_index = {planet: i for i, planet in enumerate(self.planets)}
+        self._codes = {}
+
+        arch, planet, zone, house, weight = [], [], [], [], []
+        for a, archetype_id in enumerate(self.archetype_ids):
+            for role, expected in self.patterns[archetype_id].get("match_pattern", {}).items():
+                arch.append(a)
+                planet.append(planet_index.get(ROLE_TO_PLANET.get(role), -1))
+                zone.append(self.code(expected.get("zone")))
+                house.append(self.code(expected.get("house")))
+                weight.append(ROLE_WEIGHTS.get(role, 1))
+        self.entry_planet = np.array(planet, dtype=np.int64)
+        self.entry_zone = np.array(zone, dtype=np.int64)
+        self.entry_house = np.array(house, dtype=np.int64)
+        self.entry_weight = np.array(weight, dtype=float)
+        # entries x archetypes indicator, so per-archetype sums are one matrix product
+        self.membership = np.zeros((len(arch), len(self.archetype_ids)))
+        self.membership[np.arange(len(arch)), arch] = 1.0
+
+    @classmethod
+    def load(cls, filepath=ARCHETYPE_MASTER_PATH):
+        return cls(registry.get(filepath))
+
+    def code(self, value):
+        """Shared integer code for a zone/house value (equal values share a code)."""
+        return self._codes.setdefault(value, len(self._codes))
+
+    def encode(self, charts):
+        """Per planet arrays (charts x planets): present, zone code, house code, retrograde."""
+        shape = (len(charts), len(self.planets) + 1)  # last column: roles with no planet
+        present = np.zeros(shape, dtype=bool)
+        zone = np.full(shape, -1, dtype=np.int64)
+        house = np.full(shape, -1, dtype=np.int64)
+        retro = np.zeros(shape, dtype=bool)
+        for c, chart in enumerate(charts):
+            for p, planet in enumerate(self.planets):
+                actual = chart.get(planet)
+                if not actual:
+                    continue
+                present[c, p] = True
+                zone[c, p] = self.code(actual.get("zone"))
+                house[c, p] = self.code(actual.get("template_House"))
+                retro[c, p] = actual.get("retrograde_status") == "Retrograde"
+        return present, zone, house, retro
+
+    def score_many(self, charts):
+        """(scores, retrograde_hit): charts x archetypes arrays of match_geometry() scores."""
+        present, zone, house, retro = self.encode(charts)
+        p = self.entry_planet
+        matched = present[:, p] & (zone[:, p] == self.entry_zone) & (house[:, p] == self.entry_house)
+        retro_match = matched & retro[:, p]
+        contribution = np.where(matched, self.entry_weight, 0.0) * np.where(retro_match, RETROGRADE_MULTIPLIER, 1.0)
+        return contribution @ self.membership, (retro_match @ self.membership) > 0
+
+    def top(self, scores, top_n):
+        """Archetype indexes of the top_n scores, ties kept in file order."""
+        return heapq.nlargest(top_n, range(len(scores)), key=scores.__getitem__)
+
+    def match_many(self, charts, top_n=3):
+        """match_geometry() for every chart in charts."""
+        charts = list(charts)
+        if not charts:
+            return []
+        scores, _ = self.score_many(charts)
+        results = []
+        for chart, row in zip(charts, scores.tolist()):
+            matches = []
+            for a in self.top(row, top_n):
+                archetype_id = self.archetype_ids[a]
+                pattern = self.patterns[archetype_id]
+                score, mismatches, retrograde_roles = score_pattern(
+                    pattern, chart, ROLE_TO_PLANET, ROLE_WEIGHTS, RETROGRADE_MULTIPLIER)
+                matches.append({
+                    "archetype_id": archetype_id,
+                    "score": score,
+                    "pattern": pattern,
+                    "retrograde_roles": retrograde_roles,
+                    "mismatches": mismatches
+                })
+            results.append(matches)
+        return results
+
+    def match(self, planet_data, top_n=3):
+        return self.match_many([planet_data], top_n)[0]
+
+
+def get_archetype_matcher(filepath=ARCHETYPE_MASTER_PATH):
+    """ArchetypeMatcher memoized in the canonical registry; recompiled when the file changes."""
+    return registry.get(filepath, ArchetypeMatcher.load)
@@ -0,0 +1,453 @@
+from datetime import timedelta
+from math import ceil, pi
+
+import numpy as np
+
+from ..geometry.number_index import SEMANTIC_UNITS_PATH, get_semantic_index
+from .compute_planetary_info import (
+    CLOSED_FORM_BODIES, COMBUST_ORB, DIRECT_ZONE_SPAN, OUTER_BODIES, PHASE_BODIES, RETROGRADE_PHASE, ZONE_COUNT,
+    LazyModule, to_utc_datetime, mean_node_longitude, mean_lilith_longitude
+)
+from .ephemeris_math import DUBLIN_JD_OFFSET, ayanamsa_array, lagrange_cubic
+from .load_bodies import get_bodies
+from .zone_index import as_zone_index, get_zone_index
+
+ephem = LazyModule("ephem")
+
+# retrograde_status codes used by the vectorized scanner
+STATUS_NAMES = ("Direct", "Retrograde", "Combust", "NA")
+DIRECT, RETROGRADE, COMBUST, NA = range(4)
+
+
+def to_ephem_date(value):
+    """Accept anything to_utc_datetime() does and return a float ephem date."""
+    if isinstance(value, float):
+        return value
+    return float(ephem.Date(to_utc_datetime(value)))
+
+
+def step_in_days(step):
+    if isinstance(step, timedelta):
+        return step.total_seconds() / 86400.0
+    return float(step)
+
+
+class TransitSamples:
+    """
+    Sidereal positions of a set of bodies at an array of instants.
+
+    longitudes are rounded to 6 decimals like compute_planetary_info(); positions
+    are ZoneIndex record indexes (-1 outside every zone). raw_longitudes, sun_raw,
+    sun_zones and phases are the unrounded inputs retrograde_flag() works from.
+    """
+
+    __slots__ = ("dates", "bodies", "zone_index", "longitudes", "positions",
+                 "raw_longitudes", "sun_raw", "sun_zones", "phases")
+
+    def __init__(self, dates, bodies, zone_index):
+        self.dates = dates
+        self.bodies = bodies
+        self.zone_index = zone_index
+        self.longitudes = {}
+        self.positions = {}
+        self.raw_longitudes = {}
+        self.phases = {}
+        self.sun_raw = None
+        self.sun_zones = None
+
+    def __len__(self):
+        return len(self.dates)
+
+    def zone_ids(self, body):
+        positions = self.positions[body]
+        zone_ids = self.zone_index._zone_ids
+        return np.where(positions >= 0, zone_ids[np.clip(positions, 0, None)], -1)
+
+    def zodiac_numbers(self, body):
+        table = np.array([record["zodiac_number"] for record in self.zone_index.records] + [-1])
+        return table[self.positions[body]]
+
+    def retrograde_status(self, body):
+        """retrograde_flag() / inner_planet_status() as an array of STATUS_NAMES codes."""
+        n = len(self.dates)
+        if body in PHASE_BODIES:
+            sep = np.abs(self.raw_longitudes[body] - self.sun_raw)
+            return np.where(sep > COMBUST_ORB, DIRECT,
+                            np.where(self.phases[body] <= RETROGRADE_PHASE, RETROGRADE, COMBUST))
+        if body in CLOSED_FORM_BODIES:
+            return np.full(n, RETROGRADE)
+        if body in ("Sun", "Moon"):
+            return np.full(n, DIRECT)
+        if body in OUTER_BODIES:
+            delta = np.abs(self.zone_ids(body) - self.sun_zones) % ZONE_COUNT
+            direct = (delta <= DIRECT_ZONE_SPAN) | (delta >= ZONE_COUNT - DIRECT_ZONE_SPAN)
+            return np.where(delta == 0, COMBUST, np.where(direct, DIRECT, RETROGRADE))
+        return np.full(n, NA)
+
+
+def ephem_longitudes(dates, titles):
+    """
+    Exact ecliptic longitudes (degrees, before ayanamsa) and phases from ephem.
+
+    One ephem object per body is reused over the whole array; this is the only
+    per-instant Python loop in the scanner and costs roughly 50 µs per body.
+    """
+    dates = np.asarray(dates, dtype=float)
+    n = len(dates)
+    objects = []
+    for title in titles:
+        if not hasattr(ephem, title):
+            raise ValueError(f"{title} requires extended support (e.g., Swiss Ephemeris)")
+        objects.append((title, getattr(ephem, title)()))
+    ecliptic = {title: np.empty(n) for title in titles}
+    phases = {title: np.empty(n) for title in titles if title in PHASE_BODIES}
+    for i, date in enumerate(dates.tolist()):
+        for title, planet in objects:
+            planet.compute(date)
+            ecliptic[title][i] = ephem.Ecliptic(planet).lon
+            if title in phases:
+                phases[title][i] = planet.phase
+    return {title: lon * (180.0 / pi) for title, lon in ecliptic.items()}, phases
+
+
+# Anchor spacing (days) of the interpolated ephemeris; cubic interpolation at these
+# spacings stays within ~5e-5 degree of ephem for every body in bodies.csv
+DEFAULT_ANCHOR_DAYS = {"Moon": 0.25, "Mercury": 0.5, "Venus": 0.5, "Mars": 1.0}
+FALLBACK_ANCHOR_DAYS = 2.0
+
+
+def cubic_interpolate(anchor_start, anchor_days, values, dates):
+    """Four-point Lagrange interpolation of values sampled every anchor_days from anchor_start."""
+    x = (np.asarray(dates, dtype=float) - anchor_start) / anchor_days
+    k = np.clip(np.floor(x).astype(int), 1, len(values) - 3)
+    u = x - k
+    return lagrange_cubic(values[k - 1], values[k], values[k + 1], values[k + 2], u)
+
+
+class EphemerisModel:
+    """
+    Interpolated ephem longitudes over a time window.
+
+    Each body is computed exactly with ephem on a uniform anchor grid (see
+    DEFAULT_ANCHOR_DAYS), unwrapped, and interpolated onto arbitrary instants with
+    NumPy, so millions of scan steps cost a few array operations instead of
+    millions of ephem calls.
+    """
+
+    def __init__(self, start, end, titles, anchor_days=None):
+        self.anchor_days = dict(DEFAULT_ANCHOR_DAYS, **(anchor_days or {}))
+        self.anchors = {}
+        for title in titles:
+            h = self.anchor_days.get(title, FALLBACK_ANCHOR_DAYS)
+            grid = np.arange(start - 2 * h, end + 3 * h, h)
+            ecliptic, phases = ephem_longitudes(grid, [title])
+            lon = np.unwrap(ecliptic[title], period=360)
+            self.anchors[title] = (grid[0], h, lon, phases.get(title))
+
+    def evaluate(self, dates, titles):
+        ecliptic = {}
+        phases = {}
+        for title in titles:
+            start, h, lon, phase = self.anchors[title]
+            ecliptic[title] = cubic_interpolate(start, h, lon, dates) % 360
+            if phase is not None:
+                phases[title] = cubic_interpolate(start, h, phase, dates)
+        return ecliptic, phases
+
+
+def ephem_titles_for(bodies):
+    titles = [b for b in bodies if b not in CLOSED_FORM_BODIES]
+    if "Sun" not in titles:
+        titles.append("Sun")
+    return titles
+
+
+def sample_bodies(dates, bodies, zone_index, model=None):
+    """
+    Compute TransitSamples for an array of ephem dates.
+
+    Rahu/Ketu/Lilith and the ayanamsa are pure NumPy over the whole array. ephem
+    bodies come from ephem_longitudes() (exact) or, given an EphemerisModel, from
+    interpolation; zone lookups, rounding and retrograde codes are vectorized.
+    """
+    dates = np.asarray(dates, dtype=float)
+    samples = TransitSamples(dates, list(bodies), zone_index)
+    if not len(dates):
+        return samples
+
+    ayanamsa = ayanamsa_array(dates)
+    jd = dates + DUBLIN_JD_OFFSET
+    rahu = (mean_node_longitude(jd) - ayanamsa) % 360
+    closed_form = {
+        "Rahu": rahu,
+        "Ketu": (rahu + 180) % 360,
+        "Lilith": (mean_lilith_longitude(jd) - ayanamsa) % 360,
+    }
+
+    titles = ephem_titles_for(samples.bodies)
+    if model is None:
+        ecliptic, phases = ephem_longitudes(dates, titles)
+    else:
+        ecliptic, phases = model.evaluate(dates, titles)
+    for title, lon in ecliptic.items():
+        samples.raw_longitudes[title] = lon - ayanamsa
+    samples.phases = phases
+    samples.sun_raw = samples.raw_longitudes["Sun"]
+    samples.sun_zones = zone_index.zone_ids_for(samples.sun_raw)
+
+    for body in samples.bodies:
+        values = closed_form[body] if body in closed_form else samples.raw_longitudes[body] % 360
+        samples.longitudes[body] = np.round(values, 6)
+        samples.positions[body] = zone_index.positions(samples.longitudes[body])
+    return samples
+
+
+class ZoneIngress:
+    """A body moves into a new modulation zone (optionally only into the given zones)."""
+
+    kind = "zone_ingress"
+
+    def __init__(self, body, zones=None):
+        self.body = body
+        self.bodies = (body,)
+        self.zones = set(zones) if zones is not None else None
+
+    def states(self, samples):
+        return samples.zone_ids(self.body)
+
+    def accept(self, old, new):
+        return self.zones is None or new in self.zones
+
+    def describe(self, old, new):
+        return {"event": self.kind, "body": self.body, "from": old, "to": new}
+
+
+class RetrogradeChange:
+    """A body's retrograde_status (as compute_planetary_info reports it) changes."""
+
+    kind = "retrograde_change"
+
+    def __init__(self, body):
+        self.body = body
+        self.bodies = (body,)
+
+    def states(self, samples):
+        return samples.retrograde_status(self.body)
+
+    def accept(self, old, new):
+        return True
+
+    def describe(self, old, new):
+        return {"event": self.kind, "body": self.body, "from": STATUS_NAMES[old], "to": STATUS_NAMES[new]}
+
+
+class SemanticFormation:
+    """
+    A semantic unit from semantic_24_sets.json forms: at least min_score numbers of
+    its number_pool (default: all of them) are among the planet_number and
+    zodiac_number values of the scanned bodies. With dissolve=True the reverse
+    transition is reported too.
+    """
+
+    kind = "semantic_formation"
+
+    def __init__(self, unit_id, min_score=None, dissolve=False, units_path=SEMANTIC_UNITS_PATH):
+        index = get_semantic_index(units_path)
+        if unit_id not in index.ids:
+            raise ValueError(f"Unknown semantic unit '{unit_id}' in {units_path}")
+        self.unit_id = unit_id
+        self.pool = sorted(set(index.entries[index.ids.index(unit_id)].get("number_pool", [])))
+        self.min_score = len(self.pool) if min_score is None else min_score
+        self.dissolve = dissolve
+        self.bodies = None  # every scanned body
+
+    def states(self, samples):
+        numbers = {body: planet_number for body, planet_number, *_ in get_bodies()}
+        present = {n: np.zeros(len(samples), dtype=bool) for n in self.pool}
+        for body in samples.bodies:
+            if numbers.get(body) in present:
+                present[numbers[body]][:] = True
+            zodiac = samples.zodiac_numbers(body)
+            for n, flags in present.items():
+                flags |= zodiac == n
+        score = np.zeros(len(samples), dtype=int)
+        for flags in present.values():
+            score += flags
+        return (score >= self.min_score).astype(int)
+
+    def accept(self, old, new):
+        return bool(new) or self.dissolve
+
+    def describe(self, old, new):
+        return {"event": self.kind if new else "semantic_dissolution", "unit_id": self.unit_id,
+                "from": bool(old), "to": bool(new)}
+
+
+def default_predicates(bodies):
+    return [ZoneIngress(body) for body in bodies] + [RetrogradeChange(body) for body in bodies]
+
+
+def bisect_crossings(brackets, predicates, bodies, zone_index, tolerance_days, model=None):
+    """
+    Bisect (predicate_index, lo, hi, old_state, new_state) brackets down to tolerance_days.
+
+    All brackets of a predicate advance together: each iteration samples every
+    midpoint in one sample_bodies() call over just the bodies that predicate reads
+    (interpolated when model is given, exact ephem otherwise).
+    Returns brackets with lo/hi narrowed and new_state taken at the final hi.
+    """
+    if not brackets:
+        return []
+    pred_idx = np.array([b[0] for b in brackets])
+    lo = np.array([b[1] for b in brackets], dtype=float)
+    hi = np.array([b[2] for b in brackets], dtype=float)
+    old = np.array([b[3] for b in brackets])
+    new = np.array([b[4] for b in brackets])
+
+    for p, predicate in enumerate(predicates):
+        members = np.nonzero(pred_idx == p)[0]
+        if not len(members):
+            continue
+        predicate_bodies = bodies if predicate.bodies is None else list(predicate.bodies)
+        width = float((hi[members] - lo[members]).max())
+        iterations = ceil(np.log2(width / tolerance_days)) if width > tolerance_days else 0
+        for _ in range(iterations):
+            mid = (lo[members] + hi[members]) / 2
+            state = predicate.states(sample_bodies(mid, predicate_bodies, zone_index, model))
+            moved = state != old[members]
+            lo[members] = np.where(moved, lo[members], mid)
+            hi[members] = np.where(moved, mid, hi[members])
+            new[members] = np.where(moved, state, new[members])
+    return list(zip(pred_idx.tolist(), lo.tolist(), hi.tolist(), old.tolist(), new.tolist()))
+
+
+def states_at(dates, predicates, pred_idx, bodies, zone_index):
+    """Exact state of predicates[pred_idx[i]] at dates[i]."""
+    states = np.empty(len(dates), dtype=int)
+    for p, predicate in enumerate(predicates):
+        members = pred_idx == p
+        if members.any():
+            predicate_bodies = bodies if predicate.bodies is None else list(predicate.bodies)
+            states[members] = predicate.states(sample_bodies(dates[members], predicate_bodies, zone_index))
+    return states
+
+
+def polish_exact(brackets, predicates, bodies, zone_index, tolerance_days, window_days):
+    """
+    Re-bisect interpolated event times against ephem itself.
+
+    Each event is re-bracketed to ±window_days; when ephem agrees with the model
+    at both ends (old state before, a different state after) the bracket is
+    bisected exactly, otherwise the interpolated time is kept.
+    """
+    if not brackets:
+        return []
+    pred_idx = np.array([b[0] for b in brackets])
+    times = np.array([b[2] for b in brackets], dtype=float)
+    old = np.array([b[3] for b in brackets])
+    before = states_at(times - window_days, predicates, pred_idx, bodies, zone_index)
+    after = states_at(times + window_days, predicates, pred_idx, bodies, zone_index)
+    ok = (before == old) & (after != old)
+
+    exact = bisect_crossings(
+        [(p, t - window_days, t + window_days, o, a)
+         for p, t, o, a in zip(pred_idx[ok].tolist(), times[ok].tolist(), old[ok].tolist(), after[ok].tolist())],
+        predicates, bodies, zone_index, tolerance_days)
+    polished = list(brackets)
+    for i, bracket in zip(np.nonzero(ok)[0].tolist(), exact):
+        polished[i] = bracket
+    return polished
+
+
+def scan_transits(start, end, step=timedelta(hours=6), bodies=None, predicates=None,
+                  tolerance=timedelta(seconds=1), exact=False, anchor_days=None,
+                  chunk_size=500000, modulation_zones=None):
+    """
+    Sweep a chart over [start, end] at a fixed step and report transit events.
+
+    ephem is evaluated once on a coarse anchor grid per body (EphemerisModel); every
+    step is then sampled by interpolation in chunks of chunk_size instants, each
+    predicate turns the samples into an array of discrete states, and every change
+    between consecutive steps is bisected on the model to within tolerance.
+
+    Interpolated longitudes stay within ~5e-5 degree of ephem, so event times are
+    typically within a second or two of the exact ones (longer only where a body
+    barely moves, e.g. near a station). exact=True re-bisects every event against
+    ephem directly.
+
+    Args:
+        start, end: '%Y/%m/%d %H:%M:%S' strings, naive UTC datetimes or ephem dates.
+        step (timedelta | float): Sampling step (float = days). It must be shorter
+            than the briefest state it should catch; the Moon crosses a zone in
+            about half a day, so the 6 hour default suits every body here.
+        bodies (list, optional): Bodies to sample; defaults to every body in bodies.csv.
+            SemanticFormation uses the numbers of these bodies only.
+        predicates (list, optional): ZoneIngress / RetrogradeChange / SemanticFormation
+            instances (anything with bodies, states(), accept(), describe()).
+            Defaults to zone ingress and retrograde change for every body.
+        tolerance (timedelta | float): Bisection precision for event times.
+        exact (bool): Polish every event time with direct ephem calls.
+        anchor_days (dict, optional): Overrides for DEFAULT_ANCHOR_DAYS.
+        modulation_zones: ZoneIndex or load_modulation_zones() list (default: canonical CSV).
+
+    Returns:
+        list: Event dicts sorted by time, e.g.
+            {"time": datetime, "event": "zone_ingress", "body": "Mars", "from": 7, "to": 8}
+        When several changes fall inside one step only the first is reported.
+    """
+    zone_index = as_zone_index(modulation_zones) if modulation_zones is not None else get_zone_index()
+    if bodies is None:
+        bodies = [body for body, *_ in get_bodies()]
+    bodies = list(bodies)
+    if predicates is None:
+        predicates = default_predicates(bodies)
+    for predicate in predicates:
+        missing = [b for b in predicate.bodies or () if b not in bodies]
+        if missing:
+            raise ValueError(f"{type(predicate).__name__} needs bodies not being scanned: {missing}")
+    # Sample only what the predicates read
+    if any(predicate.bodies is None for predicate in predicates):
+        sampled = bodies
+    else:
+        sampled = [b for b in bodies if any(b in predicate.bodies for predicate in predicates)]
+
+    start_date = to_ephem_date(start)
+    end_date = to_ephem_date(end)
+    step_days = step_in_days(step)
+    if step_days <= 0:
+        raise ValueError("step must be positive")
+    tolerance_days = step_in_days(tolerance)
+    total = int(np.floor((end_date - start_date) / step_days)) + 1
+    if total <= 0:
+        return []
+    model = EphemerisModel(start_date, end_date, ephem_titles_for(sampled), anchor_days)
+
+    brackets = []
+    previous = None  # (date, [state per predicate]) of the last sample in the previous chunk
+    for offset in range(0, total, chunk_size):
+        dates = start_date + step_days * np.arange(offset, min(total, offset + chunk_size))
+        samples = sample_bodies(dates, sampled, zone_index, model)
+        last_states = []
+        for p, predicate in enumerate(predicates):
+            states = predicate.states(samples)
+            chunk_dates = dates
+            if previous is not None:
+                states = np.concatenate(([previous[1][p]], states))
+                chunk_dates = np.concatenate(([previous[0]], dates))
+            for i in np.nonzero(states[1:] != states[:-1])[0].tolist():
+                brackets.append((p, chunk_dates[i], chunk_dates[i + 1], states[i], states[i + 1]))
+            last_states.append(states[-1])
+        previous = (dates[-1], last_states)
+
+    brackets = bisect_crossings(brackets, predicates, sampled, zone_index, tolerance_days, model)
+    if exact:
+        brackets = polish_exact(brackets, predicates, sampled, zone_index, tolerance_days,
+                                window_days=max(step_days / 8, 64 * tolerance_days))
+
+    events = []
+    for p, lo, hi, old, new in brackets:
+        predicate = predicates[p]
+        if predicate.accept(old, new):
+            events.append({"time": ephem.Date(hi).datetime(), **predicate.describe(old, new)})
+    events.sort(key=lambda event: event["time"])
+    return events
@@ -0,0 +1,114 @@
+import hashlib
+import json
+from bisect import bisect_right
+from types import MappingProxyType
+
+import numpy as np
+
+from ..canonical_registry import registry
+from .load_modulation_zones import load_modulation_zones
+
+
+def zone_record(zone):
+    """Build the zone_info block that compute_planetary_info merges into each body."""
+    return {
+        "zone": zone["zone"],
+        "sign": zone["sign"],
+        "sign_ruler": zone["ruler"],
+        "nakshatra": zone["nakshatra"],
+        "nakshatra_ruler": zone["nak_ruler"],
+        "template_House": zone["house"],
+        'modulation_stage': zone["stage"],
+        'zodiac_number': zone["zodiac_number"],
+        'containment_flag': zone["containment_flag"],
+        'mythic_tags': zone["mythic_tags"],
+        'Engine': zone["Engine"],
+        'Category': zone["Category"],
+        'CollectiveMeaning': zone["CollectiveMeaning"],
+        'zoneEssence': zone["zoneEssence"]
+    }
+
+
+class ZoneIndex:
+    """
+    Precompiled sidereal longitude → modulation zone lookup.
+
+    Zones are sorted by their start boundary so a longitude resolves with one
+    bisect (or one numpy.searchsorted for arrays) instead of a scan over all 36
+    rows. Zone records are built once and shared as read-only mappings.
+
+    Semantics match the linear scan in get_zone_info(): longitudes are taken
+    modulo 360 and a zone matches when start <= longitude < end.
+    """
+
+    def __init__(self, modulation_zones):
+        ordered = sorted(modulation_zones, key=lambda z: z["start"])
+        self.zones = list(modulation_zones)
+        self.starts = [z["start"] for z in ordered]
+        self.ends = [z["end"] for z in ordered]
+        self.zone_ids = [z["zone"] for z in ordered]
+        self.records = [MappingProxyType(zone_record(z)) for z in ordered]
+        self.by_zone = {z["zone"]: record for z, record in zip(ordered, self.records)}
+
+        self._starts = np.array(self.starts, dtype=float)
+        self._ends = np.array(self.ends, dtype=float)
+        self._zone_ids = np.array(self.zone_ids, dtype=int)
+        self._digest = None
+
+    @property
+    def digest(self):
+        """sha256 of the zone table's contents: equal for equal zones, however they were loaded."""
+        if self._digest is None:
+            content = [self.starts, self.ends, self.zone_ids, [dict(record) for record in self.records]]
+            payload = json.dumps(content, sort_keys=True, default=str).encode("utf-8")
+            self._digest = hashlib.sha256(payload).hexdigest()
+        return self._digest
+
+    @classmethod
+    def load(cls, filepath="canonical/modulation/modulation_zones.csv"):
+        return cls(load_modulation_zones(filepath))
+
+    def __len__(self):
+        return len(self.records)
+
+    def position(self, longitude):
+        """Index into self.records for a longitude, or -1 if it falls outside every zone."""
+        longitude = longitude % 360
+        i = bisect_right(self.starts, longitude) - 1
+        if i >= 0 and longitude < self.ends[i]:
+            return i
+        return -1
+
+    def lookup(self, longitude):
+        """Shared zone record for a longitude, or None if no zone matches."""
+        i = self.position(longitude)
+        return self.records[i] if i >= 0 else None
+
+    def positions(self, longitudes):
+        """Vectorized position(): array of record indexes, -1 where no zone matches."""
+        lons = np.mod(np.asarray(longitudes, dtype=float), 360)
+        idx = np.searchsorted(self._starts, lons, side="right") - 1
+        safe = np.clip(idx, 0, len(self._starts) - 1)
+        valid = (idx >= 0) & (lons < self._ends[safe])
+        return np.where(valid, idx, -1)
+
+    def zone_ids_for(self, longitudes):
+        """Map an array of longitudes to zone ids in one call (0 where no zone matches)."""
+        idx = self.positions(longitudes)
+        return np.where(idx >= 0, self._zone_ids[np.clip(idx, 0, None)], 0)
+
+    def lookup_many(self, longitudes):
+        """Shared zone records for an array of longitudes (None where no zone matches)."""
+        return [self.records[i] if i >= 0 else None for i in self.positions(longitudes).tolist()]
+
+
+def as_zone_index(modulation_zones):
+    """Accept either a ZoneIndex or the list from load_modulation_zones()."""
+    if isinstance(modulation_zones, ZoneIndex):
+        return modulation_zones
+    return ZoneIndex(modulation_zones)
+
+
+def get_zone_index(filepath="canonical/modulation/modulation_zones.csv"):
+    """ZoneIndex memoized in the canonical registry; rebuilt only when the zones CSV changes."""
+    return registry.get(filepath, ZoneIndex.load)
@@ -0,0 +1,270 @@
+import gzip
+import io
+import json
+import os
+
+from .region_store import atomic_write_json, iter_region_json, make_temp_output, region_name
+
+FORMAT = "incorp-normalized"
+FORMAT_VERSION = 1
+
+# File suffix per compression ("none" writes plain JSON lines)
+COMPRESSION_SUFFIXES = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst", "none": ".jsonl"}
+
+# Engine-level overlay keys of a pruned EngineMap (everything else is a planet)
+ENGINE_OVERLAYS = ("geometry_enrichment", "semantic_unit_enrichment")
+
+
+def normalized_region_path(utc_file, compression="gzip", prefix="incorp_"):
+    """incorp_<region>.jsonl[.gz|.zst] path next to a utc_<region>.csv file."""
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown compression '{compression}'. Expected one of {sorted(COMPRESSION_SUFFIXES)}")
+    return os.path.join(os.path.dirname(utc_file), f"{prefix}{region_name(utc_file)}{COMPRESSION_SUFFIXES[compression]}")
+
+
+def is_normalized_path(path):
+    return path.endswith(tuple(COMPRESSION_SUFFIXES.values()))
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd compression needs the 'zstandard' package (pip install zstandard)") from None
+    return zstandard
+
+
+def open_text(path, mode="r"):
+    """Open a .jsonl / .jsonl.gz / .jsonl.zst file as a UTF-8 text stream ("r" or "w")."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=6)
+    if path.endswith(".zst"):
+        zstandard = _zstandard()
+        raw = open(path, mode + "b")
+        if mode == "w":
+            stream = zstandard.ZstdCompressor(level=10).stream_writer(raw)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class Dictionary:
+    """
+    Shared dictionary of a normalized file: section -> {id: value}.
+
+    intern() stores a value once under a canonical id (e.g. "Sun:35" for the Sun in
+    zone 35) and returns the id to reference it by. Should a different value ever
+    arrive under an id already taken, it gets the next free "<id>~<n>", so the
+    format stays lossless whatever the canonical files contain.
+    """
+
+    def __init__(self):
+        self.sections = {}
+
+    def intern(self, section, ref, value):
+        """(id, new): the id value is stored under and whether it was just added."""
+        entries = self.sections.setdefault(section, {})
+        candidate, n = ref, 0
+        while candidate in entries:
+            if entries[candidate] == value:
+                return candidate, False
+            n += 1
+            candidate = f"{ref}~{n}"
+        entries[candidate] = value
+        return candidate, True
+
+    def define(self, section, ref, value):
+        self.sections.setdefault(section, {})[ref] = value
+
+    def lookup(self, section, ref):
+        return self.sections[section][ref]
+
+
+def planet_ref(planet_name, planet_data):
+    zone = planet_data.get("zone") if isinstance(planet_data, dict) else None
+    number = zone.get("number") if isinstance(zone, dict) else None
+    return planet_name if number is None else f"{planet_name}:{number}"
+
+
+def normalize_record(record, dictionary):
+    """
+    Reference form of one synthesis, plus the dictionary entries it introduced.
+
+    Each EngineMap planet becomes an id into "planets" (its body and zone) and each
+    geometry_enrichment entry an id into "geometries"; every other field is kept
+    as is.
+
+    Returns:
+        (dict, list): The normalized record and [(section, id, value)] for the
+        dictionary entries not seen before.
+    """
+    engine_map = record.get("EngineMap")
+    if not isinstance(engine_map, dict):
+        return record, []
+    added = []
+
+    def intern(section, ref, value):
+        ref, new = dictionary.intern(section, ref, value)
+        if new:
+            added.append((section, ref, value))
+        return ref
+
+    engines = {}
+    for engine, planets in engine_map.items():
+        normalized = {"planets": {}}
+        for planet_name, planet_data in planets.items():
+            if planet_name not in ENGINE_OVERLAYS:
+                normalized["planets"][planet_name] = intern(
+                    "planets", planet_ref(planet_name, planet_data), planet_data)
+        if "geometry_enrichment" in planets:
+            normalized["geometry_enrichment"] = [
+                intern("geometries", geometry_id, {geometry_id: text})
+                for geometry_id, text in planets["geometry_enrichment"].items()
+            ]
+        if "semantic_unit_enrichment" in planets:
+            normalized["semantic_unit_enrichment"] = planets["semantic_unit_enrichment"]
+        engines[engine] = normalized
+    return {**record, "EngineMap": engines}, added
+
+
+def expand_record(record, dictionary):
+    """Verbose synthesis (as written to incorp_<region>.json) of a normalized record."""
+    engine_map = record.get("EngineMap")
+    if not isinstance(engine_map, dict):
+        return record
+    engines = {}
+    for engine, normalized in engine_map.items():
+        planets = {name: dictionary.lookup("planets", ref) for name, ref in normalized.get("planets", {}).items()}
+        if "geometry_enrichment" in normalized:
+            planets["geometry_enrichment"] = {
+                geometry_id: text
+                for ref in normalized["geometry_enrichment"]
+                for geometry_id, text in dictionary.lookup("geometries", ref).items()
+            }
+        if "semantic_unit_enrichment" in normalized:
+            planets["semantic_unit_enrichment"] = normalized["semantic_unit_enrichment"]
+        engines[engine] = planets
+    return {**record, "EngineMap": engines}
+
+
+class NormalizedRegionWriter:
+    """
+    Streaming writer for the normalized incorp_<region>.jsonl[.gz|.zst] format.
+
+    The file is JSON lines: a header, then dictionary entries ({"def": section,
+    "id", "value"}) and entities ({"key", "entity"}) in the order they arise. A
+    dictionary entry is always written before the first entity that references
+    it, so the file can be read, and expanded, front to back in one pass.
+
+    Lines go to a temporary file that replaces the target on close(). Entities of
+    an existing file at the target that were not put again are carried over
+    (after the new ones), as RegionStore keeps the records a run does not touch.
+    Has the same put()/close()/context-manager interface as RegionStore.
+    """
+
+    def __init__(self, path, ensure_ascii=True):
+        self.path = path
+        self.ensure_ascii = ensure_ascii
+        self.dictionary = Dictionary()
+        self.keys = set()
+        # Same extension as the target: open_text() picks the compression from it
+        fd, self.tmp_path = make_temp_output(path)
+        os.close(fd)
+        try:
+            self.f = open_text(self.tmp_path, "w")
+        except BaseException:
+            os.remove(self.tmp_path)
+            raise
+        self._write({"format": FORMAT, "version": FORMAT_VERSION})
+
+    def _write(self, obj):
+        self.f.write(json.dumps(obj, ensure_ascii=self.ensure_ascii, separators=(",", ":")) + "\n")
+
+    def put(self, key, data):
+        normalized, added = normalize_record(data, self.dictionary)
+        for section, ref, value in added:
+            self._write({"def": section, "id": ref, "value": value})
+        self._write({"key": key, "entity": normalized})
+        self.keys.add(key)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def close(self):
+        if self.f is None:
+            return
+        if os.path.exists(self.path):
+            try:
+                previous = load_normalized_region(self.path)
+            except (ValueError, OSError, EOFError) as e:
+                print(f"[WARN] Could not read {self.path}: {e}. Its entities are not carried over.")
+                previous = {}
+            for key, record in previous.items():
+                if key not in self.keys:
+                    self.put(key, record)
+        self.f.close()
+        self.f = None
+        os.replace(self.tmp_path, self.path)
+
+    def discard(self):
+        """Drop what was written; the existing file at the target is left untouched."""
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+        return False
+
+
+def iter_normalized_region(path, expand=True):
+    """
+    Stream the (key, record) pairs of a normalized file; with expand=False the
+    records keep their dictionary references.
+
+    A key written twice is yielded twice; the later record is the current one.
+    """
+    dictionary = Dictionary()
+    with open_text(path, "r") as f:
+        header = json.loads(f.readline() or "null")
+        if not isinstance(header, dict) or header.get("format") != FORMAT:
+            raise ValueError(f"{path}: not a {FORMAT} file")
+        if header.get("version", 0) > FORMAT_VERSION:
+            raise ValueError(f"{path}: format version {header['version']} is newer than {FORMAT_VERSION}")
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "def" in entry:
+                dictionary.define(entry["def"], entry["id"], entry["value"])
+            elif expand:
+                yield entry["key"], expand_record(entry["entity"], dictionary)
+            else:
+                yield entry["key"], entry["entity"]
+
+
+def load_normalized_region(path, expand=True):
+    """{key: record} of a normalized file, in the layout of incorp_<region>.json when expanded."""
+    return dict(iter_normalized_region(path, expand))
+
+
+def iter_region_records(path):
+    """(key, verbose record) pairs of an incorp_<region> file in either format."""
+    if is_normalized_path(path):
+        return iter_normalized_region(path)
+    return iter_region_json(path)
+
+
+def expand_region(path, json_path, indent=2, ensure_ascii=True):
+    """Write the verbose incorp_<region>.json of a normalized file, as RegionStore writes it."""
+    atomic_write_json(json_path, load_normalized_region(path), indent=indent, ensure_ascii=ensure_ascii)
+    return json_path
@@ -0,0 +1,221 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from .region_store import make_temp_output, region_name
+
+# One row per (entity, body); entity and body are indexes into the sidecar lists
+PLACEMENT_DTYPE = np.dtype([
+    ("entity", "<i4"),
+    ("body", "<i2"),
+    ("longitude", "<f8"),
+    ("zone", "<i2"),
+    ("zodiac_number", "<i2"),
+    ("planet_number", "<i2"),
+    ("retrograde", "i1"),
+])
+
+# retrograde column code -> retrograde_status (-1 when the chart has none)
+RETROGRADE_STATUSES = ["NA", "Direct", "Retrograde", "Combust"]
+_RETROGRADE_CODES = {status: code for code, status in enumerate(RETROGRADE_STATUSES)}
+
+MISSING = -1
+
+# Rows sampled (evenly, ends included) for the rows/sidecar fingerprint checked on load
+FINGERPRINT_ROWS = 64
+
+
+def placement_paths(utc_file, prefix="placements_"):
+    """(placements_<region>.npy, placements_<region>.meta.json) next to a utc_<region>.csv file."""
+    base = os.path.join(os.path.dirname(utc_file), f"{prefix}{region_name(utc_file)}")
+    return f"{base}.npy", f"{base}.meta.json"
+
+
+def placement_fingerprint(rows):
+    """sha256 over FINGERPRINT_ROWS evenly spaced rows: a cheap check that a sidecar belongs to its .npy."""
+    idx = np.unique(np.linspace(0, len(rows) - 1, FINGERPRINT_ROWS).astype(np.int64)) if len(rows) else []
+    return hashlib.sha256(np.ascontiguousarray(rows[idx]).tobytes()).hexdigest()
+
+
+def _int(value):
+    return value if isinstance(value, int) else MISSING
+
+
+def _float(value):
+    return float(value) if isinstance(value, (int, float)) else np.nan
+
+
+class PlacementColumnWriter:
+    """
+    Columnar export of chart placements: a structured PLACEMENT_DTYPE array saved as
+    .npy (memory-mappable) plus a .meta.json sidecar with the entity names, body
+    names and retrograde statuses the integer columns index into.
+
+    Rows are grouped by entity in put() order, bodies in chart order. Both files
+    are written on close(): staged as temporary files and moved into place back
+    to back, and the sidecar records the row count and a fingerprint of the rows
+    so load_placements() rejects a torn pair. Entities already in an existing
+    export that were not put again are carried over (after the new ones), as
+    RegionStore keeps the records a run does not touch. Leaving the context on
+    an exception skips close(): nothing is staged before it, so the existing
+    export is left untouched.
+
+    Usage:
+        with PlacementColumnWriter(npy_path, meta_path) as writer:
+            writer.put(record, chart)
+    """
+
+    def __init__(self, npy_path, meta_path):
+        self.npy_path = npy_path
+        self.meta_path = meta_path
+        self.entities = []
+        self.entity_index = {}
+        self.bodies = []
+        self.body_index = {}
+        self.rows = []
+
+    def _body(self, name):
+        if name not in self.body_index:
+            self.body_index[name] = len(self.bodies)
+            self.bodies.append(name)
+        return self.body_index[name]
+
+    def put(self, record, chart):
+        name = record.name if hasattr(record, "name") else record
+        if name in self.entity_index:
+            # A later put of the same entity replaces its rows
+            entity = self.entity_index[name]
+            self.rows = [row for row in self.rows if row[0] != entity]
+        else:
+            entity = self.entity_index[name] = len(self.entities)
+            self.entities.append(name)
+        for body, pdata in chart.items():
+            if not isinstance(pdata, dict):
+                continue
+            self.rows.append((
+                entity, self._body(body), _float(pdata.get("longitude")), _int(pdata.get("zone")),
+                _int(pdata.get("zodiac_number")), _int(pdata.get("planet_number")),
+                _RETROGRADE_CODES.get(pdata.get("retrograde_status"), MISSING),
+            ))
+
+    def _carry_over(self):
+        try:
+            previous = load_placements(self.npy_path, self.meta_path, mmap=False)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[WARN] Could not read {self.npy_path}: {e}. Its entities are not carried over.")
+            return
+        body_codes = np.array([self._body(body) for body in previous.bodies], dtype=np.int16)
+        for entity, name in enumerate(previous.entities):
+            if name in self.entity_index:
+                continue
+            block = previous.entity_rows(entity)
+            code = self.entity_index[name] = len(self.entities)
+            self.entities.append(name)
+            self.rows.extend(
+                (code, int(body_codes[row["body"]]), float(row["longitude"]), int(row["zone"]),
+                 int(row["zodiac_number"]), int(row["planet_number"]), int(row["retrograde"]))
+                for row in block
+            )
+
+    def to_array(self):
+        rows = np.array(self.rows, dtype=PLACEMENT_DTYPE)
+        # Stable sort keeps chart order within an entity after replaced puts
+        return rows[np.argsort(rows["entity"], kind="stable")]
+
+    def close(self):
+        if os.path.exists(self.npy_path) and os.path.exists(self.meta_path):
+            self._carry_over()
+        rows = self.to_array()
+        meta = {"entities": self.entities, "bodies": self.bodies, "retrograde": RETROGRADE_STATUSES,
+                "rows": len(rows), "fingerprint": placement_fingerprint(rows)}
+        fd, tmp_path = make_temp_output(self.npy_path)
+        os.close(fd)
+        fd, tmp_meta_path = make_temp_output(self.meta_path)
+        os.close(fd)
+        try:
+            with open(tmp_path, "wb") as f:
+                np.save(f, rows)
+            with open(tmp_meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+            # A crash between these two leaves a pair load_placements() rejects by fingerprint
+            os.replace(tmp_path, self.npy_path)
+            os.replace(tmp_meta_path, self.meta_path)
+        except BaseException:
+            for leftover in (tmp_path, tmp_meta_path):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        return False
+
+
+class PlacementTable:
+    """
+    A loaded placement export.
+
+    rows is the PLACEMENT_DTYPE array (an np.memmap with mmap=True), so column
+    access (rows["longitude"]) and entity_rows() are views into the file, not
+    copies; with_body() and with_retrograde() select rows with a boolean mask.
+    """
+
+    def __init__(self, rows, entities, bodies, retrograde):
+        self.rows = rows
+        self.entities = entities
+        self.bodies = bodies
+        self.retrograde = retrograde
+        self.entity_codes = {name: i for i, name in enumerate(entities)}
+        self.body_codes = {name: i for i, name in enumerate(bodies)}
+        # Rows are grouped by entity: entity i spans rows[starts[i]:starts[i + 1]]
+        self.starts = np.searchsorted(rows["entity"], np.arange(len(entities) + 1))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def column(self, name):
+        return self.rows[name]
+
+    def entity_rows(self, entity):
+        """Rows of one entity (name or index), as a view."""
+        if not isinstance(entity, (int, np.integer)):
+            entity = self.entity_codes[entity]
+        return self.rows[self.starts[entity]:self.starts[entity + 1]]
+
+    def with_body(self, body):
+        """Rows of one body across all entities."""
+        return self.rows[self.rows["body"] == self.body_codes[body]]
+
+    def with_retrograde(self, status):
+        return self.rows[self.rows["retrograde"] == self.retrograde.index(status)]
+
+    def entity_names(self, rows):
+        """Entity names of the given rows."""
+        return [self.entities[i] for i in np.asarray(rows["entity"]).tolist()]
+
+
+def load_placements(npy_path, meta_path=None, mmap=True):
+    """
+    Load a placement export; with mmap the rows are memory-mapped read-only.
+
+    meta_path defaults to the sidecar next to npy_path (placements_<region>.meta.json).
+    Raises ValueError when the sidecar does not belong to the rows (an interrupted
+    write, or an export from before the sidecar carried a fingerprint).
+    """
+    if meta_path is None:
+        meta_path = npy_path[:-len(".npy")] + ".meta.json" if npy_path.endswith(".npy") else f"{npy_path}.meta.json"
+    rows = np.load(npy_path, mmap_mode="r" if mmap else None)
+    if rows.dtype != PLACEMENT_DTYPE:
+        raise ValueError(f"{npy_path}: expected placement dtype {PLACEMENT_DTYPE}, found {rows.dtype}")
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("rows") != len(rows) or meta.get("fingerprint") != placement_fingerprint(rows):
+        raise ValueError(f"{npy_path} does not match its sidecar {meta_path} (interrupted or older export); "
+                         f"rerun with --columns to rewrite it")
+    return PlacementTable(rows, meta["entities"], meta["bodies"], meta["retrograde"])
@@ -0,0 +1,247 @@
+import json
+import os
+import tempfile
+
+
+def region_name(utc_file):
+    """<region> of a utc_<region>.csv path."""
+    return os.path.basename(utc_file).replace("utc_", "").replace(".csv", "")
+
+
+def region_json_path(utc_file, prefix="incorp_"):
+    """Derive the incorp_<region>.json path that sits next to a utc_<region>.csv file."""
+    base_folder = os.path.dirname(utc_file)
+    return os.path.join(base_folder, f"{prefix}{region_name(utc_file)}.json")
+
+
+def iter_region_json(path, chunk_size=1 << 20):
+    """
+    Stream the (key, record) pairs of an incorp_<region>.json object without
+    loading the whole file.
+
+    The file is read chunk by chunk and each record is decoded on its own with
+    json.JSONDecoder.raw_decode(), so memory stays at one record plus one chunk
+    however large the region is.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf = f.read(chunk_size)
+        pos = 0
+        eof = not buf
+
+        def skip(pos):
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            return pos
+
+        def decode(pos):
+            # A value ending at the buffer end (or running into more digits) may be cut short
+            nonlocal buf, eof
+            while True:
+                pos = skip(pos)
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                    if eof or (end < len(buf) and buf[end] not in "0123456789+-.eE"):
+                        return value, end
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                more = f.read(chunk_size)
+                eof = not more
+                buf += more
+
+        def expect(pos, chars):
+            nonlocal buf, eof
+            pos = skip(pos)
+            while pos == len(buf) and not eof:
+                more = f.read(chunk_size)
+                eof = not more
+                buf += more
+                pos = skip(pos)
+            if pos == len(buf) or buf[pos] not in chars:
+                found = buf[pos] if pos < len(buf) else "end of file"
+                raise ValueError(f"{path}: expected {' or '.join(map(repr, chars))} at offset {pos}, found {found!r}")
+            return buf[pos], pos + 1
+
+        if not buf.strip():
+            return
+        _, pos = expect(pos, "{")
+        first = True
+        while True:
+            if first:
+                pos = skip(pos)
+                while pos == len(buf) and not eof:
+                    more = f.read(chunk_size)
+                    eof = not more
+                    buf += more
+                    pos = skip(pos)
+                if pos < len(buf) and buf[pos] == "}":
+                    return
+            key, pos = decode(pos)
+            _, pos = expect(pos, ":")
+            value, pos = decode(pos)
+            yield key, value
+            first = False
+            sep, pos = expect(pos, ",}")
+            if sep == "}":
+                return
+            if pos > chunk_size:
+                buf = buf[pos:]
+                pos = 0
+
+
+def make_temp_output(path, suffix=None):
+    """
+    (fd, tmp_path) of a new temporary file next to path, to be os.replace()d onto it.
+
+    mkstemp() creates the file with mode 0600, which the rename would carry over;
+    it is given the mode a plain open() would (0666 minus the process umask).
+    """
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    if suffix is None:
+        suffix = os.path.splitext(path)[1]
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=suffix, dir=folder)
+    umask = os.umask(0)
+    os.umask(umask)
+    try:
+        os.fchmod(fd, 0o666 & ~umask)
+    except BaseException:
+        os.close(fd)
+        os.remove(tmp_path)
+        raise
+    return fd, tmp_path
+
+
+def atomic_write_json(path, data, indent=2, ensure_ascii=True):
+    """
+    Write JSON to a temporary file in the target folder and rename it into place.
+
+    A crash mid-write leaves the previous file untouched instead of a truncated one.
+    """
+    fd, tmp_path = make_temp_output(path, ".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, ensure_ascii=ensure_ascii)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class RegionStore:
+    """
+    Buffered store for one incorp_<region>.json file.
+
+    Records are kept in memory and the JSON file is written once, atomically, when
+    the store is closed. Each record is also appended to a JSON-lines journal
+    (incorp_<region>.json.journal) so an interrupted run can be replayed on the
+    next open instead of being lost.
+
+    Usage:
+        with RegionStore(json_path) as store:
+            for city, result in results:
+                store.put(city, result)
+    """
+
+    def __init__(self, json_path, journal=True, indent=2, ensure_ascii=True):
+        self.json_path = json_path
+        self.journal_path = f"{json_path}.journal" if journal else None
+        self.indent = indent
+        self.ensure_ascii = ensure_ascii
+        self.records = {}
+        self._journal = None
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        """Load the existing JSON file and replay any journal left by an interrupted run."""
+        self.records = {}
+        if os.path.exists(self.json_path):
+            try:
+                with open(self.json_path, "r", encoding="utf-8") as f:
+                    content = f.read().strip()
+                    if content:
+                        self.records = json.loads(content)
+                    else:
+                        print(f"[INFO] Empty JSON file at {self.json_path}. Initializing fresh structure.")
+            except json.JSONDecodeError as e:
+                print(f"[WARN] JSON decode failed for {self.json_path}: {e}. Starting fresh.")
+
+        replayed = 0
+        if self.journal_path and os.path.exists(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash can leave the last line half written
+                        break
+                    self.records[entry["key"]] = entry["data"]
+                    replayed += 1
+            if replayed:
+                print(f"[INFO] Replayed {replayed} journaled records into {self.json_path}")
+                self._dirty = True
+        return self.records
+
+    def put(self, key, data):
+        """Buffer one record, journaling it first when the journal is enabled."""
+        if self.journal_path:
+            if self._journal is None:
+                self._journal = open(self.journal_path, "a", encoding="utf-8")
+            self._journal.write(json.dumps({"key": key, "data": data}, ensure_ascii=False) + "\n")
+            self._journal.flush()
+        self.records[key] = data
+        self._dirty = True
+
+    def get(self, key, default=None):
+        return self.records.get(key, default)
+
+    def keys(self):
+        return self.records.keys()
+
+    def __contains__(self, key):
+        return key in self.records
+
+    def __len__(self):
+        return len(self.records)
+
+    def materialize(self, path=None):
+        """Write the full incorp_<region>.json layout to path (defaults to the store's own file)."""
+        target = path or self.json_path
+        atomic_write_json(target, self.records, indent=self.indent, ensure_ascii=self.ensure_ascii)
+        return target
+
+    def flush(self):
+        """Materialize the store file and drop the journal once it is safely on disk."""
+        if self._dirty:
+            self.materialize()
+            self._dirty = False
+        self._close_journal()
+        if self.journal_path and os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Keep the journal so the next run can replay what was computed
+            self._close_journal()
+        return False
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')), ".cache", "modulation_results.sqlite")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def make_cache_key(*parts):
+    """Content address for a cached result: sha256 over the '|'-joined key parts."""
+    return hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    On-disk, content-addressed cache for pipeline stage results.
+
+    Values are JSON documents stored zlib-compressed in a single SQLite file. Every
+    hit refreshes the entry's last_used time, and once the stored payload grows
+    past max_bytes the least recently used entries are evicted down to 90% of the
+    budget. The payload size is summed once on open and kept as a running total
+    by put_many() and evict(). Several processes may share one cache file (WAL
+    mode); as the running total only sees this process's writes, it is re-summed
+    before an eviction.
+
+    Usage:
+        cache = ResultCache(".cache/modulation_results.sqlite")
+        key = make_cache_key("chart", utc.isoformat(), AYANAMSA_MODEL, canonical_digest)
+        hits = cache.get_many([key])
+        cache.put_many([(key, "chart", chart)])
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY,"
+            " stage TEXT NOT NULL,"
+            " value BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results(last_used)")
+        self.conn.commit()
+        self._total = self._sum_sizes()
+
+    def get_many(self, keys):
+        """Return {key: value} for the keys present in the cache."""
+        found = {}
+        keys = list(keys)
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT key, value FROM results WHERE key IN ({placeholders})", chunk).fetchall()
+            for key, blob in rows:
+                found[key] = json.loads(zlib.decompress(blob))
+        if found:
+            now = time.time()
+            self.conn.executemany("UPDATE results SET last_used = ? WHERE key = ?", [(now, k) for k in found])
+            self.conn.commit()
+        return found
+
+    def put_many(self, entries):
+        """Store (key, stage, value) entries; value must be JSON-serializable."""
+        now = time.time()
+        rows = {}
+        for key, stage, value in entries:
+            blob = zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+            rows[key] = (key, stage, blob, len(blob), now)
+        if not rows:
+            return
+        # Entries replaced by this put no longer count towards the total
+        replaced = 0
+        keys = list(rows)
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            replaced += self.conn.execute(
+                f"SELECT COALESCE(SUM(size), 0) FROM results WHERE key IN ({placeholders})", chunk).fetchone()[0]
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO results (key, stage, value, size, last_used) VALUES (?, ?, ?, ?, ?)",
+            list(rows.values()))
+        self.conn.commit()
+        self._total += sum(row[3] for row in rows.values()) - replaced
+        self.evict()
+
+    def _sum_sizes(self):
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def total_bytes(self):
+        """Stored payload size, as the running total kept since the cache was opened."""
+        return self._total
+
+    def evict(self):
+        """Drop least recently used entries once the payload exceeds max_bytes."""
+        if not self.max_bytes or self._total <= self.max_bytes:
+            return 0
+        # Other processes may have written or evicted since open: start from the exact size
+        total = self._total = self._sum_sizes()
+        if total <= self.max_bytes:
+            return 0
+        target = int(self.max_bytes * 0.9)
+        removed = []
+        for key, size in self.conn.execute("SELECT key, size FROM results ORDER BY last_used ASC"):
+            if total <= target:
+                break
+            removed.append((key,))
+            total -= size
+        self.conn.executemany("DELETE FROM results WHERE key = ?", removed)
+        self.conn.commit()
+        self._total = total
+        return len(removed)
+
+    def clear(self, stage=None):
+        if stage is None:
+            self.conn.execute("DELETE FROM results")
+        else:
+            self.conn.execute("DELETE FROM results WHERE stage = ?", (stage,))
+        self.conn.commit()
+        self._total = self._sum_sizes()
+
+    def close(self):
+        self.conn.close()
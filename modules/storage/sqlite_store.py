@@ -0,0 +1,219 @@
+import os
+import sqlite3
+
+DEFAULT_DB_PATH = os.path.join(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')), "data", "incorp.sqlite")
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS entity ("
+    " id INTEGER PRIMARY KEY,"
+    " region TEXT NOT NULL,"
+    " kind TEXT NOT NULL,"
+    " name TEXT NOT NULL,"
+    " utc TEXT NOT NULL,"
+    " founding_intent TEXT,"
+    " UNIQUE (region, kind, name))",
+    "CREATE TABLE IF NOT EXISTS placement ("
+    " entity_id INTEGER NOT NULL,"
+    " body TEXT NOT NULL,"
+    " longitude REAL,"
+    " zone INTEGER,"
+    " sign TEXT,"
+    " zodiac_number INTEGER,"
+    " planet_number INTEGER,"
+    " retrograde TEXT)",
+    "CREATE TABLE IF NOT EXISTS engine_member ("
+    " entity_id INTEGER NOT NULL,"
+    " engine TEXT NOT NULL,"
+    " body TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS semantic_unit_match ("
+    " entity_id INTEGER NOT NULL,"
+    " engine TEXT NOT NULL,"
+    " unit_id TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS geometry_match ("
+    " entity_id INTEGER NOT NULL,"
+    " engine TEXT NOT NULL,"
+    " geometry_id TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS placement_entity ON placement(entity_id)",
+    "CREATE INDEX IF NOT EXISTS placement_body_zone ON placement(body, zone)",
+    "CREATE INDEX IF NOT EXISTS placement_body_retrograde ON placement(body, retrograde)",
+    "CREATE INDEX IF NOT EXISTS placement_zone ON placement(zone)",
+    "CREATE INDEX IF NOT EXISTS engine_member_entity ON engine_member(entity_id)",
+    "CREATE INDEX IF NOT EXISTS engine_member_body_engine ON engine_member(body, engine)",
+    "CREATE INDEX IF NOT EXISTS engine_member_engine ON engine_member(engine)",
+    "CREATE INDEX IF NOT EXISTS semantic_unit_match_entity ON semantic_unit_match(entity_id)",
+    "CREATE INDEX IF NOT EXISTS semantic_unit_match_unit ON semantic_unit_match(unit_id)",
+    "CREATE INDEX IF NOT EXISTS geometry_match_entity ON geometry_match(entity_id)",
+    "CREATE INDEX IF NOT EXISTS geometry_match_geometry ON geometry_match(geometry_id)",
+]
+
+CHILD_TABLES = ["placement", "engine_member", "semantic_unit_match", "geometry_match"]
+
+# Engine-level overlay keys of a pruned EngineMap (everything else is a body)
+ENGINE_OVERLAYS = ("geometry_enrichment", "semantic_unit_enrichment")
+
+
+def connect(path=DEFAULT_DB_PATH):
+    """Open (and if needed create) a results database in WAL mode."""
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    for statement in SCHEMA:
+        conn.execute(statement)
+    conn.commit()
+    return conn
+
+
+def entity_rows(synthesis, chart):
+    """
+    Child-table rows of one entity, without the entity id.
+
+    Placements come from the chart (compute_planetary_info() output: longitude,
+    zone, retrograde status per body); engine membership, semantic unit and
+    geometry matches from the synthesis EngineMap.
+
+    Returns:
+        dict: table -> list of row tuples.
+    """
+    rows = {table: [] for table in CHILD_TABLES}
+    for body, pdata in chart.items():
+        if not isinstance(pdata, dict):
+            continue
+        rows["placement"].append((
+            body, pdata.get("longitude"), pdata.get("zone"), pdata.get("sign"),
+            pdata.get("zodiac_number"), pdata.get("planet_number"), pdata.get("retrograde_status"),
+        ))
+    for engine, members in synthesis.get("EngineMap", {}).items():
+        for body in members:
+            if body not in ENGINE_OVERLAYS:
+                rows["engine_member"].append((engine, body))
+        for unit_id in members.get("semantic_unit_enrichment", []):
+            rows["semantic_unit_match"].append((engine, unit_id))
+        for geometry_id in members.get("geometry_enrichment", {}):
+            rows["geometry_match"].append((engine, geometry_id))
+    return rows
+
+
+class SqliteRegionStore:
+    """
+    SQLite sink for modulation results: one entity row per synthesis plus its
+    placements, engine membership, semantic unit and geometry matches.
+
+    Entities are buffered and written batch_size at a time, each batch in one
+    transaction of executemany() inserts. An entity written again (same region,
+    kind and name) replaces its earlier rows.
+
+    Usage:
+        with SqliteRegionStore("data/incorp.sqlite", "Texas", "city") as store:
+            store.put(record, synthesis, chart)
+    """
+
+    def __init__(self, path, region, kind, batch_size=1000):
+        self.path = path
+        self.region = region
+        self.kind = kind
+        self.batch_size = batch_size
+        self.conn = connect(path)
+        self.pending = []
+        self.written = 0
+
+    def put(self, record, synthesis, chart):
+        self.pending.append((record, synthesis, chart))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        # Later puts of the same entity win, as in RegionStore
+        latest = {record.name: (record, synthesis, chart) for record, synthesis, chart in self.pending}
+        self.pending = []
+        keys = [(self.region, self.kind, name) for name in latest]
+        conn = self.conn
+        with conn:
+            for table in CHILD_TABLES:
+                conn.executemany(
+                    f"DELETE FROM {table} WHERE entity_id = "
+                    "(SELECT id FROM entity WHERE region = ? AND kind = ? AND name = ?)", keys)
+            conn.executemany(
+                "INSERT INTO entity (region, kind, name, utc, founding_intent) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (region, kind, name) DO UPDATE SET"
+                " utc = excluded.utc, founding_intent = excluded.founding_intent",
+                [
+                    (self.region, self.kind, name, record.utc.isoformat(), synthesis.get("FoundingIntentCanonical"))
+                    for name, (record, synthesis, _) in latest.items()
+                ],
+            )
+            ids = {}
+            names = list(latest)
+            for start in range(0, len(names), 500):
+                chunk = names[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                ids.update(conn.execute(
+                    f"SELECT name, id FROM entity WHERE region = ? AND kind = ? AND name IN ({placeholders})",
+                    [self.region, self.kind] + chunk))
+            rows = {table: [] for table in CHILD_TABLES}
+            for name, (_, synthesis, chart) in latest.items():
+                for table, table_rows in entity_rows(synthesis, chart).items():
+                    rows[table].extend((ids[name],) + row for row in table_rows)
+            conn.executemany("INSERT INTO placement VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows["placement"])
+            conn.executemany("INSERT INTO engine_member VALUES (?, ?, ?)", rows["engine_member"])
+            conn.executemany("INSERT INTO semantic_unit_match VALUES (?, ?, ?)", rows["semantic_unit_match"])
+            conn.executemany("INSERT INTO geometry_match VALUES (?, ?, ?)", rows["geometry_match"])
+        self.written += len(latest)
+
+    def close(self):
+        if self.conn is None:
+            return
+        self.flush()
+        self.conn.close()
+        self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Batches already flushed stay committed; the partial one is written too
+        self.close()
+        return False
+
+
+def query_entities(conn, region=None, kind=None, engines=(), zones=(), retrograde=(), units=(), geometries=()):
+    """
+    (region, kind, name) of the entities matching every given filter, sorted.
+
+    Args:
+        engines: (body, engine) pairs the entity's EngineMap must contain.
+        zones: (body, zone) pairs the entity's chart must contain.
+        retrograde: Bodies that must have retrograde status "Retrograde".
+        units: Semantic unit ids matched in any engine.
+        geometries: Geometry ids matched in any engine.
+    """
+    where, params = [], []
+    if region is not None:
+        where.append("region = ?")
+        params.append(region)
+    if kind is not None:
+        where.append("kind = ?")
+        params.append(kind)
+    for body, engine in engines:
+        where.append("id IN (SELECT entity_id FROM engine_member WHERE body = ? AND engine = ?)")
+        params += [body, engine]
+    for body, zone in zones:
+        where.append("id IN (SELECT entity_id FROM placement WHERE body = ? AND zone = ?)")
+        params += [body, zone]
+    for body in retrograde:
+        where.append("id IN (SELECT entity_id FROM placement WHERE body = ? AND retrograde = 'Retrograde')")
+        params.append(body)
+    for unit_id in units:
+        where.append("id IN (SELECT entity_id FROM semantic_unit_match WHERE unit_id = ?)")
+        params.append(unit_id)
+    for geometry_id in geometries:
+        where.append("id IN (SELECT entity_id FROM geometry_match WHERE geometry_id = ?)")
+        params.append(geometry_id)
+    sql = "SELECT region, kind, name FROM entity"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return conn.execute(sql + " ORDER BY region, kind, name", params).fetchall()